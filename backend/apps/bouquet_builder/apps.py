@@ -5,3 +5,6 @@ class BouquetBuilderConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.bouquet_builder'
     verbose_name = 'Конструктор букетов'
+
+    def ready(self):
+        from . import signals  # noqa: F401
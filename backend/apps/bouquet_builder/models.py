@@ -15,6 +15,7 @@ class BouquetComponent(models.Model):
     component_type = models.CharField(max_length=15, choices=TYPE_CHOICES)
     price = models.DecimalField(max_digits=8, decimal_places=2)
     image = models.ImageField(upload_to='components/', blank=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     color = models.CharField(max_length=30, blank=True, help_text='Цвет для фильтрации (hex или название)')
     is_active = models.BooleanField(default=True)
     order = models.PositiveIntegerField(default=0)
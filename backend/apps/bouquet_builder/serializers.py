@@ -1,11 +1,15 @@
 from rest_framework import serializers
+from apps.images import ImageVariantsField
+from apps.orders.settings_cache import get_global_settings
 from .models import BouquetComponent, CustomBouquet, CustomBouquetItem
 
 
 class BouquetComponentSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = BouquetComponent
-        fields = ['id', 'name', 'component_type', 'price', 'image', 'color']
+        fields = ['id', 'name', 'component_type', 'price', 'image', 'image_variants', 'color']
 
 
 class CustomBouquetItemSerializer(serializers.ModelSerializer):
@@ -33,11 +37,28 @@ class CustomBouquetSerializer(serializers.ModelSerializer):
         ]
 
 
+class CustomBouquetItemInputSerializer(serializers.Serializer):
+    component_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+
 class CustomBouquetCreateSerializer(serializers.Serializer):
     """Создание букета из конструктора"""
-    items = serializers.ListField(child=serializers.DictField(), write_only=True)
+    items = CustomBouquetItemInputSerializer(many=True, write_only=True)
     customer_notes = serializers.CharField(required=False, default='')
 
+    def validate_items(self, items):
+        ids = {item['component_id'] for item in items}
+        components = BouquetComponent.objects.filter(pk__in=ids, is_active=True).in_bulk()
+        missing = ids - components.keys()
+        if missing:
+            raise serializers.ValidationError(f'Компоненты недоступны: {sorted(missing)}')
+        total = sum(components[item['component_id']].price * item['quantity'] for item in items)
+        min_price = get_global_settings().builder_min_price
+        if total < min_price:
+            raise serializers.ValidationError(f'Минимальная стоимость букета — {min_price} ₽')
+        return items
+
     def create(self, validated_data):
         items_data = validated_data.pop('items')
         customer = self.context['request'].user if self.context['request'].user.is_authenticated else None
@@ -49,7 +70,7 @@ class CustomBouquetCreateSerializer(serializers.Serializer):
         total = 0
         for item in items_data:
             component = BouquetComponent.objects.get(id=item['component_id'])
-            qty = item.get('quantity', 1)
+            qty = item['quantity']
             CustomBouquetItem.objects.create(
                 bouquet=bouquet,
                 component=component,
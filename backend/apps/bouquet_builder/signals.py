@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.images import schedule_variants
+from .models import BouquetComponent
+
+
+@receiver(post_save, sender=BouquetComponent)
+def build_image_variants(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_variants(instance, 'image')
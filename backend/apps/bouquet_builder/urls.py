@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import BouquetComponentViewSet, CustomBouquetViewSet
+from .views import BouquetComponentViewSet, CustomBouquetViewSet, builder_settings
 
 router = DefaultRouter()
 router.register('components', BouquetComponentViewSet, basename='component')
@@ -8,4 +8,5 @@ router.register('bouquets', CustomBouquetViewSet, basename='custom-bouquet')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('settings/', builder_settings, name='builder-settings'),
 ]
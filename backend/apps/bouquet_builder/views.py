@@ -1,8 +1,9 @@
 from rest_framework import viewsets, permissions, status
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 
+from apps.orders.settings_cache import get_global_settings
 from .models import BouquetComponent, CustomBouquet
 from .serializers import (
     BouquetComponentSerializer,
@@ -12,6 +13,16 @@ from .serializers import (
 )
 
 
+class BuilderEnabled(permissions.BasePermission):
+    """Новые букеты нельзя создать, пока конструктор выключен в GlobalSettings"""
+    message = 'Конструктор букетов временно недоступен'
+
+    def has_permission(self, request, view):
+        if view.action not in ('create', 'from_photo'):
+            return True
+        return get_global_settings().is_builder_enabled
+
+
 class BouquetComponentViewSet(viewsets.ReadOnlyModelViewSet):
     """GET /api/builder/components/?type=flower"""
     queryset = BouquetComponent.objects.filter(is_active=True)
@@ -23,7 +34,7 @@ class BouquetComponentViewSet(viewsets.ReadOnlyModelViewSet):
 
 class CustomBouquetViewSet(viewsets.ModelViewSet):
     serializer_class = CustomBouquetSerializer
-    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly, BuilderEnabled]
 
     def get_queryset(self):
         user = self.request.user
@@ -77,3 +88,14 @@ class CustomBouquetViewSet(viewsets.ModelViewSet):
         bouquet.status = 'approved'
         bouquet.save()
         return Response(CustomBouquetSerializer(bouquet).data)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def builder_settings(request):
+    """GET /api/builder/settings/ — доступность конструктора и минимальная цена"""
+    settings = get_global_settings()
+    return Response({
+        'is_builder_enabled': settings.is_builder_enabled,
+        'builder_min_price': str(settings.builder_min_price),
+    })
@@ -1,24 +1,48 @@
+from collections import defaultdict
+from decimal import Decimal
+
 from django.utils import timezone
-from django.db.models import Sum, Count, F
-from django.db.models.functions import TruncDay
-from apps.orders.models import Order
+from django.db.models import F
+from apps.orders.models import DailySalesRollup, Order
 from apps.inventory.models import StockItem
-from apps.users.models import CustomUser
+
+REVENUE_STATUSES = ('paid', 'completed', 'delivering')
+
 
 def dashboard_callback(request, context):
+    # Заказы и выручка — из сводки DailySalesRollup (apps/orders/sales.py):
+    # один запрос по индексу (date, store, status) вместо агрегатов по Order
+    today = timezone.localdate()
+    week_ago = today - timezone.timedelta(days=6)
+    rollup = list(
+        DailySalesRollup.objects.filter(date__range=(week_ago, today))
+        .values('date', 'store_id', 'store__name', 'status', 'order_count', 'revenue')
+    )
+
     # --- KPI Cards ---
-    today = timezone.now().date()
-    week_ago = today - timezone.timedelta(days=7)
+    revenue_by_day = defaultdict(Decimal)
+    status_counts = defaultdict(int)
+    stores = {}
+    for row in rollup:
+        store = stores.setdefault(row['store_id'], {
+            'name': row['store__name'] or 'Без точки',
+            'orders_today': 0, 'revenue_today': Decimal(0), 'revenue_week': Decimal(0),
+        })
+        status_counts[row['status']] += row['order_count']
+        if row['date'] == today:
+            store['orders_today'] += row['order_count']
+        if row['status'] in REVENUE_STATUSES:
+            revenue_by_day[row['date']] += row['revenue']
+            store['revenue_week'] += row['revenue']
+            if row['date'] == today:
+                store['revenue_today'] += row['revenue']
+    stores = sorted(stores.values(), key=lambda store: store['revenue_week'], reverse=True)
 
     # 1. Total Revenue (Today)
-    daily_revenue = Order.objects.filter(
-        created_at__date=today, status__in=['paid', 'completed', 'delivering']
-    ).aggregate(Sum('total'))['total__sum'] or 0
+    daily_revenue = revenue_by_day[today]
 
     # 2. New Orders (Today)
-    new_orders_count = Order.objects.filter(
-        created_at__date=today
-    ).count()
+    new_orders_count = sum(store['orders_today'] for store in stores)
 
     # 3. Low Stock Items
     low_stock_count = StockItem.objects.filter(
@@ -28,22 +52,12 @@ def dashboard_callback(request, context):
     # --- Charts ---
 
     # 1. Sales Last 7 Days (Line Chart)
-    sales_data = Order.objects.filter(
-        created_at__date__gte=week_ago,
-        status__in=['paid', 'completed', 'delivering']
-    ).annotate(day=TruncDay('created_at')).values('day').annotate(total=Sum('total')).order_by('day')
-
     days = []
     totals = []
-    # Fill in missing days
     for i in range(7):
         date = week_ago + timezone.timedelta(days=i)
-        day_str = date.strftime('%d.%m')
-        days.append(day_str)
-        
-        # Find matching data or 0
-        val = next((item['total'] for item in sales_data if item['day'].date() == date), 0)
-        totals.append(float(val))
+        days.append(date.strftime('%d.%m'))
+        totals.append(float(revenue_by_day[date]))
 
     sales_chart = {
         "labels": days,
@@ -57,10 +71,9 @@ def dashboard_callback(request, context):
         ],
     }
 
-    # 2. Orders by Status (Pie Chart)
-    status_counts = Order.objects.values('status').annotate(count=Count('id'))
+    # 2. Orders by Status (Pie Chart) — заказы, созданные за 7 дней
     status_map = dict(Order.STATUS_CHOICES)
-    
+
     pie_labels = []
     pie_data = []
     pie_colors = []
@@ -76,10 +89,10 @@ def dashboard_callback(request, context):
         'cancelled': '#f87171', # red
     }
 
-    for item in status_counts:
-        pie_labels.append(status_map.get(item['status'], item['status']))
-        pie_data.append(item['count'])
-        pie_colors.append(color_map.get(item['status'], '#9ca3af'))
+    for status, count in status_counts.items():
+        pie_labels.append(status_map.get(status, status))
+        pie_data.append(count)
+        pie_colors.append(color_map.get(status, '#9ca3af'))
 
     status_chart = {
         "labels": pie_labels,
@@ -91,6 +104,18 @@ def dashboard_callback(request, context):
         ],
     }
 
+    # 3. Revenue by Store (Bar Chart)
+    store_chart = {
+        "labels": [store['name'] for store in stores],
+        "datasets": [
+            {
+                "label": "Выручка за 7 дней (₽)",
+                "data": [float(store['revenue_week']) for store in stores],
+                "backgroundColor": "#60a5fa",
+            }
+        ],
+    }
+
     context.update({
         "kpi": [
             {
@@ -112,7 +137,11 @@ def dashboard_callback(request, context):
         ],
         "charts": [
             {"title": "Продажи за 7 дней", "chart": sales_chart, "type": "line"},
-            {"title": "Статусы заказов", "chart": status_chart, "type": "pie"},
-        ]
+            {"title": "Статусы заказов за 7 дней", "chart": status_chart, "type": "pie"},
+            {"title": "Выручка по точкам", "chart": store_chart, "type": "bar"},
+        ],
+        # По точкам: заказы и выручка за сегодня, выручка за 7 дней
+        "stores": stores,
     })
     return context
+
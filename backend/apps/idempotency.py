@@ -0,0 +1,129 @@
+"""
+Идемпотентные POST-запросы по заголовку Idempotency-Key.
+
+Клиент генерирует ключ (UUID) на одно действие и повторяет запрос с тем же
+ключом. Первый запрос выполняется и его ответ сохраняется в кэше на
+IDEMPOTENCY_KEY_TTL; повторы получают сохранённый ответ с заголовком
+Idempotent-Replayed: true — без обращения к БД.
+
+Пока первый запрос выполняется, ключ занят (cache.add — атомарно и в Redis,
+и в LocMem). Параллельный дубликат ждёт результата до
+IDEMPOTENCY_LOCK_TIMEOUT, а не выполняет работу второй раз.
+
+Ключ действует в пределах пользователя и URL. Тот же ключ с другим телом
+запроса — ошибка клиента (422). Ответы 5xx и исключения не сохраняются:
+ключ освобождается, запрос можно повторить.
+"""
+import functools
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.05
+
+PROCESSING = 'processing'
+DONE = 'done'
+
+
+def idempotent(view_method):
+    """Декоратор для create и POST-action'ов ViewSet'а"""
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {'error': f'{IDEMPOTENCY_HEADER} длиннее {MAX_KEY_LENGTH} символов'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        cache_key = _cache_key(request, key)
+        fingerprint = _fingerprint(request)
+        if cache.add(cache_key, {'state': PROCESSING, 'fingerprint': fingerprint},
+                     settings.IDEMPOTENCY_LOCK_TIMEOUT):
+            return _run(view_method, self, request, args, kwargs, cache_key, fingerprint)
+
+        # Другое тело — 422 сразу, даже если первый запрос ещё выполняется
+        stored = cache.get(cache_key)
+        if stored is not None and stored['fingerprint'] != fingerprint:
+            return _fingerprint_mismatch()
+
+        stored = _wait_for_result(cache_key)
+        if stored is None:
+            # Первый запрос упал или ключ истёк — выполняем заново
+            if cache.add(cache_key, {'state': PROCESSING, 'fingerprint': fingerprint},
+                         settings.IDEMPOTENCY_LOCK_TIMEOUT):
+                return _run(view_method, self, request, args, kwargs, cache_key, fingerprint)
+            stored = cache.get(cache_key)
+        if stored is not None and stored['fingerprint'] != fingerprint:
+            return _fingerprint_mismatch()
+        if stored is None or stored['state'] == PROCESSING:
+            return Response(
+                {'error': 'Запрос с этим ключом ещё выполняется'},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return _replay(stored)
+    return wrapper
+
+
+def _fingerprint_mismatch():
+    return Response(
+        {'error': f'{IDEMPOTENCY_HEADER} уже использован с другим запросом'},
+        status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+    )
+
+
+def _run(view_method, viewset, request, args, kwargs, cache_key, fingerprint):
+    try:
+        response = view_method(viewset, request, *args, **kwargs)
+    except Exception:
+        cache.delete(cache_key)
+        raise
+
+    if response.status_code >= 500:
+        cache.delete(cache_key)
+        return response
+    cache.set(cache_key, {
+        'state': DONE,
+        'fingerprint': fingerprint,
+        'status': response.status_code,
+        # JSON-копия: ReturnDict сериализатора не должен попасть в кэш
+        'data': json.loads(json.dumps(response.data, cls=JSONEncoder)),
+    }, settings.IDEMPOTENCY_KEY_TTL)
+    return response
+
+
+def _wait_for_result(cache_key):
+    deadline = time.monotonic() + settings.IDEMPOTENCY_LOCK_TIMEOUT
+    while True:
+        stored = cache.get(cache_key)
+        if stored is None or stored['state'] == DONE or time.monotonic() >= deadline:
+            return stored
+        time.sleep(POLL_INTERVAL)
+
+
+def _replay(stored):
+    response = Response(stored['data'], status=stored['status'])
+    response[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def _cache_key(request, key):
+    user_id = request.user.pk if request.user.is_authenticated else 'anon'
+    scope = f'{user_id}:{request.method}:{request.path}:{key}'
+    return 'idempotency:' + hashlib.sha1(scope.encode()).hexdigest()
+
+
+def _fingerprint(request):
+    body = json.dumps(request.data, cls=JSONEncoder, sort_keys=True, default=str)
+    return hashlib.sha1(body.encode()).hexdigest()
@@ -0,0 +1,155 @@
+"""
+Производные изображений (уменьшенные копии в WebP и JPEG).
+
+У каждой модели с картинкой есть JSON-поле <поле>_variants:
+
+    {
+        "source": "products/rose.jpg",
+        "width": 3024, "height": 4032,
+        "sizes": {
+            "320": {"width": 320, "height": 427,
+                    "webp": "products/variants/rose_jpg_320.webp",
+                    "jpeg": "products/variants/rose_jpg_320.jpg"},
+            ...
+        }
+    }
+
+После загрузки сигнал ставит задачу Celery (apps.products.tasks), которая
+строит варианты через Pillow. Для уже загруженных файлов —
+manage.py generate_image_variants.
+"""
+import posixpath
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+from rest_framework import serializers
+
+# (модель, поле с картинкой) — всё, для чего строятся варианты
+IMAGE_FIELDS = [
+    ('products.Category', 'image'),
+    ('products.ProductImage', 'image'),
+    ('stories.Story', 'cover_image'),
+    ('stories.StorySlide', 'image'),
+    ('bouquet_builder.BouquetComponent', 'image'),
+]
+
+FORMAT_EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+
+
+def variants_field_name(field_name):
+    return f'{field_name}_variants'
+
+
+def needs_variants(instance, field_name):
+    image = getattr(instance, field_name)
+    variants = getattr(instance, variants_field_name(field_name))
+    return bool(image) and variants.get('source') != image.name
+
+
+def schedule_variants(instance, field_name):
+    """Поставить генерацию вариантов после коммита, если картинка новая"""
+    if not needs_variants(instance, field_name):
+        return
+    from apps.products.tasks import generate_image_variants
+
+    label = instance._meta.label
+    transaction.on_commit(
+        lambda: generate_image_variants.delay(label, instance.pk, field_name)
+    )
+
+
+def generate_variants(label, pk, field_name, force=False):
+    """Построить варианты для одного объекта и сохранить карту в <поле>_variants"""
+    model = apps.get_model(label)
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None or not (force or needs_variants(instance, field_name)):
+        return False
+
+    variants_field = variants_field_name(field_name)
+    old_variants = getattr(instance, variants_field)
+    image = getattr(instance, field_name)
+    variants = build_variants(image.name)
+    delete_variants(old_variants, keep=variants)
+
+    setattr(instance, variants_field, variants)
+    # save() с update_fields вызывает сигналы (сброс кэша каталога),
+    # повторно задача не ставится — source уже совпадает
+    instance.save(update_fields=[variants_field])
+    return True
+
+
+def build_variants(name, storage=default_storage):
+    with storage.open(name) as source:
+        original = ImageOps.exif_transpose(Image.open(source))
+        original.load()
+
+    # rose.png -> variants/rose_png_320.webp: расширение в имени, чтобы
+    # rose.png и rose.jpg из одной папки не перезаписывали друг друга
+    stem = posixpath.basename(name).replace('.', '_')
+    directory = posixpath.join(posixpath.dirname(name), 'variants')
+    widths = [w for w in settings.IMAGE_VARIANT_WIDTHS if w < original.width] or [original.width]
+
+    sizes = {}
+    for width in widths:
+        height = round(original.height * width / original.width)
+        resized = original.resize((width, height), Image.LANCZOS)
+        size = {'width': width, 'height': height}
+        for image_format in settings.IMAGE_VARIANT_FORMATS:
+            path = posixpath.join(directory, f'{stem}_{width}.{FORMAT_EXTENSIONS[image_format]}')
+            size[image_format] = _save(resized, image_format, path, storage)
+        sizes[str(width)] = size
+
+    return {
+        'source': name,
+        'width': original.width,
+        'height': original.height,
+        'sizes': sizes,
+    }
+
+
+def delete_variants(variants, keep=None, storage=default_storage):
+    keep_names = set(_variant_names(keep or {}))
+    for name in _variant_names(variants):
+        if name not in keep_names:
+            storage.delete(name)
+
+
+def _variant_names(variants):
+    for size in variants.get('sizes', {}).values():
+        for image_format in FORMAT_EXTENSIONS:
+            if size.get(image_format):
+                yield size[image_format]
+
+
+def _save(image, image_format, path, storage):
+    if image_format == 'jpeg' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    image.save(buffer, format=image_format.upper(), quality=82, optimize=True)
+    if storage.exists(path):
+        storage.delete(path)
+    return storage.save(path, ContentFile(buffer.getvalue()))
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """
+    srcset-карта вариантов: {"320": {"width", "height", "webp", "jpeg"}, ...}
+    URL абсолютные, если в контексте есть request (как у ImageField).
+    """
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        sizes = {}
+        for width, size in (value or {}).get('sizes', {}).items():
+            size = dict(size)
+            for image_format in FORMAT_EXTENSIONS:
+                if size.get(image_format):
+                    url = default_storage.url(size[image_format])
+                    size[image_format] = request.build_absolute_uri(url) if request else url
+            sizes[width] = size
+        return sizes
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_alter_stockitem_options_alter_stockmovement_options_and_more'),
+        ('products', '0007_product_popularity'),
+        ('stores', '0002_alter_store_options_alter_store_is_active_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stockitem',
+            index=models.Index(condition=models.Q(('quantity__lte', models.F('min_quantity'))), fields=['store'], name='stockitem_low_stock_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['stock_item', '-created_at'], name='stockmove_item_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['-created_at'], name='stockmove_created_idx'),
+        ),
+    ]
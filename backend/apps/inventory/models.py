@@ -12,6 +12,13 @@ class StockItem(models.Model):
         verbose_name = 'Складской остаток'
         verbose_name_plural = 'Остатки на складе'
         unique_together = ['product', 'store']
+        indexes = [
+            # «Мало на складе»: в индекс попадают только позиции ниже минимума
+            models.Index(
+                fields=['store'], condition=models.Q(quantity__lte=models.F('min_quantity')),
+                name='stockitem_low_stock_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.product.name} ({self.store.name})"
@@ -36,6 +43,11 @@ class StockMovement(models.Model):
         verbose_name = 'Движение товара'
         verbose_name_plural = 'Движение товаров'
         ordering = ['-created_at']
+        indexes = [
+            # История по позиции склада и общий журнал, свежие сверху
+            models.Index(fields=['stock_item', '-created_at'], name='stockmove_item_created_idx'),
+            models.Index(fields=['-created_at'], name='stockmove_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.get_movement_type_display()} {self.quantity} шт."
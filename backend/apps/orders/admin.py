@@ -1,8 +1,31 @@
-from django.contrib import admin
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.utils import prepare_lookup_value
+from django.core.exceptions import PermissionDenied
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.http import FileResponse, Http404, HttpResponseRedirect, QueryDict
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.html import format_html
 from unfold.admin import ModelAdmin
-from unfold.contrib.import_export.forms import ExportForm, ImportForm, SelectableFieldsExportForm
-from import_export.admin import ImportExportModelAdmin
-from .models import Order, OrderItem, DeliverySettings, GlobalSettings
+from unfold.decorators import action
+from unfold.contrib.import_export.forms import ImportForm
+from import_export.admin import ImportMixin
+from .dispatch import plan_routes
+from .export import FORMATS, csv_response, export_filename
+from .models import (
+    ArchivedOrder, ArchivedOrderItem, Order, OrderEvent, OrderItem, DeliverySettings, DeliverySlot, DeliveryWindow,
+    GlobalSettings, PushNotification, StoreDailyMetrics,
+)
+from .notifications import enqueue_status_notifications
+from .slots import release_slots
+from .tasks import export_orders, schedule_geocoding
+from .transitions import record_events, transition_orders
 
 
 class OrderItemInline(admin.TabularInline):
@@ -35,32 +58,230 @@ class GlobalSettingsAdmin(ModelAdmin):
         return False
 
 
+@admin.register(DeliveryWindow)
+class DeliveryWindowAdmin(ModelAdmin):
+    """Интервалы доставки точек; слоты на даты создаются автоматически"""
+    list_display = ['store', 'weekday', 'start_time', 'end_time', 'capacity', 'is_active']
+    list_filter = ['store', 'weekday', 'is_active']
+    list_editable = ['capacity', 'is_active']
+
+
+@admin.register(DeliverySlot)
+class DeliverySlotAdmin(ModelAdmin):
+    """Загрузка слотов по датам — только просмотр, счётчики меняют заказы"""
+    list_display = ['store', 'date', 'start_time', 'end_time', 'reserved', 'capacity']
+    list_filter = ['store', 'date']
+    list_select_related = ['store']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(PushNotification)
+class PushNotificationAdmin(ModelAdmin):
+    """Outbox push-уведомлений — только просмотр, отправляет воркер"""
+    list_display = ['id', 'user', 'order', 'body', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status']
+    search_fields = ['user__phone', 'order__id']
+    list_select_related = ['user']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StoreDailyMetrics)
+class StoreDailyMetricsAdmin(ModelAdmin):
+    """Время в статусах по точкам — только просмотр, считает задача refresh_order_metrics"""
+    list_display = [
+        'date', 'store', 'accepted_count', 'accept_median_seconds', 'assembled_count', 'assembly_median_seconds',
+    ]
+    list_filter = ['store', 'date']
+    list_select_related = ['store']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class OrderEventInline(admin.TabularInline):
+    model = OrderEvent
+    extra = 0
+    fields = ['created_at', 'from_status', 'to_status', 'actor']
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('actor')
+
+
 @admin.register(Order)
-class OrderAdmin(ModelAdmin, ImportExportModelAdmin):
+class OrderAdmin(ImportMixin, ModelAdmin):
     import_form_class = ImportForm
-    export_form_class = ExportForm
     list_display = ['id', 'customer', 'status', 'delivery_type', 'total', 'is_paid', 'created_at']
     list_filter = ['status', 'delivery_type', 'is_paid', 'store']
     search_fields = ['recipient_name', 'recipient_phone', 'customer__phone']
     readonly_fields = ['payment_url', 'is_paid', 'created_at', 'updated_at']
-    inlines = [OrderItemInline]
+    inlines = [OrderItemInline, OrderEventInline]
     actions = ['mark_accept', 'mark_in_progress', 'mark_ready', 'mark_delivered']
+    # Выгрузка — своя (export.py): экспорт import_export собирает весь набор
+    # в памяти и на больших периодах не укладывается в таймаут, от него
+    # оставлен только импорт
+    actions_list = ['export_csv', 'export_xlsx']
+
+    def get_urls(self):
+        urls = [
+            path('dispatch/', self.admin_site.admin_view(self.dispatch_view), name='orders_order_dispatch'),
+            path(
+                'exports/<str:filename>/', self.admin_site.admin_view(self.export_file_view),
+                name='orders_order_export_file',
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def dispatch_view(self, request):
+        """Маршруты курьеров на выбранный день"""
+        date = parse_date(request.GET.get('date', '')) or timezone.localdate()
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Маршруты курьеров',
+            'opts': self.model._meta,
+            'date': date,
+            'plan': plan_routes(date),
+        }
+        return TemplateResponse(request, 'admin/orders/dispatch.html', context)
+
+    @action(description='Выгрузить CSV', url_path='export-csv', permissions=['view'])
+    def export_csv(self, request):
+        return self._export(request, 'csv')
+
+    @action(description='Выгрузить XLSX', url_path='export-xlsx', permissions=['view'])
+    def export_xlsx(self, request):
+        return self._export(request, 'xlsx')
+
+    def _export(self, request, export_format):
+        """Выгружаются заказы и архив с фильтрами и поиском текущего списка"""
+        if not request.GET:
+            # Кнопка над списком — ссылка без query string: фильтры берём со страницы списка
+            referer = urlparse(request.headers.get('Referer', ''))
+            if referer.path == reverse('admin:orders_order_changelist'):
+                request.GET = QueryDict(referer.query)
+        changelist = self.get_changelist_instance(request)
+        # Фильтры списка — kwargs для filter(), годные и для ArchivedOrder и для задачи Celery
+        filters = {
+            key: prepare_lookup_value(key, values[-1])
+            for key, values in changelist.get_filters_params().items()
+        }
+        if export_format == 'csv':
+            return csv_response(filters, changelist.query)
+
+        # XLSX нельзя отдавать до окончания записи — собирает задача, админ получает ссылку
+        name = export_filename(export_format)
+        export_orders.delay(export_format, filters, changelist.query, name)
+        url = reverse('admin:orders_order_export_file', args=[name.rsplit('/', 1)[-1]])
+        self.message_user(request, format_html(
+            'Выгрузка поставлена в очередь. Файл будет доступен по <a href="{}">ссылке</a>, когда сформируется.', url,
+        ))
+        return HttpResponseRedirect(request.headers.get('Referer') or reverse('admin:orders_order_changelist'))
+
+    def export_file_view(self, request, filename):
+        """Готовая выгрузка из хранилища; файлы с персональными данными — только через админку"""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        name = f'{settings.ORDER_EXPORT_DIR}/{filename}'
+        if '/' in filename or not filename.endswith(tuple(f'.{export_format}' for export_format in FORMATS)):
+            raise Http404
+        if not default_storage.exists(name):
+            self.message_user(request, 'Выгрузка ещё формируется, попробуйте через минуту.', messages.WARNING)
+            return HttpResponseRedirect(reverse('admin:orders_order_changelist'))
+        return FileResponse(default_storage.open(name), as_attachment=True, filename=filename)
+
+    def save_model(self, request, obj, form, change):
+        address_changed = 'delivery_address' in form.changed_data
+        if address_changed:
+            obj.delivery_latitude = obj.delivery_longitude = None
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            if address_changed:
+                schedule_geocoding(obj)
+            if change and 'status' in form.changed_data:
+                # Ручная правка статуса тоже попадает в журнал, сводку продаж и push клиенту
+                record_events([obj], obj.status, request.user, from_status=form.initial.get('status', ''))
+                enqueue_status_notifications([obj], obj.status)
+                if obj.status == 'cancelled':
+                    release_slots([obj])
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            if obj.status != 'cancelled':
+                release_slots([obj])
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            release_slots(queryset.exclude(status='cancelled').only('id', 'store_id', 'delivery_slot_id'))
+            super().delete_queryset(request, queryset)
 
     @admin.action(description='✅ Принять (отправить ссылку на оплату)')
     def mark_accept(self, request, queryset):
-        for order in queryset.filter(status='pending'):
-            order.status = 'awaiting_payment'
-            order.payment_url = f'https://pay.example.com/order/{order.id}?amount={order.total}'
-            order.save()
+        self._transition(request, queryset, 'accept')
 
     @admin.action(description='🔨 Начать сборку')
     def mark_in_progress(self, request, queryset):
-        queryset.filter(status='paid').update(status='in_progress')
+        self._transition(request, queryset, 'start_assembly')
 
     @admin.action(description='📦 Готов к выдаче/доставке')
     def mark_ready(self, request, queryset):
-        queryset.filter(status='in_progress').update(status='ready')
+        self._transition(request, queryset, 'mark_ready')
 
     @admin.action(description='✔️ Доставлен')
     def mark_delivered(self, request, queryset):
-        queryset.update(status='completed')
+        self._transition(request, queryset, 'complete')
+
+    def _transition(self, request, queryset, action_name):
+        """Тот же массовый переход, что и POST /api/orders/bulk-transition/"""
+        outcomes = transition_orders(
+            list(queryset.values_list('pk', flat=True)), action_name, actor=request.user,
+        )
+        updated = sum(error is None for error in outcomes.values())
+        skipped = len(outcomes) - updated
+        self.message_user(request, f'Статус изменён: {updated}' + (f', пропущено (другой статус): {skipped}' if skipped else ''))
+
+
+class ArchivedOrderItemInline(admin.TabularInline):
+    model = ArchivedOrderItem
+    extra = 0
+    can_delete = False
+    readonly_fields = ['product', 'product_name', 'quantity', 'price']
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(ModelAdmin):
+    """Архив заказов — только просмотр, записи создаёт archive_orders"""
+    list_display = ['id', 'customer', 'store', 'status', 'total', 'created_at', 'archived_at']
+    list_filter = ['status', 'store']
+    search_fields = ['recipient_name', 'recipient_phone', 'customer__phone']
+    list_select_related = ['customer', 'store']
+    inlines = [ArchivedOrderItemInline]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
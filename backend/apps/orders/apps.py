@@ -5,3 +5,6 @@ class OrdersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.orders'
     verbose_name = 'Заказы и Настройки'
+
+    def ready(self):
+        from . import signals  # noqa: F401
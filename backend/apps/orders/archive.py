@@ -0,0 +1,72 @@
+"""
+Архивация старых заказов.
+
+Завершённые и отменённые заказы старше ORDER_ARCHIVE_AFTER_DAYS переносятся
+из Order/OrderItem в ArchivedOrder/ArchivedOrderItem пачками по
+ORDER_ARCHIVE_BATCH_SIZE: копия и удаление оригинала — в одной транзакции,
+поэтому заказ никогда не пропадает и не двоится. Рабочая таблица остаётся
+маленькой — списки флористов, админка и дашборд читают только активные
+заказы. Архив доступен только на чтение (ArchivedOrderViewSet, админка).
+"""
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+
+ARCHIVE_STATUSES = ('completed', 'cancelled')
+
+# Поля, которые копируются из Order как есть
+ORDER_FIELDS = [
+    field.attname for field in ArchivedOrder._meta.concrete_fields
+    if field.attname != 'archived_at'
+]
+
+
+def archive_orders(older_than_days=None, batch_size=None):
+    """Перенести все подходящие заказы, вернуть их число"""
+    if older_than_days is None:
+        older_than_days = settings.ORDER_ARCHIVE_AFTER_DAYS
+    batch_size = batch_size or settings.ORDER_ARCHIVE_BATCH_SIZE
+    cutoff = timezone.now() - datetime.timedelta(days=older_than_days)
+
+    archived = 0
+    while True:
+        moved = archive_batch(cutoff, batch_size)
+        archived += moved
+        if moved < batch_size:
+            return archived
+
+
+def archive_batch(cutoff, batch_size):
+    with transaction.atomic():
+        # skip_locked: заказ, который сейчас меняют, уйдёт в следующий запуск
+        orders = list(
+            Order.objects.select_for_update(skip_locked=True)
+            .filter(status__in=ARCHIVE_STATUSES, created_at__lt=cutoff)
+            .order_by('created_at')
+            .values(*ORDER_FIELDS)[:batch_size]
+        )
+        if not orders:
+            return 0
+        order_ids = [order['id'] for order in orders]
+        items = OrderItem.objects.filter(order_id__in=order_ids).values(
+            'order_id', 'product_id', 'product__name', 'quantity', 'price',
+        )
+
+        ArchivedOrder.objects.bulk_create(ArchivedOrder(**order) for order in orders)
+        ArchivedOrderItem.objects.bulk_create(
+            ArchivedOrderItem(
+                order_id=item['order_id'],
+                product_id=item['product_id'],
+                product_name=item['product__name'],
+                quantity=item['quantity'],
+                price=item['price'],
+            )
+            for item in items
+        )
+        OrderItem.objects.filter(order_id__in=order_ids).delete()
+        Order.objects.filter(pk__in=order_ids).delete()
+    return len(orders)
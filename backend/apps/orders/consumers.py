@@ -83,3 +83,11 @@ class FloristStoreConsumer(AsyncWebsocketConsumer):
             'order_id': event['order_id'],
             'status': event['status'],
         }))
+
+    async def orders_status_changed(self, event):
+        """Статус нескольких заказов точки изменился разом (массовое действие)"""
+        await self.send(text_data=json.dumps({
+            'type': 'orders_status_changed',
+            'order_ids': event['order_ids'],
+            'status': event['status'],
+        }))
@@ -0,0 +1,170 @@
+"""
+Планирование маршрутов курьеров.
+
+Заказы на доставку в статусах ready/delivering за день группируются по
+магазину и интервалу доставки (слот или час delivery_time). Внутри группы
+маршруты строятся эвристикой: ближайший сосед от магазина (не больше
+COURIER_MAX_STOPS точек на курьера), затем 2-opt улучшает порядок каждого
+маршрута. Расстояния — по прямой (гаверсинус), матрица считается один раз
+на группу. День из нескольких сотен заказов планируется за доли секунды.
+
+Планирование только читает координаты: их проставляет задача geocode_order
+при создании заказа и смене адреса (locate_order). Заказы, которые ещё
+не геокодированы или не нашлись, возвращаются в unlocated.
+"""
+import math
+from collections import defaultdict
+
+from django.conf import settings
+
+from .geocoding import geocode_address
+from .models import Order
+
+DISPATCH_STATUSES = ('ready', 'delivering')
+DELIVERY_TYPES = ('delivery_city', 'delivery_remote')
+EARTH_RADIUS_KM = 6371.0
+
+
+def plan_routes(date, store_ids=None):
+    orders = list(
+        Order.objects.filter(
+            delivery_date=date, status__in=DISPATCH_STATUSES, delivery_type__in=DELIVERY_TYPES,
+            store__isnull=False,
+        )
+        .filter(**({'store_id__in': store_ids} if store_ids else {}))
+        .select_related('store', 'delivery_slot')
+        .order_by('store_id', 'delivery_time', 'id')
+    )
+    unlocated = []
+    groups = defaultdict(list)
+    for order in orders:
+        if order.delivery_latitude is None:
+            unlocated.append(order)
+        else:
+            groups[(order.store_id, delivery_window(order))].append(order)
+
+    plans = []
+    for (store_id, (start, end)), group in groups.items():
+        store = group[0].store
+        depot = (float(store.latitude), float(store.longitude))
+        points = [(float(order.delivery_latitude), float(order.delivery_longitude)) for order in group]
+        routes = build_routes(depot, points, settings.COURIER_MAX_STOPS)
+        plans.append({
+            'store': store_id,
+            'store_name': store.name,
+            'window_start': start,
+            'window_end': end,
+            'routes': [
+                {
+                    'distance_km': round(distance, 2),
+                    'stops': [_stop(group[index], points[index]) for index in route],
+                }
+                for route, distance in routes
+            ],
+        })
+    return {
+        'date': date.isoformat(),
+        'groups': plans,
+        'unlocated': [_stop(order, None) for order in unlocated],
+    }
+
+
+def locate_order(order_id):
+    """Геокодировать адрес заказа без координат (задача geocode_order); True, если нашёлся"""
+    order = (
+        Order.objects.filter(pk=order_id, delivery_type__in=DELIVERY_TYPES, delivery_latitude__isnull=True)
+        .select_related('store')
+        .first()
+    )
+    if order is None:
+        return False
+    near = (float(order.store.latitude), float(order.store.longitude)) if order.store else None
+    point = geocode_address(order.delivery_address, near=near)
+    if point is None:
+        return False
+    latitude, longitude = (round(value, 6) for value in point)
+    # Адрес могли сменить, пока шёл запрос, — тогда координаты запишет следующая задача
+    return bool(
+        Order.objects.filter(pk=order.pk, delivery_address=order.delivery_address)
+        .update(delivery_latitude=latitude, delivery_longitude=longitude)
+    )
+
+
+def delivery_window(order):
+    slot = order.delivery_slot
+    if slot is not None:
+        return slot.start_time.strftime('%H:%M'), slot.end_time.strftime('%H:%M')
+    hour = order.delivery_time.hour
+    return f'{hour:02d}:00', f'{(hour + 1) % 24:02d}:00'
+
+
+def build_routes(depot, points, max_stops):
+    """
+    Разбить точки на маршруты от depot. Возвращает [(индексы точек, км)].
+    Матрица: индекс 0 — магазин, i + 1 — points[i].
+    """
+    nodes = [depot, *points]
+    matrix = [[haversine(a, b) for b in nodes] for a in nodes]
+
+    remaining = set(range(1, len(nodes)))
+    routes = []
+    while remaining:
+        route = [0]
+        while remaining and len(route) <= max_stops:
+            last = route[-1]
+            nearest = min(remaining, key=lambda node: matrix[last][node])
+            route.append(nearest)
+            remaining.remove(nearest)
+        route = two_opt(route, matrix)
+        routes.append(([node - 1 for node in route[1:]], route_length(route, matrix)))
+    return routes
+
+
+def two_opt(route, matrix):
+    """
+    Разворачивать участки маршрута, пока это сокращает путь. Маршрут
+    открытый: начинается в магазине (route[0] фиксирован), в конце курьер
+    не возвращается.
+    """
+    best = route[:]
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, len(best) - 1):
+            for j in range(i + 1, len(best)):
+                a, b = best[i - 1], best[i]
+                c = best[j]
+                d = best[j + 1] if j + 1 < len(best) else None
+                before = matrix[a][b] + (matrix[c][d] if d is not None else 0)
+                after = matrix[a][c] + (matrix[b][d] if d is not None else 0)
+                if after < before - 1e-9:
+                    best[i:j + 1] = reversed(best[i:j + 1])
+                    improved = True
+    return best
+
+
+def route_length(route, matrix):
+    return sum(matrix[a][b] for a, b in zip(route, route[1:]))
+
+
+def haversine(a, b):
+    lat1, lon1 = map(math.radians, a)
+    lat2, lon2 = map(math.radians, b)
+    h = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+
+
+def _stop(order, point):
+    return {
+        'order': order.pk,
+        'status': order.status,
+        'address': order.delivery_address,
+        'delivery_time': order.delivery_time.strftime('%H:%M'),
+        'recipient_name': order.recipient_name,
+        'recipient_phone': order.recipient_phone,
+        'lat': round(point[0], 6) if point else None,
+        'lon': round(point[1], 6) if point else None,
+    }
@@ -0,0 +1,82 @@
+"""
+Публикация событий заказов во WebSocket-группы точек store_<id>
+(см. FloristStoreConsumer).
+
+Сообщения уходят только после коммита транзакции (transaction.on_commit),
+чтобы флорист не увидел заказ, который потом откатится. Изменения
+нескольких заказов одной точки отправляются одним сообщением.
+"""
+import logging
+from collections import defaultdict
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def store_group(store_id):
+    return f'store_{store_id}'
+
+
+def order_payload(order):
+    """Компактное представление заказа для списка флориста"""
+    return {
+        'id': order.pk,
+        'status': order.status,
+        'delivery_type': order.delivery_type,
+        'delivery_date': str(order.delivery_date),
+        'delivery_time': str(order.delivery_time),
+        'recipient_name': order.recipient_name,
+        'total': str(order.total),
+        'created_at': order.created_at.isoformat() if order.created_at else None,
+    }
+
+
+def publish_new_order(order):
+    if not order.store_id:
+        return
+    message = {'type': 'new_order', 'order': order_payload(order)}
+    transaction.on_commit(lambda: _send({order.store_id: message}))
+
+
+def publish_status_changes(orders, status, florist=None):
+    """
+    Сообщить точкам о смене статуса. Один заказ на точку — order_status_changed
+    (или order_claimed, если заказ забрал флорист), несколько — одно
+    orders_status_changed со списком id.
+    """
+    order_ids = defaultdict(list)
+    for order in orders:
+        if order.store_id:
+            order_ids[order.store_id].append(order.pk)
+
+    messages = {}
+    for store_id, ids in order_ids.items():
+        if len(ids) > 1:
+            message = {'type': 'orders_status_changed', 'order_ids': ids, 'status': status}
+        elif florist is not None:
+            message = {'type': 'order_claimed', 'order_id': ids[0], 'florist_name': _florist_name(florist)}
+        else:
+            message = {'type': 'order_status_changed', 'order_id': ids[0], 'status': status}
+        messages[store_id] = message
+
+    if messages:
+        transaction.on_commit(lambda: _send(messages))
+
+
+def _florist_name(user):
+    return user.get_full_name() or user.get_username()
+
+
+def _send(messages_by_store):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    for store_id, message in messages_by_store.items():
+        try:
+            async_to_sync(channel_layer.group_send)(store_group(store_id), message)
+        except Exception:
+            # Заказ уже сохранён — недоставленное уведомление не должно ронять запрос
+            logger.exception('Failed to publish %s to store %s', message['type'], store_id)
@@ -0,0 +1,195 @@
+"""
+Потоковая выгрузка заказов с позициями в CSV и XLSX.
+
+В выгрузку попадают и действующие заказы, и архив (ArchivedOrder, заказы
+старше ORDER_ARCHIVE_AFTER_DAYS) — с одними и теми же фильтрами: выгрузка
+за год не теряет старые месяцы. Сначала архив, затем действующие, по id.
+
+Заказы читаются серверным курсором (iterator(chunk_size=...)); позиции
+подгружаются одним запросом на каждый чанк. Строки пишутся по одной:
+CSV — прямо в StreamingHttpResponse, XLSX — через write-only книгу
+openpyxl во временный файл и в хранилище. Память не зависит от размера
+выгрузки.
+
+Одна строка — одна позиция заказа (поля заказа повторяются); заказ без
+позиций даёт одну строку с пустыми полями товара.
+
+Имя получателя, адрес и другие поля вводит клиент. Чтобы Excel не выполнил
+их как формулу, строки, начинающиеся с =, +, -, @ (и табуляции или
+перевода строки), в CSV получают префикс «'», а в XLSX пишутся как текст.
+
+Админка: кнопки «Выгрузить CSV/XLSX» над списком заказов (с фильтрами и
+поиском списка). CSV отдаётся потоком сразу. XLSX — zip-архив, его нельзя
+отдать до конца записи, поэтому он всегда собирается задачей export_orders
+в хранилище, а админ получает ссылку на файл. Для отчётов — manage.py
+export_orders.
+"""
+import csv
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db.models import Prefetch, Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from .models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+ORDER_COLUMNS = [
+    ('Заказ №', lambda order: order.pk),
+    ('Создан', lambda order: timezone.localtime(order.created_at).strftime('%Y-%m-%d %H:%M')),
+    ('Статус', lambda order: order.get_status_display()),
+    ('Точка', lambda order: order.store.name if order.store else ''),
+    ('Клиент', lambda order: order.customer.phone),
+    ('Получатель', lambda order: order.recipient_name),
+    ('Телефон получателя', lambda order: order.recipient_phone),
+    ('Тип получения', lambda order: order.get_delivery_type_display()),
+    ('Адрес доставки', lambda order: order.delivery_address),
+    ('Дата доставки', lambda order: order.delivery_date.isoformat()),
+    ('Время доставки', lambda order: order.delivery_time.strftime('%H:%M')),
+    ('Оплачен', lambda order: 'да' if order.is_paid else 'нет'),
+    ('Скидка', lambda order: order.discount),
+    ('Доставка', lambda order: order.delivery_fee),
+    ('Итого', lambda order: order.total),
+]
+
+# Первые символы, с которых Excel начинает формулу
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+ITEM_COLUMNS = [
+    # В архиве название сохранено в product_name (товар могли удалить)
+    ('Товар', lambda item: item.product_name if isinstance(item, ArchivedOrderItem) else item.product.name),
+    ('Количество', lambda item: item.quantity),
+    ('Цена', lambda item: item.price),
+    ('Сумма позиции', lambda item: item.price * item.quantity),
+]
+
+
+def header():
+    return [name for name, _ in ORDER_COLUMNS + ITEM_COLUMNS]
+
+
+# Поля поиска — те же, что в списке заказов админки
+SEARCH_FIELDS = ['recipient_name', 'recipient_phone', 'customer__phone']
+
+
+def search_orders(queryset, search=''):
+    """Поиск как в админке: каждое слово ищется хотя бы в одном поле"""
+    for word in search.split():
+        query = Q()
+        for field in SEARCH_FIELDS:
+            query |= Q(**{f'{field}__icontains': word})
+        queryset = queryset.filter(query)
+    return queryset
+
+
+def export_querysets(filters=None, search=''):
+    """
+    Архив и действующие заказы с одними фильтрами. filters — kwargs для
+    filter() по полям, общим для Order и ArchivedOrder (JSON для Celery).
+    """
+    sources = (
+        (ArchivedOrder, ArchivedOrderItem.objects.all()),
+        (Order, OrderItem.objects.select_related('product')),
+    )
+    return [
+        search_orders(model.objects.filter(**(filters or {})), search)
+        .select_related('store', 'customer')
+        .prefetch_related(Prefetch('items', queryset=items.order_by('id')))
+        .order_by('id')
+        for model, items in sources
+    ]
+
+
+def iter_rows(filters=None, search=''):
+    """Строки выгрузки без заголовка; в памяти один чанк заказов"""
+    for queryset in export_querysets(filters, search):
+        for order in queryset.iterator(chunk_size=settings.ORDER_EXPORT_CHUNK_SIZE):
+            order_values = [getter(order) for _, getter in ORDER_COLUMNS]
+            items = order.items.all()
+            if not items:
+                yield order_values + [''] * len(ITEM_COLUMNS)
+            for item in items:
+                yield order_values + [getter(item) for _, getter in ITEM_COLUMNS]
+
+
+def escape_formula(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class _Echo:
+    """Псевдо-файл для csv.writer: writerow возвращает строку, а не пишет её"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(filters=None, search=''):
+    writer = csv.writer(_Echo(), delimiter=';')
+    # BOM — чтобы Excel открыл UTF-8 с кириллицей без мастера импорта
+    yield '\ufeff' + writer.writerow(header())
+    for row in iter_rows(filters, search):
+        yield writer.writerow([escape_formula(value) for value in row])
+
+
+def write_csv(file, filters=None, search=''):
+    for line in iter_csv(filters, search):
+        file.write(line.encode())
+
+
+def write_xlsx(file, filters=None, search=''):
+    """Write-only книга openpyxl: строки сбрасываются на диск по мере записи"""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Заказы')
+    sheet.append(header())
+    for row in iter_rows(filters, search):
+        sheet.append([_xlsx_cell(sheet, value, WriteOnlyCell) for value in row])
+    workbook.save(file)
+
+
+def _xlsx_cell(sheet, value, cell_class):
+    """openpyxl считает строку с «=» формулой — такие значения пишутся текстовой ячейкой"""
+    if not (isinstance(value, str) and value.startswith('=')):
+        return value
+    cell = cell_class(sheet, value)
+    cell.data_type = 's'
+    return cell
+
+
+def export_filename(export_format):
+    """Имя файла в хранилище; случайный суффикс — ссылку выдаём до записи файла"""
+    stamp = timezone.localtime().strftime('%Y%m%d-%H%M%S')
+    return f'{settings.ORDER_EXPORT_DIR}/orders-{stamp}-{get_random_string(8).lower()}.{export_format}'
+
+
+def csv_response(filters=None, search=''):
+    response = StreamingHttpResponse(
+        (line.encode() for line in iter_csv(filters, search)), content_type=FORMATS['csv'],
+    )
+    filename = export_filename('csv').rsplit('/', 1)[-1]
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def export_to_storage(export_format, filters=None, search='', name=None):
+    """
+    Фоновая выгрузка: файл в default_storage (ORDER_EXPORT_DIR), возвращает
+    имя файла. name задают заранее, чтобы сразу показать ссылку на него.
+    """
+    writer = write_csv if export_format == 'csv' else write_xlsx
+    with tempfile.TemporaryFile() as file:
+        writer(file, filters, search)
+        file.seek(0)
+        return default_storage.save(name or export_filename(export_format), File(file))
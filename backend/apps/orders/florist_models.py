@@ -27,6 +27,10 @@ class FloristTask(models.Model):
         ordering = ['due_date', '-priority', 'created_at']
         verbose_name = 'Задача флориста'
         verbose_name_plural = 'Задачи флористов'
+        indexes = [
+            # Задачи флориста на день: filter(florist=..., due_date=...)
+            models.Index(fields=['florist', 'due_date'], name='floristtask_florist_due_idx'),
+        ]
 
     def __str__(self):
         return f'{self.title} ({self.get_priority_display()})'
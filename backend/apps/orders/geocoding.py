@@ -0,0 +1,94 @@
+"""
+Геокодирование адресов доставки.
+
+Геокодер выбирается настройкой GEOCODER (путь к классу):
+
+- OfflineGeocoder — заглушка без сети для dev и тестов: детерминированная
+  точка в радиусе GEOCODER_OFFLINE_RADIUS_KM от точки магазина;
+- NominatimGeocoder — OpenStreetMap Nominatim (GEOCODER_URL).
+
+Результаты кэшируются в общем кэше по нормализованному адресу, координаты
+заказа сохраняются в Order.delivery_latitude/longitude — повторно один и
+тот же адрес не геокодируется. Вызывается только из фоновой задачи
+geocode_order (не чаще GEOCODER_RATE_LIMIT), не из запросов.
+"""
+import hashlib
+import json
+import logging
+import math
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Неудачный ответ кэшируем ненадолго: адрес могут исправить, сервис — ожить
+MISS_TIMEOUT = 60 * 60
+MISS = 'miss'
+
+
+class Geocoder:
+    def geocode(self, address, near=None):
+        """Адрес -> (lat, lon) или None. near — (lat, lon) магазина как подсказка"""
+        raise NotImplementedError
+
+
+class OfflineGeocoder(Geocoder):
+    def geocode(self, address, near=None):
+        if near is None:
+            return None
+        digest = hashlib.sha1(address.encode()).digest()
+        # Равномерно по площади круга: угол и sqrt от радиуса из хэша
+        angle = int.from_bytes(digest[:4], 'big') / 2 ** 32 * 2 * math.pi
+        distance = math.sqrt(int.from_bytes(digest[4:8], 'big') / 2 ** 32) * settings.GEOCODER_OFFLINE_RADIUS_KM
+        lat, lon = near
+        dlat = distance * math.cos(angle) / 111.32
+        dlon = distance * math.sin(angle) / (111.32 * math.cos(math.radians(lat)))
+        return lat + dlat, lon + dlon
+
+
+class NominatimGeocoder(Geocoder):
+    def geocode(self, address, near=None):
+        query = urlencode({'q': address, 'format': 'json', 'limit': 1})
+        request = Request(f'{settings.GEOCODER_URL}?{query}', headers={'User-Agent': 'flower-shop-dispatch'})
+        with urlopen(request, timeout=5) as response:
+            results = json.load(response)
+        if not results:
+            return None
+        return float(results[0]['lat']), float(results[0]['lon'])
+
+
+def get_geocoder():
+    return import_string(settings.GEOCODER)()
+
+
+def normalize_address(address):
+    return ' '.join(address.lower().replace(',', ' ').split())
+
+
+def geocode_address(address, near=None, geocoder=None):
+    """(lat, lon) из кэша или от геокодера; None, если адрес не найден"""
+    address = normalize_address(address)
+    if not address:
+        return None
+    key = 'geocode:' + hashlib.sha1(address.encode()).hexdigest()
+    cached = cache.get(key)
+    if cached == MISS:
+        return None
+    if cached is not None:
+        return tuple(cached)
+
+    try:
+        point = (geocoder or get_geocoder()).geocode(address, near=near)
+    except (OSError, ValueError, KeyError, IndexError, TypeError):
+        # Сеть, не-JSON ответ (JSONDecodeError — это ValueError) или неожиданный формат
+        logger.exception('Geocoding failed for %r', address)
+        return None
+    if point is None:
+        cache.set(key, MISS, MISS_TIMEOUT)
+        return None
+    cache.set(key, list(point), settings.GEOCODER_CACHE_TIMEOUT)
+    return point
@@ -0,0 +1,73 @@
+"""
+Замер планирования маршрутов курьеров на день.
+
+    python manage.py bench_dispatch --orders 400 --stores 4
+
+Координаты адресов проставляются заранее, как это делает задача
+geocode_order (OfflineGeocoder по умолчанию); замеряется только
+планирование. Тестовые данные откатываются в конце.
+"""
+import datetime
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from apps.orders.dispatch import locate_order, plan_routes
+from apps.orders.models import Order
+from apps.stores.models import Store
+from apps.users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = 'Время plan_routes для дня из нескольких сотен доставок'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=400)
+        parser.add_argument('--stores', type=int, default=4)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            date = self.seed(options['orders'], options['stores'])
+            for label in ('первый прогон', 'повторный прогон'):
+                started = time.perf_counter()
+                plan = plan_routes(date)
+                elapsed = (time.perf_counter() - started) * 1000
+                routes = [route for group in plan['groups'] for route in group['routes']]
+                stops = sum(len(route['stops']) for route in routes)
+                distance = sum(route['distance_km'] for route in routes)
+                self.stdout.write(
+                    f'{label:<22} {elapsed:>8.1f} ms: {len(plan["groups"])} групп, '
+                    f'{len(routes)} маршрутов, {stops} адресов, {distance:.0f} км'
+                )
+            transaction.set_rollback(True)
+
+    def seed(self, count, store_count):
+        rnd = random.Random(1)
+        date = timezone.localdate() + datetime.timedelta(days=1)
+        stores = Store.objects.bulk_create(
+            Store(
+                name=f'Dispatch {i}', address=f'Dispatch st. {i}', phone=f'+7996{i:07d}',
+                latitude=Decimal('55.75') + Decimal(i) / 50, longitude=Decimal('37.61'), working_hours={},
+            )
+            for i in range(store_count)
+        )
+        customer = CustomUser.objects.create_user(username='bench-dispatch', phone='+70000000010', password='bench')
+        orders = Order.objects.bulk_create(
+            Order(
+                customer=customer, store=rnd.choice(stores),
+                status=rnd.choice(['ready', 'delivering']),
+                delivery_type=rnd.choice(['delivery_city', 'delivery_remote']),
+                recipient_name='Dispatch', recipient_phone='+70000000011',
+                delivery_address=f'ул. Тестовая, д. {i}',
+                delivery_date=date, delivery_time=datetime.time(rnd.choice([10, 12, 14, 16, 18])),
+                subtotal=Decimal(3000), total=Decimal(3000),
+            )
+            for i in range(count)
+        )
+        for order in orders:
+            locate_order(order.pk)
+        return date
@@ -0,0 +1,120 @@
+"""
+Задержка горячих запросов к заказам до и после архивации.
+
+    python manage.py bench_order_archive --orders 100000 --repeat 20
+
+Создаёт заказы за год (большая часть — давно завершённые), замеряет
+список флориста, историю клиента и агрегаты дашборда, переносит старые
+заказы в архив и замеряет ещё раз. Всё откатывается в конце.
+"""
+import datetime
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from apps.dashboard import dashboard_callback
+from apps.orders.archive import archive_orders
+from apps.orders.models import Order, OrderItem
+from apps.products.models import Category, Product
+from apps.stores.models import Store
+from apps.users.models import CustomUser
+
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = 'Сравнение задержки запросов к заказам до и после archive_orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=100000, help='Сколько заказов создать')
+        parser.add_argument('--days', type=int, default=365, help='За сколько дней распределить заказы')
+        parser.add_argument('--archive-after', type=int, default=30, help='Возраст архивации, дней')
+        parser.add_argument('--repeat', type=int, default=20, help='Повторов каждого запроса')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            florist, customer = self.seed(options['orders'], options['days'])
+            self.florist_client = APIClient()
+            self.florist_client.force_authenticate(florist)
+            self.customer_client = APIClient()
+            self.customer_client.force_authenticate(customer)
+
+            before = self.measure(options['repeat'])
+            started = time.perf_counter()
+            with override_settings(ORDER_ARCHIVE_BATCH_SIZE=BATCH_SIZE):
+                archived = archive_orders(older_than_days=options['archive_after'])
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'Перенесено в архив: {archived} заказов за {elapsed:.1f} с, '
+                              f'осталось {Order.objects.count()}')
+            after = self.measure(options['repeat'])
+
+            self.stdout.write(f"{'запрос':<28} {'до, ms':>8} {'после, ms':>10}")
+            for name in before:
+                self.stdout.write(f'{name:<28} {before[name]:>8.1f} {after[name]:>10.1f}')
+            transaction.set_rollback(True)
+
+    def seed(self, count, days):
+        rnd = random.Random(1)
+        category = Category.objects.create(name='Bench', slug='bench-archive', icon='flower', image='categories/bench.png')
+        products = Product.objects.bulk_create(
+            Product(category=category, name=f'Bench {i}', slug=f'bench-archive-product-{i}', price=Decimal(500 + i))
+            for i in range(50)
+        )
+        store = Store.objects.create(
+            name='Bench', address='Bench st. 1', phone='+70000000006',
+            latitude=Decimal('55.75'), longitude=Decimal('37.61'), working_hours={},
+        )
+        florist = CustomUser.objects.create_user(
+            username='bench-archive-florist', phone='+70000000007', password='bench', role='florist',
+        )
+        customer = CustomUser.objects.create_user(
+            username='bench-archive-customer', phone='+70000000008', password='bench',
+        )
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        field = Order._meta.get_field('created_at')
+        field.auto_now_add = False
+        try:
+            for start in range(0, count, BATCH_SIZE):
+                orders = Order.objects.bulk_create([
+                    Order(
+                        customer=customer, store=store,
+                        status=rnd.choice(['completed'] * 9 + ['cancelled']) if age > 2 else 'pending',
+                        delivery_type='pickup', recipient_name='Bench', recipient_phone='+70000000009',
+                        delivery_date=now.date(), delivery_time='12:00',
+                        subtotal=Decimal(3000), total=Decimal(3000),
+                        created_at=now - datetime.timedelta(days=age, seconds=rnd.randint(0, 86399)),
+                    )
+                    for age in (rnd.randint(0, days) for _ in range(min(BATCH_SIZE, count - start)))
+                ])
+                OrderItem.objects.bulk_create(
+                    OrderItem(order=order, product=product, quantity=1, price=product.price)
+                    for order in orders
+                    for product in rnd.sample(products, 2)
+                )
+        finally:
+            field.auto_now_add = True
+        return florist, customer
+
+    def measure(self, repeat):
+        queries = {
+            'список флориста': lambda: self.florist_client.get('/api/orders/'),
+            'история клиента': lambda: self.customer_client.get('/api/orders/?pagination=cursor'),
+            'дашборд': lambda: dashboard_callback(None, {}),
+            'заказы «Завершён»': lambda: Order.objects.filter(status='completed').count(),
+        }
+        results = {}
+        for name, query in queries.items():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                query()
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = statistics.median(timings)
+        return results
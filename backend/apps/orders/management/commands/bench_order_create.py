@@ -0,0 +1,66 @@
+"""
+Замер создания заказа через API: число SQL-запросов и задержка.
+
+    python manage.py bench_order_create --repeat 20
+
+Тестовые данные создаются внутри транзакции и откатываются в конце.
+"""
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.products.models import Category, Product
+from apps.users.models import CustomUser
+
+ITEM_COUNTS = (1, 10, 50)
+
+
+class Command(BaseCommand):
+    help = 'POST /api/orders/ с 1, 10 и 50 позициями: запросы к БД и задержка'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help='Сколько заказов на каждый размер')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options['repeat'])
+            transaction.set_rollback(True)
+
+    def run(self, repeat):
+        category = Category.objects.create(name='Bench', slug='bench-orders', icon='flower', image='categories/bench.png')
+        products = Product.objects.bulk_create(
+            Product(category=category, name=f'Bench {i}', slug=f'bench-order-product-{i}', price=Decimal(500 + i))
+            for i in range(max(ITEM_COUNTS))
+        )
+        customer = CustomUser.objects.create_user(username='bench-orders', phone='+70000000000', password='bench')
+        client = APIClient()
+        client.force_authenticate(customer)
+
+        self.stdout.write(f"{'items':>6} {'queries':>8} {'median ms':>10} {'p95 ms':>8}")
+        for count in ITEM_COUNTS:
+            payload = {
+                'delivery_type': 'delivery_city',
+                'recipient_name': 'Bench',
+                'recipient_phone': '+70000000001',
+                'delivery_address': 'Bench st. 1',
+                'delivery_date': '2026-03-08',
+                'delivery_time': '12:00',
+                'items': [{'product': product.pk, 'quantity': 2} for product in products[:count]],
+            }
+            timings = []
+            for _ in range(repeat):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = client.post('/api/orders/', payload, format='json')
+                    timings.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 201, response.content
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(
+                f'{count:>6} {len(queries.captured_queries):>8} {statistics.median(timings):>10.1f} {p95:>8.1f}'
+            )
@@ -0,0 +1,214 @@
+"""
+Планы запросов горячих путей заказов и склада до и после индексов.
+
+    python manage.py explain_hot_queries --orders 200000
+    python manage.py explain_hot_queries --orders 200000 --analyze
+
+Команда заполняет базу данными в объёме продакшена, удаляет индексы
+HOT_PATH_INDEXES, печатает EXPLAIN каждого запроса («до»), создаёт индексы
+заново и печатает планы ещё раз («после»). Всё происходит в одной
+транзакции и откатывается в конце — схема и данные не меняются.
+"""
+import datetime
+import random
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDay
+from django.utils import timezone
+
+from apps.inventory.models import StockItem, StockMovement
+from apps.orders.florist_models import FloristTask
+from apps.orders.models import Order, OrderItem
+from apps.products.models import Category, Product
+from apps.stores.models import Store
+from apps.users.models import CustomUser
+
+# Индексы, добавленные под эти запросы (orders 0005, inventory 0004)
+HOT_PATH_INDEXES = {
+    Order: ['order_store_status_idx', 'order_store_pending_idx', 'order_created_status_idx'],
+    FloristTask: ['floristtask_florist_due_idx'],
+    StockItem: ['stockitem_low_stock_idx'],
+    StockMovement: ['stockmove_item_created_idx', 'stockmove_created_idx'],
+}
+
+# Распределение статусов: большая часть заказов давно завершена
+STATUS_WEIGHTS = {
+    'completed': 80, 'cancelled': 8, 'pending': 2, 'awaiting_payment': 2,
+    'paid': 2, 'in_progress': 2, 'ready': 2, 'delivering': 2,
+}
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN горячих запросов заказов и склада без индексов и с ними'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=200000, help='Сколько заказов создать')
+        parser.add_argument('--stores', type=int, default=20, help='Сколько точек создать')
+        parser.add_argument('--days', type=int, default=365, help='За сколько дней распределить заказы')
+        parser.add_argument('--analyze', action='store_true', help='EXPLAIN ANALYZE (только PostgreSQL)')
+        parser.add_argument('--seed', type=int, default=1, help='Seed генератора случайных чисел')
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.analyze = options['analyze'] and connection.vendor == 'postgresql'
+        with transaction.atomic():
+            self.seed(options['orders'], options['stores'], options['days'])
+            self.update_statistics()
+
+            self.set_indexes(create=False)
+            self.print_plans('До: без индексов горячих путей')
+            self.set_indexes(create=True)
+            self.update_statistics()
+            self.print_plans('После: с индексами')
+
+            transaction.set_rollback(True)
+
+    def seed(self, order_count, store_count, days):
+        self.stdout.write(f'Заполнение: {order_count} заказов, {store_count} точек, {days} дней')
+        category = Category.objects.create(name='Explain', slug='explain', icon='flower', image='categories/explain.png')
+        products = Product.objects.bulk_create(
+            Product(category=category, name=f'Explain {i}', slug=f'explain-product-{i}', price=Decimal(500 + i))
+            for i in range(200)
+        )
+        stores = Store.objects.bulk_create(
+            Store(
+                name=f'Explain {i}', address=f'Explain st. {i}', phone=f'+7999{i:07d}',
+                latitude=Decimal('55.75'), longitude=Decimal('37.61'), working_hours={},
+            )
+            for i in range(store_count)
+        )
+        customers = CustomUser.objects.bulk_create(
+            CustomUser(username=f'explain-{i}', phone=f'+7998{i:07d}', password='!')
+            for i in range(max(order_count // 5, 1))
+        )
+        florists = CustomUser.objects.bulk_create(
+            CustomUser(username=f'explain-florist-{i}', phone=f'+7997{i:07d}', password='!', role='florist')
+            for i in range(store_count * 3)
+        )
+
+        now = timezone.now()
+        statuses = list(STATUS_WEIGHTS)
+        weights = list(STATUS_WEIGHTS.values())
+        with _without_auto_now(Order, 'created_at'), _without_auto_now(StockMovement, 'created_at'):
+            for start in range(0, order_count, BATCH_SIZE):
+                size = min(BATCH_SIZE, order_count - start)
+                orders = Order.objects.bulk_create([
+                    Order(
+                        customer=self.random.choice(customers),
+                        store=self.random.choice(stores),
+                        status=self.random.choices(statuses, weights)[0],
+                        delivery_type='pickup',
+                        recipient_name='Explain', recipient_phone='+70000000005',
+                        delivery_date=now.date(), delivery_time='12:00',
+                        subtotal=Decimal(3000), total=Decimal(3000),
+                        created_at=now - datetime.timedelta(seconds=self.random.randint(0, days * 86400)),
+                    )
+                    for _ in range(size)
+                ])
+                OrderItem.objects.bulk_create(
+                    OrderItem(order=order, product=product, quantity=1, price=product.price)
+                    for order in orders
+                    for product in self.random.sample(products, 2)
+                )
+
+            stock_items = StockItem.objects.bulk_create(
+                StockItem(
+                    product=product, store=store,
+                    quantity=self.random.randint(0, 100), min_quantity=5,
+                )
+                for store in stores
+                for product in products
+            )
+            StockMovement.objects.bulk_create(
+                (
+                    StockMovement(
+                        stock_item=self.random.choice(stock_items),
+                        movement_type=self.random.choice(['in', 'out', 'write_off']),
+                        quantity=self.random.randint(1, 20),
+                        created_at=now - datetime.timedelta(seconds=self.random.randint(0, days * 86400)),
+                    )
+                    for _ in range(order_count)
+                ),
+                batch_size=BATCH_SIZE,
+            )
+        FloristTask.objects.bulk_create(
+            (
+                FloristTask(
+                    florist=florist, store=stores[i % store_count], title='Explain',
+                    due_date=now.date() - datetime.timedelta(days=day),
+                )
+                for i, florist in enumerate(florists)
+                for day in range(days)
+                for _ in range(3)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+
+        self.store = stores[0]
+        self.customer = customers[0]
+        self.florist = florists[0]
+        self.stock_item = stock_items[0]
+
+    def hot_queries(self):
+        today_start = timezone.make_aware(
+            datetime.datetime.combine(timezone.localdate(), datetime.time.min)
+        )
+        week_start = today_start - datetime.timedelta(days=7)
+        paid = ['paid', 'completed', 'delivering']
+        return [
+            ('Заказы клиента', Order.objects.filter(customer=self.customer).order_by('-created_at', 'id')[:20]),
+            ('Заказы точки по статусу',
+             Order.objects.filter(store=self.store, status='paid').order_by('-created_at')[:20]),
+            ('Новые заказы точки',
+             Order.objects.filter(store=self.store, status='pending').order_by('-created_at')[:20]),
+            ('Дашборд: выручка за сегодня',
+             Order.objects.filter(created_at__gte=today_start, status__in=paid).values_list('total')),
+            ('Дашборд: продажи за 7 дней',
+             Order.objects.filter(created_at__gte=week_start, status__in=paid)
+             .annotate(day=TruncDay('created_at')).values('day').annotate(total=Sum('total')).order_by('day')),
+            ('Мало на складе', StockItem.objects.filter(quantity__lte=F('min_quantity')).values('id')),
+            ('История позиции склада', StockMovement.objects.filter(stock_item=self.stock_item)[:50]),
+            ('Журнал движений', StockMovement.objects.all()[:50]),
+            ('Задачи флориста на день',
+             FloristTask.objects.filter(florist=self.florist, due_date=timezone.localdate())),
+        ]
+
+    def print_plans(self, title):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n=== {title} ==='))
+        for name, queryset in self.hot_queries():
+            self.stdout.write(self.style.SUCCESS(f'\n-- {name}'))
+            plan = queryset.explain(analyze=True) if self.analyze else queryset.explain()
+            self.stdout.write(plan)
+
+    def set_indexes(self, create):
+        # SQL берётся у схема-редактора, но выполняется обычным курсором:
+        # на SQLite schema_editor() нельзя открыть внутри atomic()
+        editor = connection.schema_editor(atomic=False)
+        with connection.cursor() as cursor:
+            for model, names in HOT_PATH_INDEXES.items():
+                for index in model._meta.indexes:
+                    if index.name in names:
+                        if create:
+                            cursor.execute(str(index.create_sql(model, editor)))
+                        else:
+                            cursor.execute(f'DROP INDEX {editor.quote_name(index.name)}')
+
+    def update_statistics(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+
+@contextmanager
+def _without_auto_now(model, field_name):
+    """Разрешить задать created_at вручную, чтобы разнести данные по датам"""
+    field = model._meta.get_field(field_name)
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
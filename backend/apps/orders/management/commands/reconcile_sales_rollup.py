@@ -0,0 +1,21 @@
+"""
+Пересчёт сводки продаж DailySalesRollup по заказам и архиву.
+
+    python manage.py reconcile_sales_rollup            # последние SALES_ROLLUP_RECONCILE_DAYS дней
+    python manage.py reconcile_sales_rollup --all      # вся история (после первого деплоя)
+"""
+from django.core.management.base import BaseCommand
+
+from apps.orders.sales import reconcile_sales
+
+
+class Command(BaseCommand):
+    help = 'Пересчитать сводку продаж по дням'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Сколько последних дней пересчитать')
+        parser.add_argument('--all', action='store_true', help='Пересчитать всю историю')
+
+    def handle(self, *args, **options):
+        rows = reconcile_sales(0 if options['all'] else options['days'])
+        self.stdout.write(self.style.SUCCESS(f'Строк в сводке: {rows}'))
@@ -0,0 +1,79 @@
+"""
+Время заказов в статусах по точкам (по журналу OrderEvent).
+
+Метрика — медиана длительности между двумя переходами одного заказа:
+приём — от создания (pending) до accept (awaiting_payment), сборка — от
+in_progress до ready. День метрики — день завершающего перехода.
+
+Журнал при чтении не сканируется: задача refresh_order_metrics каждые
+15 минут (CELERY_BEAT_SCHEDULE) пересчитывает сегодня и вчера в
+StoreDailyMetrics (по два запроса к журналу на метрику и день, по
+индексу orderevent_status_created_idx), API и админка читают только её.
+"""
+import datetime
+import statistics
+from collections import defaultdict
+
+from django.utils import timezone
+
+from .models import OrderEvent, StoreDailyMetrics
+
+# метрика: (статус начала, статус конца)
+METRICS = {
+    'accept': ('pending', 'awaiting_payment'),
+    'assembly': ('in_progress', 'ready'),
+}
+
+METRIC_FIELDS = {
+    'accept': ('accepted_count', 'accept_median_seconds'),
+    'assembly': ('assembled_count', 'assembly_median_seconds'),
+}
+
+
+def refresh_metrics(days=2):
+    """Пересчитать последние days дней (включая сегодня); возвращает число строк"""
+    today = timezone.localdate()
+    rows = []
+    for offset in range(days):
+        rows.extend(compute_day(today - datetime.timedelta(days=offset)))
+    StoreDailyMetrics.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['store', 'date'],
+        update_fields=[*(field for fields in METRIC_FIELDS.values() for field in fields), 'updated_at'],
+    )
+    return len(rows)
+
+
+def compute_day(date):
+    start = timezone.make_aware(datetime.datetime.combine(date, datetime.time.min))
+    end = start + datetime.timedelta(days=1)
+    durations = defaultdict(lambda: defaultdict(list))
+    for metric, (from_status, to_status) in METRICS.items():
+        finished = list(
+            OrderEvent.objects.filter(to_status=to_status, created_at__gte=start, created_at__lt=end)
+            .exclude(store=None)
+            .values_list('order_id', 'store_id', 'created_at')
+        )
+        if not finished:
+            continue
+        # Последний вход в статус начала (заказ мог вернуться в него вручную)
+        started = dict(
+            OrderEvent.objects.filter(to_status=from_status, order_id__in={row[0] for row in finished})
+            .order_by('created_at')
+            .values_list('order_id', 'created_at')
+        )
+        for order_id, store_id, finished_at in finished:
+            started_at = started.get(order_id)
+            if started_at is not None and started_at <= finished_at:
+                durations[store_id][metric].append((finished_at - started_at).total_seconds())
+
+    rows = []
+    for store_id, by_metric in durations.items():
+        row = StoreDailyMetrics(store_id=store_id, date=date)
+        for metric, (count_field, median_field) in METRIC_FIELDS.items():
+            values = by_metric.get(metric, [])
+            setattr(row, count_field, len(values))
+            setattr(row, median_field, round(statistics.median(values)) if values else None)
+        rows.append(row)
+    return rows
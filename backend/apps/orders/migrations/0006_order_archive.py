@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_hot_path_indexes'),
+        ('products', '0007_product_popularity'),
+        ('stores', '0002_alter_store_options_alter_store_is_active_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='Номер заказа')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает подтверждения'), ('awaiting_payment', 'Ожидает оплаты'), ('paid', 'Оплачен'), ('in_progress', 'Собирается'), ('ready', 'Готов'), ('delivering', 'Доставляется'), ('completed', 'Завершён'), ('cancelled', 'Отменён')], max_length=20, verbose_name='Статус')),
+                ('delivery_type', models.CharField(choices=[('pickup', 'Самовывоз'), ('delivery_city', 'Доставка (город)'), ('delivery_remote', 'Доставка (отдалённые)')], max_length=20, verbose_name='Тип получения')),
+                ('recipient_name', models.CharField(max_length=100, verbose_name='Имя получателя')),
+                ('recipient_phone', models.CharField(max_length=20, verbose_name='Телефон получателя')),
+                ('delivery_address', models.CharField(blank=True, max_length=255, verbose_name='Адрес доставки')),
+                ('delivery_date', models.DateField(verbose_name='Дата доставки')),
+                ('delivery_time', models.TimeField(verbose_name='Время доставки')),
+                ('card_text', models.TextField(blank=True, verbose_name='Текст открытки')),
+                ('subtotal', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Подытог')),
+                ('discount', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Скидка')),
+                ('delivery_fee', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Стоимость доставки')),
+                ('total', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Итого')),
+                ('is_paid', models.BooleanField(default=False, verbose_name='Оплачен')),
+                ('comment', models.TextField(blank=True, verbose_name='Комментарий к заказу')),
+                ('created_at', models.DateTimeField(verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(verbose_name='Дата обновления')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата архивации')),
+                ('assigned_florist', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Флорист')),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_orders', to=settings.AUTH_USER_MODEL, verbose_name='Клиент')),
+                ('store', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='stores.store', verbose_name='Магазин')),
+            ],
+            options={
+                'verbose_name': 'Архивный заказ',
+                'verbose_name_plural': 'Архив заказов',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_name', models.CharField(max_length=200, verbose_name='Название товара')),
+                ('quantity', models.PositiveIntegerField(default=1, verbose_name='Количество')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Цена за единицу')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='orders.archivedorder')),
+                ('product', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='products.product', verbose_name='Товар')),
+            ],
+            options={
+                'verbose_name': 'Позиция архивного заказа',
+                'verbose_name_plural': 'Позиции архивного заказа',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['customer', '-created_at', 'id'], name='archived_customer_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['-created_at', 'id'], name='archived_created_id_idx'),
+        ),
+    ]
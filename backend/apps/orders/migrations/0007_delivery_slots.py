@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_order_archive'),
+        ('stores', '0002_alter_store_options_alter_store_is_active_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeliverySlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Дата')),
+                ('start_time', models.TimeField(verbose_name='С')),
+                ('end_time', models.TimeField(verbose_name='До')),
+                ('capacity', models.PositiveIntegerField(verbose_name='Лимит')),
+                ('reserved', models.PositiveIntegerField(default=0, verbose_name='Занято')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='delivery_slots', to='stores.store', verbose_name='Магазин')),
+            ],
+            options={
+                'verbose_name': 'Слот доставки',
+                'verbose_name_plural': 'Слоты доставки',
+                'ordering': ['date', 'start_time'],
+            },
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='delivery_slot',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='orders', to='orders.deliveryslot', verbose_name='Слот доставки'),
+        ),
+        migrations.CreateModel(
+            name='DeliveryWindow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(blank=True, choices=[(0, 'Понедельник'), (1, 'Вторник'), (2, 'Среда'), (3, 'Четверг'), (4, 'Пятница'), (5, 'Суббота'), (6, 'Воскресенье')], help_text='Пусто = каждый день', null=True, verbose_name='День недели')),
+                ('start_time', models.TimeField(verbose_name='С')),
+                ('end_time', models.TimeField(verbose_name='До')),
+                ('capacity', models.PositiveIntegerField(default=10, verbose_name='Заказов в интервал')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Активен')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='delivery_windows', to='stores.store', verbose_name='Магазин')),
+            ],
+            options={
+                'verbose_name': 'Интервал доставки',
+                'verbose_name_plural': 'Интервалы доставки',
+                'ordering': ['store', 'weekday', 'start_time'],
+            },
+        ),
+        migrations.AddField(
+            model_name='deliveryslot',
+            name='window',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='slots', to='orders.deliverywindow', verbose_name='Интервал'),
+        ),
+        migrations.AddConstraint(
+            model_name='deliveryslot',
+            constraint=models.UniqueConstraint(fields=('store', 'date', 'start_time'), name='delivery_slot_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='deliveryslot',
+            constraint=models.CheckConstraint(condition=models.Q(('reserved__lte', models.F('capacity'))), name='delivery_slot_not_overbooked'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:46
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0009_push_notifications'),
+        ('stores', '0002_alter_store_options_alter_store_is_active_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, choices=[('pending', 'Ожидает подтверждения'), ('awaiting_payment', 'Ожидает оплаты'), ('paid', 'Оплачен'), ('in_progress', 'Собирается'), ('ready', 'Готов'), ('delivering', 'Доставляется'), ('completed', 'Завершён'), ('cancelled', 'Отменён')], max_length=20, verbose_name='Предыдущий статус')),
+                ('to_status', models.CharField(choices=[('pending', 'Ожидает подтверждения'), ('awaiting_payment', 'Ожидает оплаты'), ('paid', 'Оплачен'), ('in_progress', 'Собирается'), ('ready', 'Готов'), ('delivering', 'Доставляется'), ('completed', 'Завершён'), ('cancelled', 'Отменён')], max_length=20, verbose_name='Новый статус')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Время')),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Кто изменил')),
+                ('order', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='events', to='orders.order', verbose_name='Заказ')),
+                ('store', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='stores.store', verbose_name='Магазин')),
+            ],
+            options={
+                'verbose_name': 'Событие заказа',
+                'verbose_name_plural': 'События заказов',
+                'ordering': ['created_at', 'id'],
+                'indexes': [models.Index(fields=['order', 'created_at'], name='orderevent_order_idx'), models.Index(fields=['to_status', 'created_at'], name='orderevent_status_created_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StoreDailyMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Дата')),
+                ('accepted_count', models.PositiveIntegerField(default=0, verbose_name='Принято заказов')),
+                ('accept_median_seconds', models.PositiveIntegerField(blank=True, null=True, verbose_name='Медиана приёма, сек')),
+                ('assembled_count', models.PositiveIntegerField(default=0, verbose_name='Собрано заказов')),
+                ('assembly_median_seconds', models.PositiveIntegerField(blank=True, null=True, verbose_name='Медиана сборки, сек')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Пересчитано')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_metrics', to='stores.store', verbose_name='Магазин')),
+            ],
+            options={
+                'verbose_name': 'Метрики точки за день',
+                'verbose_name_plural': 'Метрики точек по дням',
+                'ordering': ['-date', 'store'],
+                'constraints': [models.UniqueConstraint(fields=('store', 'date'), name='unique_store_daily_metrics')],
+            },
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:48
+
+from collections import defaultdict
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def fill_rollup(apps, schema_editor):
+    """Сводка по уже существующим заказам и архиву (дальше — sales.py)"""
+    DailySalesRollup = apps.get_model('orders', 'DailySalesRollup')
+    totals = defaultdict(lambda: [0, Decimal(0)])
+    for model_name in ('Order', 'ArchivedOrder'):
+        rows = (
+            apps.get_model('orders', model_name).objects
+            .annotate(date=TruncDate('created_at', tzinfo=timezone.get_current_timezone()))
+            .values('date', 'store_id', 'status')
+            .annotate(order_count=Count('id'), revenue=Sum('total'))
+            .order_by()
+        )
+        for row in rows:
+            total = totals[(row['date'], row['store_id'], row['status'])]
+            total[0] += row['order_count']
+            total[1] += row['revenue']
+    DailySalesRollup.objects.bulk_create(
+        (
+            DailySalesRollup(date=date, store_id=store_id, status=status, order_count=count, revenue=revenue)
+            for (date, store_id, status), (count, revenue) in totals.items()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0010_order_events'),
+        ('stores', '0002_alter_store_options_alter_store_is_active_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Дата')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает подтверждения'), ('awaiting_payment', 'Ожидает оплаты'), ('paid', 'Оплачен'), ('in_progress', 'Собирается'), ('ready', 'Готов'), ('delivering', 'Доставляется'), ('completed', 'Завершён'), ('cancelled', 'Отменён')], max_length=20, verbose_name='Статус')),
+                ('order_count', models.IntegerField(default=0, verbose_name='Заказов')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Сумма')),
+                ('store', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='stores.store', verbose_name='Магазин')),
+            ],
+            options={
+                'verbose_name': 'Продажи за день',
+                'verbose_name_plural': 'Продажи по дням',
+                'ordering': ['-date', 'store', 'status'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('store__isnull', False)), fields=('date', 'store', 'status'), name='unique_sales_rollup'), models.UniqueConstraint(condition=models.Q(('store__isnull', True)), fields=('date', 'status'), name='unique_sales_rollup_no_store')],
+            },
+        ),
+        migrations.RunPython(fill_rollup, migrations.RunPython.noop),
+    ]
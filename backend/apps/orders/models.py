@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class DeliverySettings(models.Model):
@@ -23,6 +24,7 @@ class DeliverySettings(models.Model):
         self.pk = 1
         super().save(*args, **kwargs)
 
+    @classmethod
     def load(cls):
         obj, _ = cls.objects.get_or_create(pk=1)
         return obj
@@ -47,6 +49,58 @@ class GlobalSettings(models.Model):
         return obj
 
 
+class DeliveryWindow(models.Model):
+    """Интервал доставки точки с лимитом заказов (шаблон для DeliverySlot)"""
+    WEEKDAY_CHOICES = [
+        (0, 'Понедельник'), (1, 'Вторник'), (2, 'Среда'), (3, 'Четверг'),
+        (4, 'Пятница'), (5, 'Суббота'), (6, 'Воскресенье'),
+    ]
+
+    store = models.ForeignKey('stores.Store', on_delete=models.CASCADE, related_name='delivery_windows', verbose_name="Магазин")
+    weekday = models.PositiveSmallIntegerField(
+        "День недели", choices=WEEKDAY_CHOICES, null=True, blank=True, help_text='Пусто = каждый день',
+    )
+    start_time = models.TimeField("С")
+    end_time = models.TimeField("До")
+    capacity = models.PositiveIntegerField("Заказов в интервал", default=10)
+    is_active = models.BooleanField("Активен", default=True)
+
+    class Meta:
+        verbose_name = 'Интервал доставки'
+        verbose_name_plural = 'Интервалы доставки'
+        ordering = ['store', 'weekday', 'start_time']
+
+    def __str__(self):
+        return f"{self.store} {self.start_time:%H:%M}–{self.end_time:%H:%M} ({self.capacity})"
+
+
+class DeliverySlot(models.Model):
+    """
+    Интервал на конкретную дату со счётчиком броней. Создаётся заранее из
+    DeliveryWindow (slots.py); reserved меняется только условным UPDATE.
+    """
+    store = models.ForeignKey('stores.Store', on_delete=models.CASCADE, related_name='delivery_slots', verbose_name="Магазин")
+    window = models.ForeignKey(DeliveryWindow, on_delete=models.SET_NULL, null=True, blank=True,
+                               related_name='slots', verbose_name="Интервал")
+    date = models.DateField("Дата")
+    start_time = models.TimeField("С")
+    end_time = models.TimeField("До")
+    capacity = models.PositiveIntegerField("Лимит")
+    reserved = models.PositiveIntegerField("Занято", default=0)
+
+    class Meta:
+        verbose_name = 'Слот доставки'
+        verbose_name_plural = 'Слоты доставки'
+        ordering = ['date', 'start_time']
+        constraints = [
+            models.UniqueConstraint(fields=['store', 'date', 'start_time'], name='delivery_slot_unique'),
+            models.CheckConstraint(condition=models.Q(reserved__lte=models.F('capacity')), name='delivery_slot_not_overbooked'),
+        ]
+
+    def __str__(self):
+        return f"{self.store} {self.date} {self.start_time:%H:%M}–{self.end_time:%H:%M}"
+
+
 class Order(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Ожидает подтверждения'),
@@ -75,8 +129,13 @@ class Order(models.Model):
     recipient_name = models.CharField("Имя получателя", max_length=100)
     recipient_phone = models.CharField("Телефон получателя", max_length=20)
     delivery_address = models.CharField("Адрес доставки", max_length=255, blank=True)
+    # Заполняются геокодером при планировании маршрутов (dispatch.py)
+    delivery_latitude = models.DecimalField("Широта адреса", max_digits=9, decimal_places=6, null=True, blank=True)
+    delivery_longitude = models.DecimalField("Долгота адреса", max_digits=9, decimal_places=6, null=True, blank=True)
     delivery_date = models.DateField("Дата доставки")
     delivery_time = models.TimeField("Время доставки")
+    delivery_slot = models.ForeignKey(DeliverySlot, on_delete=models.SET_NULL, null=True, blank=True,
+                                      related_name='orders', verbose_name="Слот доставки")
 
     # Открытка
     card_text = models.TextField("Текст открытки", blank=True)
@@ -99,6 +158,21 @@ class Order(models.Model):
         verbose_name = 'Заказ'
         verbose_name_plural = 'Заказы'
         ordering = ['-created_at']
+        indexes = [
+            # Keyset-пагинация списка заказов: (-created_at, id)
+            models.Index(fields=['-created_at', 'id'], name='order_created_id_idx'),
+            models.Index(fields=['customer', '-created_at', 'id'], name='order_customer_created_idx'),
+            # Админка и панель флориста: заказы точки по статусу, свежие сверху
+            models.Index(fields=['store', 'status', '-created_at'], name='order_store_status_idx'),
+            # Очередь новых заказов точки — малая доля таблицы, частичный индекс
+            models.Index(
+                fields=['store', '-created_at'], condition=models.Q(status='pending'),
+                name='order_store_pending_idx',
+            ),
+            # Дашборд: выручка за период по диапазону created_at, status/total
+            # из индекса без чтения строк
+            models.Index(fields=['created_at', 'status', 'total'], name='order_created_status_idx'),
+        ]
 
     def __str__(self):
         return f"Заказ #{self.id}"
@@ -117,3 +191,182 @@ class OrderItem(models.Model):
     def __str__(self):
         return f"{self.product.name} x {self.quantity}"
 
+
+class OrderEvent(models.Model):
+    """
+    Журнал смены статусов заказа: только добавление, пишется пачкой в той
+    же транзакции, что и переход (transitions.py). Связь с заказом без
+    внешнего ключа в БД: история остаётся после переноса заказа в архив.
+    """
+    order = models.ForeignKey(Order, on_delete=models.DO_NOTHING, db_constraint=False, related_name='events', verbose_name="Заказ")
+    store = models.ForeignKey('stores.Store', on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name="Магазин")
+    from_status = models.CharField("Предыдущий статус", max_length=20, choices=Order.STATUS_CHOICES, blank=True)
+    to_status = models.CharField("Новый статус", max_length=20, choices=Order.STATUS_CHOICES)
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name="Кто изменил")
+    created_at = models.DateTimeField("Время", default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Событие заказа'
+        verbose_name_plural = 'События заказов'
+        ordering = ['created_at', 'id']
+        indexes = [
+            models.Index(fields=['order', 'created_at'], name='orderevent_order_idx'),
+            # Пересчёт метрик: переходы в статус за день
+            models.Index(fields=['to_status', 'created_at'], name='orderevent_status_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.order_id}: {self.from_status or '—'} → {self.to_status}"
+
+
+class StoreDailyMetrics(models.Model):
+    """
+    Время в статусах по точке за день (метрики metrics.py): медианы в
+    секундах, считаются периодической задачей из OrderEvent.
+    """
+    store = models.ForeignKey('stores.Store', on_delete=models.CASCADE, related_name='daily_metrics', verbose_name="Магазин")
+    date = models.DateField("Дата")
+    accepted_count = models.PositiveIntegerField("Принято заказов", default=0)
+    accept_median_seconds = models.PositiveIntegerField("Медиана приёма, сек", null=True, blank=True)
+    assembled_count = models.PositiveIntegerField("Собрано заказов", default=0)
+    assembly_median_seconds = models.PositiveIntegerField("Медиана сборки, сек", null=True, blank=True)
+    updated_at = models.DateTimeField("Пересчитано", auto_now=True)
+
+    class Meta:
+        verbose_name = 'Метрики точки за день'
+        verbose_name_plural = 'Метрики точек по дням'
+        ordering = ['-date', 'store']
+        constraints = [
+            models.UniqueConstraint(fields=['store', 'date'], name='unique_store_daily_metrics'),
+        ]
+
+    def __str__(self):
+        return f"{self.store} — {self.date}"
+
+
+class DailySalesRollup(models.Model):
+    """
+    Заказы и выручка по точке, дню создания заказа и статусу (sales.py).
+    Меняется вместе с каждой сменой статуса, ночью сверяется с заказами
+    и архивом. Дашборд читает только эту таблицу.
+    """
+    date = models.DateField("Дата")
+    store = models.ForeignKey('stores.Store', on_delete=models.CASCADE, null=True, blank=True, related_name='+', verbose_name="Магазин")
+    status = models.CharField("Статус", max_length=20, choices=Order.STATUS_CHOICES)
+    order_count = models.IntegerField("Заказов", default=0)
+    revenue = models.DecimalField("Сумма", max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = 'Продажи за день'
+        verbose_name_plural = 'Продажи по дням'
+        ordering = ['-date', 'store', 'status']
+        constraints = [
+            # NULL в store не равен NULL — заказы без точки отдельным условием
+            models.UniqueConstraint(
+                fields=['date', 'store', 'status'], condition=models.Q(store__isnull=False),
+                name='unique_sales_rollup',
+            ),
+            models.UniqueConstraint(
+                fields=['date', 'status'], condition=models.Q(store__isnull=True),
+                name='unique_sales_rollup_no_store',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.store or '—'} {self.status}: {self.order_count}"
+
+
+class PushNotification(models.Model):
+    """
+    Исходящий push (outbox). Записывается в одной транзакции со сменой
+    статуса заказа, отправляется воркером пачками (notifications.py).
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Ожидает отправки'),
+        ('sent', 'Отправлено'),
+        ('failed', 'Ошибка'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='push_notifications', verbose_name="Получатель")
+    order = models.ForeignKey(Order, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name="Заказ")
+    title = models.CharField("Заголовок", max_length=100)
+    body = models.CharField("Текст", max_length=255)
+    data = models.JSONField("Данные", default=dict, blank=True)
+    status = models.CharField("Статус", max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField("Попыток", default=0)
+    next_attempt_at = models.DateTimeField("Следующая попытка", default=timezone.now)
+    last_error = models.CharField("Последняя ошибка", max_length=255, blank=True)
+    created_at = models.DateTimeField("Создано", auto_now_add=True)
+    sent_at = models.DateTimeField("Отправлено", null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Push-уведомление'
+        verbose_name_plural = 'Push-уведомления'
+        ordering = ['-created_at']
+        indexes = [
+            # Очередь отправки: только ожидающие, по времени попытки
+            models.Index(fields=['next_attempt_at'], condition=models.Q(status='pending'), name='push_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} — {self.body}"
+
+
+class ArchivedOrder(models.Model):
+    """
+    Завершённый или отменённый заказ, перенесённый из Order (см. archive.py).
+    Номер заказа сохраняется; таблица только для чтения.
+    """
+    id = models.BigIntegerField("Номер заказа", primary_key=True)
+    customer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='archived_orders', verbose_name="Клиент")
+    store = models.ForeignKey('stores.Store', on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name="Магазин")
+    assigned_florist = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL,
+                                         null=True, blank=True, related_name='+', verbose_name="Флорист")
+    status = models.CharField("Статус", max_length=20, choices=Order.STATUS_CHOICES)
+    delivery_type = models.CharField("Тип получения", max_length=20, choices=Order.DELIVERY_CHOICES)
+
+    recipient_name = models.CharField("Имя получателя", max_length=100)
+    recipient_phone = models.CharField("Телефон получателя", max_length=20)
+    delivery_address = models.CharField("Адрес доставки", max_length=255, blank=True)
+    delivery_date = models.DateField("Дата доставки")
+    delivery_time = models.TimeField("Время доставки")
+    card_text = models.TextField("Текст открытки", blank=True)
+
+    subtotal = models.DecimalField("Подытог", max_digits=10, decimal_places=2)
+    discount = models.DecimalField("Скидка", max_digits=10, decimal_places=2, default=0)
+    delivery_fee = models.DecimalField("Стоимость доставки", max_digits=10, decimal_places=2, default=0)
+    total = models.DecimalField("Итого", max_digits=10, decimal_places=2)
+    is_paid = models.BooleanField("Оплачен", default=False)
+
+    comment = models.TextField("Комментарий к заказу", blank=True)
+    created_at = models.DateTimeField("Дата создания")
+    updated_at = models.DateTimeField("Дата обновления")
+    archived_at = models.DateTimeField("Дата архивации", auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Архивный заказ'
+        verbose_name_plural = 'Архив заказов'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['customer', '-created_at', 'id'], name='archived_customer_created_idx'),
+            models.Index(fields=['-created_at', 'id'], name='archived_created_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"Заказ #{self.id} (архив)"
+
+
+class ArchivedOrderItem(models.Model):
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name='items')
+    # Товар могут удалить, название остаётся в архиве
+    product = models.ForeignKey('products.Product', on_delete=models.SET_NULL, null=True, related_name='+', verbose_name="Товар")
+    product_name = models.CharField("Название товара", max_length=200)
+    quantity = models.PositiveIntegerField("Количество", default=1)
+    price = models.DecimalField("Цена за единицу", max_digits=10, decimal_places=2)
+
+    class Meta:
+        verbose_name = 'Позиция архивного заказа'
+        verbose_name_plural = 'Позиции архивного заказа'
+
+    def __str__(self):
+        return f"{self.product_name} x {self.quantity}"
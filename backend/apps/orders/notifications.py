@@ -1,50 +1,255 @@
 """
-Push Notification Service (FCM stub)
+Push-уведомления клиентам о статусе заказа (outbox).
 
-In production, configure:
-  FIREBASE_CREDENTIALS = os.environ.get('FIREBASE_CREDENTIALS_JSON')
-  and use firebase-admin SDK.
+Смена статуса пишет строки PushNotification в той же транзакции, что и
+UPDATE заказа (transitions.py, admin): откат перехода откатывает и
+уведомление, а закоммиченный переход его уже не потеряет. В запросе нет
+сетевых вызовов — после коммита ставится задача deliver_notifications.
 
-For now, this is a stub that logs notifications.
+Воркер забирает ожидающие строки пачками (skip_locked) и отправляет их
+одним пакетным запросом FCM до BATCH_LIMIT сообщений. У каждого
+уведомления свой order_id в data, поэтому вместо multicast (одно
+сообщение на много токенов) используется send_each — много сообщений за
+один HTTP-запрос. Временные ошибки повторяются с экспоненциальной
+задержкой NOTIFICATION_RETRY_BASE * 2^(попытка - 1); после
+NOTIFICATION_MAX_ATTEMPTS попыток или при недействительном токене строка
+помечается failed.
+
+Отправленные и failed строки старше NOTIFICATION_RETENTION_DAYS удаляет
+ночная задача purge_notifications — outbox не растёт бесконечно.
+
+Отправитель выбирается настройкой PUSH_SENDER: FCMSender (firebase-admin)
+или FakeSender — локальная замена FCM для dev и тестов.
 """
+import datetime
 import logging
+from collections import deque
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from apps.users.models import CustomUser
+
+from .models import PushNotification
 
 logger = logging.getLogger(__name__)
 
+TITLE = 'Цветочная Лавка'
+# Предел FCM на один пакетный запрос
+BATCH_LIMIT = 500
+# Сколько последних сообщений помнит FakeSender
+FAKE_SENT_LIMIT = 1000
+
+STATUS_MESSAGES = {
+    'awaiting_payment': 'Заказ принят! Оплатите его по ссылке в приложении',
+    'paid': 'Оплата получена, спасибо!',
+    'in_progress': 'Флорист собирает ваш букет 💐',
+    'ready': 'Ваш заказ готов!',
+    'delivering': 'Курьер в пути 🚗',
+    'completed': 'Заказ выполнен! Приятного дня ✨',
+    'cancelled': 'Заказ отменён',
+}
+
+
+class SendResult:
+    """Результат отправки на один токен"""
+    OK = 'ok'
+    RETRY = 'retry'
+    INVALID_TOKEN = 'invalid_token'
+
+    def __init__(self, outcome, error=''):
+        self.outcome = outcome
+        self.error = error
+
+
+@dataclass
+class PushMessage:
+    token: str
+    title: str
+    body: str
+    data: dict
 
-def send_push_notification(token: str, title: str, body: str, data: dict = None):
+
+class PushSender:
+    def send_batch(self, messages):
+        """До BATCH_LIMIT сообщений одним запросом -> [SendResult] в том же порядке"""
+        raise NotImplementedError
+
+
+class FCMSender(PushSender):
+    """Firebase Cloud Messaging; нужен пакет firebase-admin и FIREBASE_CREDENTIALS"""
+
+    def __init__(self):
+        import firebase_admin
+        from firebase_admin import credentials, messaging
+
+        if not firebase_admin._apps:
+            firebase_admin.initialize_app(credentials.Certificate(settings.FIREBASE_CREDENTIALS))
+        self.messaging = messaging
+
+    def send_batch(self, messages):
+        response = self.messaging.send_each([
+            self.messaging.Message(
+                token=message.token,
+                notification=self.messaging.Notification(title=message.title, body=message.body),
+                data=message.data,
+            )
+            for message in messages
+        ])
+        return [self._result(item) for item in response.responses]
+
+    def _result(self, item):
+        if item.success:
+            return SendResult(SendResult.OK)
+        error = item.exception
+        if isinstance(error, (self.messaging.UnregisteredError, self.messaging.SenderIdMismatchError)):
+            return SendResult(SendResult.INVALID_TOKEN, str(error))
+        return SendResult(SendResult.RETRY, str(error))
+
+
+class FakeSender(PushSender):
     """
-    Send a push notification via FCM.
-    In production: use firebase_admin.messaging.send()
+    Локальная замена FCM: сообщения пишутся в лог и в FakeSender.sent —
+    только последние FAKE_SENT_LIMIT, чтобы долгоживущий воркер не копил
+    их без конца. Токены с префиксом invalid: считаются недействительными,
+    с префиксом retry: — временно недоступными.
     """
-    logger.info(f"[FCM STUB] Sending push to {token}: {title} — {body}")
-    # TODO: Replace with actual FCM implementation
-    # import firebase_admin
-    # from firebase_admin import messaging
-    # message = messaging.Message(
-    #     notification=messaging.Notification(title=title, body=body),
-    #     data=data or {},
-    #     token=token,
-    # )
-    # messaging.send(message)
-    return True
-
-
-def notify_order_status(order):
-    """Notify customer about order status change"""
-    status_messages = {
-        'confirmed': 'Ваш заказ подтверждён!',
-        'in_progress': 'Флорист собирает ваш букет 💐',
-        'ready': 'Ваш заказ готов!',
-        'delivering': 'Курьер в пути 🚗',
-        'delivered': 'Заказ доставлен! Приятного дня ✨',
-    }
-    message = status_messages.get(order.status, f'Статус заказа: {order.status}')
-
-    if order.customer.push_token:
-        send_push_notification(
-            token=order.customer.push_token,
-            title='Цветочная Лавка',
-            body=message,
-            data={'order_id': str(order.id), 'status': order.status},
+    sent = deque(maxlen=FAKE_SENT_LIMIT)
+
+    def send_batch(self, messages):
+        results = []
+        for message in messages:
+            if message.token.startswith('invalid:'):
+                results.append(SendResult(SendResult.INVALID_TOKEN, 'Token is not registered'))
+            elif message.token.startswith('retry:'):
+                results.append(SendResult(SendResult.RETRY, 'Service unavailable'))
+            else:
+                self.sent.append(message)
+                results.append(SendResult(SendResult.OK))
+        logger.info('[FCM FAKE] batch of %d messages', len(messages))
+        return results
+
+
+def get_sender():
+    return import_string(settings.PUSH_SENDER)()
+
+
+def enqueue_status_notifications(orders, status):
+    """
+    Записать уведомления о новом статусе заказов (нужен customer_id).
+    Вызывать внутри транзакции смены статуса.
+    """
+    body = STATUS_MESSAGES.get(status)
+    if body is None or not orders:
+        return
+    # Клиенты без токена уведомление всё равно не получат
+    with_token = set(
+        CustomUser.objects.filter(pk__in={order.customer_id for order in orders})
+        .exclude(push_token='')
+        .values_list('pk', flat=True)
+    )
+    notifications = [
+        PushNotification(
+            user_id=order.customer_id, order_id=order.pk, title=TITLE, body=body,
+            data={'order_id': str(order.pk), 'status': status},
+        )
+        for order in orders
+        if order.customer_id in with_token
+    ]
+    if notifications:
+        PushNotification.objects.bulk_create(notifications)
+        from .tasks import schedule_delivery
+
+        schedule_delivery()
+
+
+def deliver_pending(batch_size=None):
+    """Отправить все ожидающие уведомления, у которых подошло время попытки"""
+    batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+    delivered = 0
+    while True:
+        count = deliver_batch(batch_size)
+        delivered += count
+        if count < batch_size:
+            return delivered
+
+
+def deliver_batch(batch_size, sender=None):
+    now = timezone.now()
+    # Строки «арендуются»: next_attempt_at сдвигается на время отправки,
+    # чтобы не держать транзакцию открытой во время сетевых вызовов.
+    # Если воркер упадёт, строки вернутся в очередь по истечении аренды.
+    with transaction.atomic():
+        notifications = list(
+            PushNotification.objects.select_for_update(skip_locked=True, of=('self',))
+            .filter(status='pending', next_attempt_at__lte=now)
+            .select_related('user')
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if not notifications:
+            return 0
+        PushNotification.objects.filter(pk__in=[n.pk for n in notifications]).update(
+            next_attempt_at=now + datetime.timedelta(seconds=settings.NOTIFICATION_LEASE_SECONDS),
         )
+
+    sender = sender or get_sender()
+    results = {}
+    for start in range(0, len(notifications), BATCH_LIMIT):
+        results.update(_send_chunk(sender, notifications[start:start + BATCH_LIMIT]))
+    _save_results(notifications, results)
+    return len(notifications)
+
+
+def _send_chunk(sender, notifications):
+    # Клиент мог выйти из приложения после смены статуса — токена уже нет
+    results = {n.pk: SendResult(SendResult.INVALID_TOKEN, 'No push token') for n in notifications}
+    with_token = [n for n in notifications if n.user.push_token]
+    if not with_token:
+        return results
+    messages = [PushMessage(n.user.push_token, n.title, n.body, n.data) for n in with_token]
+    try:
+        sent = sender.send_batch(messages)
+    except Exception as exc:
+        logger.exception('Push batch failed')
+        sent = [SendResult(SendResult.RETRY, str(exc))] * len(with_token)
+    results.update(zip((n.pk for n in with_token), sent))
+    return results
+
+
+def _save_results(notifications, results):
+    now = timezone.now()
+    sent_ids = []
+    for notification in notifications:
+        result = results[notification.pk]
+        if result.outcome == SendResult.OK:
+            sent_ids.append(notification.pk)
+            continue
+        notification.attempts += 1
+        notification.last_error = result.error[:255]
+        if result.outcome == SendResult.INVALID_TOKEN or notification.attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+            notification.status = 'failed'
+        else:
+            delay = settings.NOTIFICATION_RETRY_BASE * 2 ** (notification.attempts - 1)
+            notification.next_attempt_at = now + datetime.timedelta(seconds=delay)
+    PushNotification.objects.filter(pk__in=sent_ids).update(status='sent', sent_at=now)
+    sent = set(sent_ids)
+    unsent = [n for n in notifications if n.pk not in sent]
+    PushNotification.objects.bulk_update(unsent, ['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+
+def purge_notifications(days=None, batch_size=None):
+    """Удалить отправленные и failed уведомления старше NOTIFICATION_RETENTION_DAYS; возвращает число строк"""
+    days = settings.NOTIFICATION_RETENTION_DAYS if days is None else days
+    batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+    cutoff = timezone.now() - datetime.timedelta(days=days)
+    stale = PushNotification.objects.filter(status__in=('sent', 'failed'), created_at__lt=cutoff)
+    deleted = 0
+    # Пачками по id — короткие транзакции без долгой блокировки таблицы
+    while True:
+        ids = list(stale.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += PushNotification.objects.filter(pk__in=ids).delete()[0]
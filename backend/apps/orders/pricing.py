@@ -0,0 +1,21 @@
+"""Расчёт сумм заказа"""
+from decimal import Decimal
+
+from .settings_cache import get_delivery_settings
+
+
+def unit_price(product):
+    """Цена за единицу на момент заказа (со скидкой, если есть)"""
+    return product.discount_price or product.price
+
+
+def delivery_fee(delivery_type, subtotal, delivery_settings=None):
+    if delivery_type == 'pickup':
+        return Decimal('0')
+    delivery_settings = delivery_settings or get_delivery_settings()
+    threshold = delivery_settings.free_delivery_threshold
+    if threshold and subtotal >= threshold:
+        return Decimal('0')
+    if delivery_type == 'delivery_remote':
+        return delivery_settings.remote_price
+    return delivery_settings.city_price
@@ -0,0 +1,113 @@
+"""
+Сводка продаж по дням: DailySalesRollup (день создания × точка × статус).
+
+Каждая смена статуса (transitions.record_events) переносит заказ из строки
+старого статуса в строку нового: UPDATE ... SET order_count = order_count ± 1
+в той же транзакции. Строки меняются в одном порядке (точка, день,
+статус), чтобы параллельные переходы не ловили взаимную блокировку.
+
+Правки в обход переходов (импорт, удаление заказа, смена суммы в админке)
+сводку не трогают — их исправляет ночная сверка reconcile_sales: строки
+за последние SALES_ROLLUP_RECONCILE_DAYS дней пересчитываются по Order и
+ArchivedOrder и записываются в существующие строки (UPDATE), недостающие
+создаются, а строки без заказов обнуляются. Архивирование сводку не меняет.
+"""
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import ArchivedOrder, DailySalesRollup, Order
+
+
+def track_status_changes(changes):
+    """changes: [(order, старый статус, новый статус)]; старый '' — новый заказ"""
+    deltas = defaultdict(lambda: [0, Decimal(0)])
+    for order, from_status, to_status in changes:
+        date = timezone.localdate(order.created_at)
+        if from_status:
+            delta = deltas[(order.store_id, date, from_status)]
+            delta[0] -= 1
+            delta[1] -= order.total
+        delta = deltas[(order.store_id, date, to_status)]
+        delta[0] += 1
+        delta[1] += order.total
+
+    for (store_id, date, status), (count, revenue) in sorted(
+        deltas.items(), key=lambda item: (item[0][0] or 0, item[0][1], item[0][2]),
+    ):
+        if count or revenue:
+            _apply_delta(store_id, date, status, count, revenue)
+
+
+def _apply_delta(store_id, date, status, count, revenue):
+    rows = DailySalesRollup.objects.filter(store_id=store_id, date=date, status=status)
+    if rows.update(order_count=F('order_count') + count, revenue=F('revenue') + revenue):
+        return
+    if count < 0:
+        # Строки ещё нет (заказ старше сводки) — её создаст ночная сверка
+        return
+    try:
+        with transaction.atomic():
+            DailySalesRollup.objects.create(
+                store_id=store_id, date=date, status=status, order_count=count, revenue=revenue,
+            )
+    except IntegrityError:
+        # Параллельный переход успел создать строку
+        rows.update(order_count=F('order_count') + count, revenue=F('revenue') + revenue)
+
+
+def reconcile_sales(days=None):
+    """
+    Пересчитать сводку за последние days дней (по умолчанию
+    SALES_ROLLUP_RECONCILE_DAYS, 0 — вся история). Возвращает число строк.
+    """
+    if days is None:
+        days = settings.SALES_ROLLUP_RECONCILE_DAYS
+    date_from = timezone.localdate() - datetime.timedelta(days=days - 1) if days else None
+
+    with transaction.atomic():
+        existing = DailySalesRollup.objects.all()
+        if date_from:
+            existing = existing.filter(date__gte=date_from)
+        # Строки правятся на месте, а не удаляются: переход, ждущий
+        # блокировки строки, после коммита сверки применит свою дельту
+        # поверх пересчитанного значения
+        rows = {(row.date, row.store_id, row.status): row for row in existing.select_for_update()}
+
+        totals = defaultdict(lambda: [0, Decimal(0)])
+        for model in (Order, ArchivedOrder):
+            queryset = model.objects.all()
+            if date_from:
+                queryset = queryset.filter(created_at__gte=_day_start(date_from))
+            aggregated = (
+                queryset.annotate(date=TruncDate('created_at', tzinfo=timezone.get_current_timezone()))
+                .values('date', 'store_id', 'status')
+                .annotate(order_count=Count('id'), revenue=Sum('total'))
+                .order_by()
+            )
+            for row in aggregated:
+                total = totals[(row['date'], row['store_id'], row['status'])]
+                total[0] += row['order_count']
+                total[1] += row['revenue']
+
+        changed = []
+        for key, row in rows.items():
+            count, revenue = totals.get(key, (0, Decimal(0)))
+            if row.order_count != count or row.revenue != revenue:
+                row.order_count, row.revenue = count, revenue
+                changed.append(row)
+        DailySalesRollup.objects.bulk_update(changed, ['order_count', 'revenue'])
+        for (date, store_id, status), (count, revenue) in totals.items():
+            if (date, store_id, status) not in rows:
+                _apply_delta(store_id, date, status, count, revenue)
+    return len(totals)
+
+
+def _day_start(date):
+    return timezone.make_aware(datetime.datetime.combine(date, datetime.time.min))
@@ -1,5 +1,13 @@
+from django.db import transaction
 from rest_framework import serializers
-from .models import Order, OrderItem
+from apps.products.models import Product
+from .models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+from .pricing import delivery_fee, unit_price
+from .slots import SlotUnavailable, reserve_slot, store_uses_slots
+from .tasks import schedule_geocoding
+from .transitions import STATUS_ACTIONS, record_events
+
+BULK_TRANSITION_MAX_IDS = 200
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -11,47 +19,158 @@ class OrderItemSerializer(serializers.ModelSerializer):
         read_only_fields = ['price']
 
 
+class OrderListSerializer(serializers.ModelSerializer):
+    """
+    Строка списка заказов: без позиций, только их число (аннотация
+    items_count из OrderViewSet.get_queryset).
+    """
+    store_name = serializers.CharField(source='store.name', read_only=True, default=None)
+    items_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Order
+        fields = [
+            'id', 'status', 'delivery_type', 'store', 'store_name',
+            'recipient_name', 'delivery_date', 'delivery_time',
+            'total', 'is_paid', 'created_at', 'items_count',
+        ]
+        read_only_fields = fields
+
+
 class OrderSerializer(serializers.ModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True)
+    store_name = serializers.CharField(source='store.name', read_only=True, default=None)
+    assigned_florist_name = serializers.SerializerMethodField()
 
     class Meta:
         model = Order
         fields = [
-            'id', 'status', 'delivery_type', 'store', 'assigned_florist',
+            'id', 'status', 'delivery_type', 'store', 'store_name',
+            'assigned_florist', 'assigned_florist_name',
             'recipient_name', 'recipient_phone', 'delivery_address',
             'delivery_date', 'delivery_time', 'card_text', 'comment',
-            'total_price', 'payment_method', 'is_paid',
+            'subtotal', 'discount', 'delivery_fee', 'total',
+            'payment_url', 'is_paid',
             'created_at', 'items',
         ]
-        read_only_fields = ['status', 'assigned_florist', 'total_price', 'is_paid', 'created_at']
+        # Точка, дата и время доставки задаются при создании вместе с местом
+        # в слоте (OrderCreateSerializer) и потом не меняются
+        read_only_fields = [
+            'status', 'store', 'delivery_date', 'delivery_time',
+            'assigned_florist', 'subtotal', 'discount', 'delivery_fee', 'total',
+            'payment_url', 'is_paid', 'created_at',
+        ]
+
+    def update(self, instance, validated_data):
+        address_changed = validated_data.get('delivery_address', instance.delivery_address) != instance.delivery_address
+        if address_changed:
+            # Старые координаты к новому адресу не относятся
+            validated_data['delivery_latitude'] = validated_data['delivery_longitude'] = None
+        order = super().update(instance, validated_data)
+        if address_changed:
+            schedule_geocoding(order)
+        return order
+
+    def get_assigned_florist_name(self, obj):
+        florist = obj.assigned_florist
+        if florist is None:
+            return None
+        return florist.get_full_name() or florist.get_username()
+
+
+class ArchivedOrderItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedOrderItem
+        fields = ['id', 'product', 'product_name', 'quantity', 'price']
+        read_only_fields = fields
+
+
+class ArchivedOrderSerializer(serializers.ModelSerializer):
+    """Архивный заказ — те же поля, что у OrderSerializer, только чтение"""
+    items = ArchivedOrderItemSerializer(many=True, read_only=True)
+    store_name = serializers.CharField(source='store.name', read_only=True, default=None)
+
+    class Meta:
+        model = ArchivedOrder
+        fields = [
+            'id', 'status', 'delivery_type', 'store', 'store_name', 'assigned_florist',
+            'recipient_name', 'recipient_phone', 'delivery_address',
+            'delivery_date', 'delivery_time', 'card_text', 'comment',
+            'subtotal', 'discount', 'delivery_fee', 'total', 'is_paid',
+            'created_at', 'archived_at', 'items',
+        ]
+        read_only_fields = fields
+
+
+class OrderItemCreateSerializer(serializers.Serializer):
+    """Позиция нового заказа: товары проверяются одним запросом в OrderCreateSerializer"""
+    product = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1, default=1)
 
 
 class OrderCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating a new order with items"""
-    items = OrderItemSerializer(many=True)
+    items = OrderItemCreateSerializer(many=True, allow_empty=False)
 
     class Meta:
         model = Order
         fields = [
             'delivery_type', 'store', 'recipient_name', 'recipient_phone',
             'delivery_address', 'delivery_date', 'delivery_time',
-            'card_text', 'comment', 'payment_method', 'items',
+            'card_text', 'comment', 'items',
         ]
 
+    def validate_items(self, items):
+        product_ids = {item['product'] for item in items}
+        products = Product.objects.filter(pk__in=product_ids, is_active=True).in_bulk()
+        missing = sorted(product_ids - products.keys())
+        if missing:
+            raise serializers.ValidationError(f'Товары недоступны: {missing}')
+        for item in items:
+            item['product'] = products[item['product']]
+        return items
+
     def create(self, validated_data):
         items_data = validated_data.pop('items')
-        order = Order.objects.create(**validated_data)
-        total = 0
-        for item_data in items_data:
-            product = item_data['product']
-            price = product.discount_price or product.price
-            item = OrderItem.objects.create(
-                order=order,
-                product=product,
-                quantity=item_data['quantity'],
-                price=price,
+        items = [
+            OrderItem(product=item['product'], quantity=item['quantity'], price=unit_price(item['product']))
+            for item in items_data
+        ]
+        subtotal = sum((item.price * item.quantity for item in items), 0)
+        fee = delivery_fee(validated_data['delivery_type'], subtotal)
+
+        with transaction.atomic():
+            store = validated_data.get('store')
+            if store is not None and store_uses_slots(store.pk):
+                try:
+                    validated_data['delivery_slot'] = reserve_slot(
+                        store.pk, validated_data['delivery_date'], validated_data['delivery_time'],
+                    )
+                except SlotUnavailable as error:
+                    raise serializers.ValidationError({'delivery_time': str(error)})
+            order = Order.objects.create(
+                **validated_data,
+                subtotal=subtotal,
+                delivery_fee=fee,
+                total=subtotal + fee,
             )
-            total += price * item.quantity
-        order.total_price = total
-        order.save()
+            for item in items:
+                item.order = order
+            OrderItem.objects.bulk_create(items)
+            # Начало отсчёта для метрик времени в статусах и строка в сводке продаж
+            record_events([order], order.status, order.customer, order.created_at, from_status='')
+            schedule_geocoding(order)
+        # Ответ собирается из уже загруженных позиций — без повторного SELECT
+        order._prefetched_objects_cache = {'items': items}
         return order
+
+    def to_representation(self, instance):
+        return OrderSerializer(instance, context=self.context).data
+
+
+class BulkTransitionSerializer(serializers.Serializer):
+    """Массовая смена статуса: список id и целевой статус"""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=BULK_TRANSITION_MAX_IDS,
+    )
+    status = serializers.ChoiceField(choices=list(STATUS_ACTIONS))
@@ -0,0 +1,44 @@
+"""
+Singleton-настройки (DeliverySettings, GlobalSettings) в памяти процесса.
+
+Объекты читаются из БД один раз на процесс и дальше отдаются из памяти.
+Актуальность проверяется по номеру версии «settings» в общем кэше (Redis):
+сохранение настроек увеличивает версию (signals.py), и каждый воркер
+gunicorn/uvicorn при следующем обращении перечитывает объект. Цена
+обращения — один GET в кэш вместо get_or_create в БД.
+
+Возвращаемые объекты общие для всех запросов процесса — только для чтения.
+"""
+import threading
+
+from apps.products.cache import bump_cache_version, get_cache_version
+
+from .models import DeliverySettings, GlobalSettings
+
+NAMESPACE = 'settings'
+
+_lock = threading.Lock()
+_loaded = {}  # модель -> (версия, объект)
+
+
+def get_delivery_settings():
+    return _get(DeliverySettings)
+
+
+def get_global_settings():
+    return _get(GlobalSettings)
+
+
+def invalidate_settings():
+    bump_cache_version(NAMESPACE)
+
+
+def _get(model):
+    version = get_cache_version(NAMESPACE)
+    loaded = _loaded.get(model)
+    if loaded and loaded[0] == version:
+        return loaded[1]
+    with _lock:
+        instance = model.load()
+        _loaded[model] = (version, instance)
+    return instance
@@ -0,0 +1,29 @@
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import DeliverySettings, DeliverySlot, DeliveryWindow, GlobalSettings
+from .settings_cache import invalidate_settings
+from .slots import invalidate_slots, sync_window_slots
+
+
+@receiver([post_save, post_delete], sender=DeliverySettings)
+@receiver([post_save, post_delete], sender=GlobalSettings)
+def invalidate_singleton_settings(sender, **kwargs):
+    """Воркеры перечитают настройки при следующем обращении после коммита"""
+    transaction.on_commit(invalidate_settings)
+
+
+@receiver(post_save, sender=DeliveryWindow)
+def sync_delivery_window(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sync_window_slots(instance)
+
+
+@receiver(pre_delete, sender=DeliveryWindow)
+def drop_empty_window_slots(sender, instance, **kwargs):
+    """Будущие пустые слоты удаляются, занятые остаются — заказы уже приняты"""
+    DeliverySlot.objects.filter(window=instance, date__gte=timezone.localdate(), reserved=0).delete()
+    transaction.on_commit(lambda: invalidate_slots(instance.store_id))
@@ -0,0 +1,149 @@
+"""
+Слоты доставки с лимитом заказов.
+
+DeliveryWindow задаёт интервалы точки и их вместимость. На каждую дату
+интервалы заранее разворачиваются в DeliverySlot со счётчиком reserved:
+ежедневная задача на DELIVERY_SLOTS_DAYS_AHEAD дней вперёд и сигналы при
+изменении интервалов. Чтение списка слотов ничего не пишет в БД.
+
+Бронь — один условный UPDATE ... SET reserved = reserved + 1
+WHERE reserved < capacity: из двух параллельных оформлений последнее
+место получит только одно, без COUNT по заказам и без блокировок.
+Отмена заказа возвращает место (release_slots).
+
+Список свободных слотов кэшируется по точке; версия кэша точки
+увеличивается при каждой брони, отмене и изменении интервалов.
+"""
+import datetime
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from apps.products.cache import bump_cache_version, make_cache_key
+
+from .models import DeliverySlot, DeliveryWindow
+
+
+class SlotUnavailable(Exception):
+    pass
+
+
+def cache_namespace(store_id):
+    return f'slots:{store_id}'
+
+
+def invalidate_slots(store_id):
+    bump_cache_version(cache_namespace(store_id))
+
+
+def materialize_slots(store_ids, date_from, date_to):
+    """Создать недостающие слоты точек на даты [date_from, date_to]"""
+    windows = list(DeliveryWindow.objects.filter(store_id__in=store_ids, is_active=True))
+    slots = []
+    date = date_from
+    while date <= date_to:
+        for window in windows:
+            if window.weekday is None or window.weekday == date.weekday():
+                slots.append(DeliverySlot(
+                    store_id=window.store_id, window=window, date=date,
+                    start_time=window.start_time, end_time=window.end_time,
+                    capacity=window.capacity,
+                ))
+        date += datetime.timedelta(days=1)
+    # Уже созданные слоты (и их счётчики) не трогаем
+    DeliverySlot.objects.bulk_create(slots, ignore_conflicts=True)
+
+
+def materialize_upcoming(store_ids=None):
+    """Слоты всех точек (или указанных) на DELIVERY_SLOTS_DAYS_AHEAD дней вперёд"""
+    if store_ids is None:
+        store_ids = set(DeliveryWindow.objects.filter(is_active=True).values_list('store_id', flat=True))
+    today = timezone.localdate()
+    materialize_slots(store_ids, today, today + datetime.timedelta(days=settings.DELIVERY_SLOTS_DAYS_AHEAD))
+    # После коммита: из админки вызывается внутри транзакции сохранения интервала
+    for store_id in store_ids:
+        transaction.on_commit(lambda store_id=store_id: invalidate_slots(store_id))
+
+
+def sync_window_slots(window):
+    """
+    Перенести изменения интервала на будущие слоты: пустые пересоздаются,
+    у занятых меняется только лимит, и не ниже уже принятых заказов.
+    """
+    future = DeliverySlot.objects.filter(window=window, date__gte=timezone.localdate())
+    future.filter(reserved=0).delete()
+    future.update(capacity=Greatest(window.capacity, F('reserved')))
+    materialize_upcoming([window.store_id])
+
+
+def available_slots(store_id, date_from, date_to):
+    key = make_cache_key(cache_namespace(store_id), date_from, date_to)
+    slots = cache.get(key)
+    if slots is None:
+        slots = [
+            {
+                'id': slot['id'],
+                'date': slot['date'].isoformat(),
+                'start_time': slot['start_time'].strftime('%H:%M'),
+                'end_time': slot['end_time'].strftime('%H:%M'),
+                'available': slot['capacity'] - slot['reserved'],
+            }
+            for slot in DeliverySlot.objects.filter(
+                store_id=store_id, date__range=(date_from, date_to),
+            ).values('id', 'date', 'start_time', 'end_time', 'capacity', 'reserved')
+        ]
+        cache.set(key, slots, settings.DELIVERY_SLOTS_CACHE_TIMEOUT)
+    return slots
+
+
+def store_uses_slots(store_id):
+    return DeliveryWindow.objects.filter(store_id=store_id, is_active=True).exists()
+
+
+def reserve_slot(store_id, date, time):
+    """
+    Занять место в слоте, куда попадает время доставки. Возвращает слот;
+    SlotUnavailable — если такого слота нет или он заполнен.
+    """
+    slot = DeliverySlot.objects.filter(
+        store_id=store_id, date=date, start_time__lte=time, end_time__gt=time,
+    ).first()
+    if slot is None:
+        raise SlotUnavailable('Нет доставки в это время')
+    reserved = DeliverySlot.objects.filter(pk=slot.pk, reserved__lt=F('capacity')).update(
+        reserved=F('reserved') + 1,
+    )
+    if not reserved:
+        raise SlotUnavailable('Все заказы на это время уже приняты, выберите другой интервал')
+    # После коммита: иначе параллельное чтение закэширует ещё не занятый слот
+    transaction.on_commit(lambda: invalidate_slots(store_id))
+    return slot
+
+
+def release_slots(orders):
+    """Вернуть места отменённых заказов (нужны delivery_slot_id и store_id)"""
+    counts = Counter(order.delivery_slot_id for order in orders if order.delivery_slot_id)
+    for slot_id, count in counts.items():
+        DeliverySlot.objects.filter(pk=slot_id, reserved__gte=count).update(reserved=F('reserved') - count)
+    for store_id in {order.store_id for order in orders if order.delivery_slot_id}:
+        transaction.on_commit(lambda store_id=store_id: invalidate_slots(store_id))
+
+
+def slots_date_range(date_from=None, date_to=None):
+    """
+    Диапазон дат запроса: не раньше сегодня, не длиннее
+    DELIVERY_SLOTS_MAX_RANGE_DAYS и не дальше горизонта слотов
+    """
+    today = timezone.localdate()
+    date_from = max(date_from or today, today)
+    date_to = date_to or date_from
+    limit = min(
+        date_from + datetime.timedelta(days=settings.DELIVERY_SLOTS_MAX_RANGE_DAYS - 1),
+        today + datetime.timedelta(days=settings.DELIVERY_SLOTS_DAYS_AHEAD),
+    )
+    return date_from, min(date_to, limit)
@@ -0,0 +1,154 @@
+import logging
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATIONS_SCHEDULED_KEY = 'notifications:delivery-scheduled'
+
+
+@shared_task
+def archive_orders():
+    """Ночной перенос старых заказов в архив (CELERY_BEAT_SCHEDULE)"""
+    from .archive import archive_orders as archive
+
+    return archive()
+
+
+@shared_task
+def purge_notifications():
+    """Ночная чистка отправленных push-уведомлений (CELERY_BEAT_SCHEDULE)"""
+    from .notifications import purge_notifications as purge
+
+    return purge()
+
+
+@shared_task
+def materialize_delivery_slots():
+    """Слоты доставки на DELIVERY_SLOTS_DAYS_AHEAD дней вперёд (CELERY_BEAT_SCHEDULE)"""
+    from .slots import materialize_upcoming
+
+    materialize_upcoming()
+
+
+@shared_task
+def refresh_order_metrics(days=2):
+    """Метрики времени в статусах за последние дни (CELERY_BEAT_SCHEDULE)"""
+    from .metrics import refresh_metrics
+
+    return refresh_metrics(days)
+
+
+@shared_task
+def reconcile_sales_rollup(days=None):
+    """Ночная сверка сводки продаж с заказами и архивом (CELERY_BEAT_SCHEDULE)"""
+    from .sales import reconcile_sales
+
+    return reconcile_sales(days)
+
+
+@shared_task
+def export_orders(export_format='csv', filters=None, search='', name=None):
+    """Выгрузка заказов и архива в файл хранилища (export.py); возвращает имя файла"""
+    from .export import export_to_storage
+
+    return export_to_storage(export_format, filters, search, name)
+
+
+@shared_task(rate_limit=settings.GEOCODER_RATE_LIMIT)
+def geocode_order(order_id):
+    """Координаты адреса доставки для планирования маршрутов (dispatch.py)"""
+    from .dispatch import locate_order
+
+    return locate_order(order_id)
+
+
+@shared_task
+def geocode_pending_orders():
+    """Повторить геокодирование предстоящих доставок без координат (CELERY_BEAT_SCHEDULE)"""
+    from django.utils import timezone
+
+    from .dispatch import DELIVERY_TYPES
+    from .models import Order
+
+    order_ids = list(
+        Order.objects.filter(
+            delivery_date__gte=timezone.localdate(), delivery_type__in=DELIVERY_TYPES,
+            delivery_latitude__isnull=True,
+        )
+        .exclude(delivery_address='')
+        .values_list('pk', flat=True)
+    )
+    for order_id in order_ids:
+        geocode_order.delay(order_id)
+    return len(order_ids)
+
+
+def schedule_geocoding(order):
+    """Геокодировать адрес заказа после коммита; вызывать при создании и смене адреса"""
+    from .dispatch import DELIVERY_TYPES
+
+    if order.delivery_type in DELIVERY_TYPES and order.delivery_address:
+        transaction.on_commit(lambda: _enqueue_geocoding(order.pk))
+
+
+def _enqueue_geocoding(order_id):
+    try:
+        geocode_order.delay(order_id)
+    except Exception:
+        # Заказ подберёт периодический geocode_pending_orders
+        logger.exception('Failed to enqueue geocode_order')
+
+
+@shared_task(autoretry_for=(Exception,), retry_backoff=True, max_retries=5)
+def create_payment_urls(order_ids):
+    """Ссылки на оплату принятых заказов (transitions.assign_payment_urls)"""
+    from .models import Order
+    from .transitions import assign_payment_urls
+
+    # Повтор задачи не создаёт платёж второй раз; отменённым ссылка не нужна
+    orders = list(Order.objects.filter(pk__in=order_ids, status='awaiting_payment', payment_url=''))
+    assign_payment_urls(orders)
+    return len(orders)
+
+
+def schedule_payment_urls(order_ids):
+    """Создать ссылки на оплату после коммита перехода accept"""
+    transaction.on_commit(lambda: _enqueue_payment_urls(order_ids))
+
+
+def _enqueue_payment_urls(order_ids):
+    try:
+        create_payment_urls.delay(order_ids)
+    except Exception:
+        logger.exception('Failed to enqueue create_payment_urls for orders %s', order_ids)
+
+
+@shared_task
+def deliver_notifications():
+    """Отправить push-уведомления из outbox (также раз в минуту по CELERY_BEAT_SCHEDULE)"""
+    from .notifications import deliver_pending
+
+    return deliver_pending()
+
+
+def schedule_delivery():
+    """
+    Поставить отправку после коммита. Переходы за NOTIFICATION_BATCH_DELAY
+    секунд собираются в одну задачу — уведомления уходят пачкой.
+    """
+    if settings.CELERY_TASK_ALWAYS_EAGER:
+        transaction.on_commit(deliver_notifications.delay)
+    elif cache.add(NOTIFICATIONS_SCHEDULED_KEY, True, settings.NOTIFICATION_BATCH_DELAY):
+        transaction.on_commit(_enqueue_delivery)
+
+
+def _enqueue_delivery():
+    try:
+        deliver_notifications.apply_async(countdown=settings.NOTIFICATION_BATCH_DELAY)
+    except Exception:
+        # Уведомления уже в outbox — их подберёт периодический запуск
+        logger.exception('Failed to enqueue deliver_notifications')
@@ -0,0 +1,133 @@
+import threading
+from collections import Counter
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TransactionTestCase, skipUnlessDBFeature
+from rest_framework.test import APIClient, APITestCase
+
+from apps.orders.models import Order, OrderItem
+from apps.products.models import Category, Product
+from apps.stores.models import Store
+from apps.users.models import CustomUser
+
+# COUNT(*) пагинации + страница заказов с магазином и числом позиций
+LIST_QUERIES = 2
+# заказ с магазином и флористом + позиции с товарами
+DETAIL_QUERIES = 2
+ITEMS_PER_ORDER = 5
+
+
+def create_store():
+    return Store.objects.create(
+        name='Test', address='Test st. 1', phone='+70000000004',
+        latitude=Decimal('55.75'), longitude=Decimal('37.61'), working_hours={},
+    )
+
+
+def create_order(customer, store, **fields):
+    return Order.objects.create(
+        customer=customer, store=store, delivery_type='pickup', recipient_name='Test',
+        recipient_phone='+70000000003', delivery_date='2026-03-08', delivery_time='12:00',
+        subtotal=Decimal(1000), total=Decimal(1000), **fields,
+    )
+
+
+class OrderQueryCountTests(APITestCase):
+    """Список и карточка заказа: число запросов не растёт с числом заказов и позиций (N+1)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Test', slug='test', icon='flower', image='categories/test.png')
+        cls.products = Product.objects.bulk_create(
+            Product(category=category, name=f'Test {i}', slug=f'test-{i}', price=Decimal(500 + i))
+            for i in range(ITEMS_PER_ORDER)
+        )
+        cls.store = create_store()
+        cls.florist = CustomUser.objects.create_user(
+            username='florist', phone='+70000000002', password='test', role='florist',
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.florist)
+
+    def create_orders(self, count):
+        orders = [create_order(self.florist, self.store, assigned_florist=self.florist) for _ in range(count)]
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, product=product, quantity=1, price=product.price)
+            for order in orders
+            for product in self.products
+        )
+        return orders
+
+    def test_list_queries(self):
+        for count in (1, 20):
+            with self.subTest(orders=count):
+                Order.objects.all().delete()
+                self.create_orders(count)
+                with self.assertNumQueries(LIST_QUERIES):
+                    response = self.client.get('/api/orders/')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data['count'], count)
+
+    def test_detail_queries(self):
+        for count in (1, 20):
+            with self.subTest(orders=count):
+                Order.objects.all().delete()
+                order = self.create_orders(count)[-1]
+                with self.assertNumQueries(DETAIL_QUERIES):
+                    response = self.client.get(f'/api/orders/{order.pk}/')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['items']), ITEMS_PER_ORDER)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentAcceptTests(TransactionTestCase):
+    """
+    «Первый флорист забирает заказ»: N потоков одновременно (через Barrier)
+    вызывают POST /api/orders/{id}/accept/. Потокам нужны закоммиченные
+    данные, поэтому TransactionTestCase — тестовая БД очищается после теста.
+    Только PostgreSQL: SQLite не ждёт блокировку, а сразу падает «table is locked».
+    """
+    FLORISTS = 8
+    ROUNDS = 5
+
+    def setUp(self):
+        self.store = create_store()
+        self.customer = CustomUser.objects.create_user(username='customer', phone='+79980000000')
+        self.florists = [
+            CustomUser.objects.create_user(username=f'florist-{i}', phone=f'+7999000{i:04d}', role='florist')
+            for i in range(self.FLORISTS)
+        ]
+
+    def test_exactly_one_winner(self):
+        for number in range(self.ROUNDS):
+            with self.subTest(round=number):
+                order = create_order(self.customer, self.store)
+                results = self.accept_concurrently(order)
+
+                order.refresh_from_db()
+                winners = [pk for pk, code in results.items() if code == 200]
+                self.assertEqual(len(winners), 1, Counter(results.values()))
+                self.assertEqual(order.assigned_florist_id, winners[0])
+                self.assertEqual(order.status, 'awaiting_payment')
+
+    def accept_concurrently(self, order):
+        barrier = threading.Barrier(len(self.florists))
+        results = {}
+
+        def accept(florist):
+            client = APIClient()
+            client.force_authenticate(florist)
+            try:
+                barrier.wait()
+                results[florist.pk] = client.post(f'/api/orders/{order.pk}/accept/').status_code
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=accept, args=(florist,)) for florist in self.florists]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
@@ -0,0 +1,190 @@
+"""
+Переходы статусов заказа.
+
+Каждый переход — один условный UPDATE ... WHERE id = … AND status = …
+по статусу, прочитанному вместе с заказом (compare-and-swap). Кто первым
+изменил строку, тот и выиграл («первый флорист забирает заказ»).
+Массовый переход дополнительно блокирует строки select_for_update
+(PostgreSQL), но статус всё равно проверяется в самом UPDATE, и
+переведёнными считаются только реально изменённые строки. Отмена
+возвращает место в слоте доставки (slots.py). В той же транзакции
+пишутся события в журнал OrderEvent, сводка продаж (sales.py), вычет
+отменённых заказов из рейтинга популярности и push-уведомления клиентам (notifications.py). Ссылка на оплату при accept
+создаётся у провайдера только после коммита (assign_payment_urls): сетевые
+вызовы не держат транзакцию и блокировки, а проигравший гонку флорист
+платёж не создаёт.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from apps.payments.providers import get_provider
+from apps.products.popularity import track_cancellations
+
+from .events import publish_status_changes
+from .models import Order, OrderEvent
+from .notifications import enqueue_status_notifications
+from .sales import track_status_changes
+from .slots import release_slots
+
+# action: (допустимые текущие статусы, новый статус, ошибка для проигравшего,
+# поля, которые переход выставляет всегда — и в одиночном, и в массовом пути)
+TRANSITIONS = {
+    'accept': (('pending',), 'awaiting_payment', 'Заказ уже обработан', {}),
+    'confirm_payment': (('awaiting_payment',), 'paid', 'Заказ не ожидает оплаты', {'is_paid': True}),
+    'start_assembly': (('paid',), 'in_progress', 'Заказ не оплачен', {}),
+    'mark_ready': (('in_progress',), 'ready', 'Заказ не в сборке', {}),
+    'start_delivery': (('ready',), 'delivering', 'Заказ не готов', {}),
+    'complete': (('ready', 'delivering'), 'completed', 'Невозможно завершить', {}),
+    'cancel': (('pending', 'awaiting_payment'), 'cancelled', 'Невозможно отменить заказ в текущем статусе', {}),
+    'reject': (('pending',), 'cancelled', 'Заказ уже обработан', {}),
+}
+
+# Целевой статус массового перехода (POST /api/orders/bulk-transition/) -> action
+STATUS_ACTIONS = {
+    'awaiting_payment': 'accept',
+    'paid': 'confirm_payment',
+    'in_progress': 'start_assembly',
+    'ready': 'mark_ready',
+    'delivering': 'start_delivery',
+    'completed': 'complete',
+    'cancelled': 'cancel',
+}
+
+
+def apply_transition(order, action, actor=None, **fields):
+    """
+    Перевести заказ по action из статуса order.status. Возвращает True, если
+    UPDATE затронул строку; в этом случае поля order обновляются на месте.
+    """
+    from_statuses, to_status, _, action_fields = TRANSITIONS[action]
+    if order.status not in from_statuses:
+        return False
+    fields = {'status': to_status, 'updated_at': timezone.now(), **action_fields, **fields}
+    with transaction.atomic():
+        # Compare-and-swap по прочитанному статусу: если заказ успели
+        # перевести (например, ready -> delivering), UPDATE ничего не изменит
+        # и в журнал/сводку не попадёт неверный прежний статус
+        updated = Order.objects.filter(pk=order.pk, status=order.status).update(**fields)
+        if not updated:
+            return False
+        if to_status == 'cancelled':
+            release_slots([order])
+        record_events([order], to_status, actor, fields['updated_at'])
+        enqueue_status_notifications([order], to_status)
+    for name, value in fields.items():
+        setattr(order, name, value)
+    return True
+
+
+def apply_transition_bulk(order_ids, action, queryset=None, actor=None, **fields):
+    """
+    Перевести несколько заказов условным UPDATE (по одному на исходный
+    статус). Возвращает заказы (id, store_id,
+    customer_id, total, created_at), которые действительно перешли; остальные уже были в
+    другом статусе. queryset ограничивает, какие заказы можно трогать.
+    """
+    from_statuses, to_status, _, action_fields = TRANSITIONS[action]
+    fields = {'status': to_status, 'updated_at': timezone.now(), **action_fields, **fields}
+    queryset = Order.objects.all() if queryset is None else queryset
+    with transaction.atomic():
+        orders = list(
+            queryset.select_for_update()
+            .filter(pk__in=order_ids, status__in=from_statuses)
+            .only('id', 'status', 'store_id', 'customer_id', 'delivery_slot_id', 'total', 'created_at')
+            .order_by()
+        )
+        orders = _update_read_statuses(orders, fields)
+        if to_status == 'cancelled':
+            release_slots(orders)
+        record_events(orders, to_status, actor, fields['updated_at'])
+        enqueue_status_notifications(orders, to_status)
+    for order in orders:
+        order.status = to_status
+    return orders
+
+
+def _update_read_statuses(orders, fields):
+    """
+    Условный UPDATE по каждому прочитанному статусу: select_for_update на
+    SQLite ничего не блокирует, поэтому статус в WHERE обязателен. Если
+    параллельный запрос успел перевести часть заказов, возвращаются только
+    строки, изменённые этим UPDATE (их updated_at совпадает с нашим).
+    """
+    by_status = {}
+    for order in orders:
+        by_status.setdefault(order.status, []).append(order)
+    moved = []
+    for status, group in by_status.items():
+        ids = [order.pk for order in group]
+        updated = Order.objects.filter(pk__in=ids, status=status).update(**fields)
+        if updated < len(group):
+            changed = set(
+                Order.objects.filter(pk__in=ids, status=fields['status'], updated_at=fields['updated_at'])
+                .values_list('pk', flat=True)
+            )
+            group = [order for order in group if order.pk in changed]
+        moved.extend(group)
+    return moved
+
+
+def transition_orders(order_ids, action, queryset=None, florist=None, actor=None):
+    """
+    Массовый переход для API и админки. Возвращает {id: None | текст ошибки}
+    по каждому запрошенному id. Заказы переводятся условным UPDATE,
+    ссылки на оплату при accept создаёт задача после коммита, точкам уходит
+    одно сообщение (publish_status_changes). florist при accept назначается
+    на заказы; actor (по умолчанию florist) записывается в журнал.
+    """
+    queryset = Order.objects.all() if queryset is None else queryset
+    fields = {'assigned_florist': florist} if action == 'accept' and florist is not None else {}
+    with transaction.atomic():
+        orders = apply_transition_bulk(order_ids, action, queryset=queryset, actor=actor or florist, **fields)
+        publish_status_changes(orders, TRANSITIONS[action][1], florist=fields.get('assigned_florist'))
+    if action == 'accept' and orders:
+        from .tasks import schedule_payment_urls
+
+        schedule_payment_urls([order.pk for order in orders])
+
+    moved = {order.pk for order in orders}
+    rest = set(order_ids) - moved
+    # Не перешедшие: заказ в другом статусе — или недоступен пользователю
+    existing = set(queryset.filter(pk__in=rest).values_list('pk', flat=True)) if rest else set()
+    return {
+        order_id: None if order_id in moved
+        else transition_error(action) if order_id in existing
+        else 'Заказ не найден'
+        for order_id in order_ids
+    }
+
+
+def assign_payment_urls(orders):
+    """Создать ссылки на оплату принятых заказов; вызывать вне транзакции перехода"""
+    provider = get_provider()
+    for order in orders:
+        order.payment_url = provider.create_payment_url(order)
+    Order.objects.bulk_update(orders, ['payment_url'])
+
+
+def record_events(orders, to_status, actor=None, created_at=None, from_status=None):
+    """
+    Записать смену статуса в журнал (одним INSERT), сводку продаж и рейтинг популярности.
+    Прежний статус — order.status, если не передан from_status ('' — новый заказ).
+    """
+    created_at = created_at or timezone.now()
+    changes = [
+        (order, order.status if from_status is None else from_status, to_status)
+        for order in orders
+    ]
+    OrderEvent.objects.bulk_create(
+        OrderEvent(
+            order_id=order.pk, store_id=order.store_id, from_status=previous or '',
+            to_status=to_status, actor=actor, created_at=created_at,
+        )
+        for order, previous, to_status in changes
+    )
+    track_status_changes(changes)
+    track_cancellations(changes)
+
+
+def transition_error(action):
+    return TRANSITIONS[action][2]
@@ -1,13 +1,21 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import OrderViewSet, FloristTaskViewSet, delivery_settings
+from .views import (
+    ArchivedOrderViewSet, OrderViewSet, FloristTaskViewSet, delivery_settings, delivery_slots, dispatch_routes,
+    order_metrics,
+)
 
 router = DefaultRouter()
+# Раньше orders/: иначе orders/archive/ совпадёт с orders/<pk>/
+router.register('orders/archive', ArchivedOrderViewSet, basename='archived-order')
 router.register('orders', OrderViewSet, basename='order')
 router.register('florist-tasks', FloristTaskViewSet, basename='florist-task')
 
 urlpatterns = [
     path('', include(router.urls)),
     path('delivery-settings/', delivery_settings, name='delivery-settings'),
+    path('delivery-slots/', delivery_slots, name='delivery-slots'),
+    path('dispatch/routes/', dispatch_routes, name='dispatch-routes'),
+    path('order-metrics/', order_metrics, name='order-metrics'),
 ]
 
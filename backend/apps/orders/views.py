@@ -1,143 +1,212 @@
+import datetime
+import logging
+
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action, api_view, permission_classes as perm_classes
 from rest_framework.response import Response
+from django.db import transaction
+from django.db.models import Count, Prefetch
 from django.utils import timezone
-from .models import Order, DeliverySettings
+from django.utils.dateparse import parse_date
+from apps.idempotency import idempotent
+from apps.pagination import OptionalCursorPagination
+from .models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem, StoreDailyMetrics
 from .florist_models import FloristTask
-from .serializers import OrderSerializer, OrderCreateSerializer
+from .dispatch import plan_routes
+from .events import publish_new_order, publish_status_changes
+from .serializers import (
+    ArchivedOrderSerializer, BulkTransitionSerializer, OrderSerializer, OrderListSerializer, OrderCreateSerializer,
+)
+from .settings_cache import get_delivery_settings
+from .slots import available_slots, release_slots, slots_date_range
+from .tasks import schedule_payment_urls
+from .transitions import STATUS_ACTIONS, apply_transition, assign_payment_urls, transition_error, transition_orders
+
+logger = logging.getLogger(__name__)
+
+
+class IsFlorist(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and request.user.role in ('florist', 'owner')
 
 
 class OrderViewSet(viewsets.ModelViewSet):
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OptionalCursorPagination
+    cursor_ordering = ('-created_at', 'id')
 
     def get_queryset(self):
         user = self.request.user
         if user.role in ('florist', 'owner'):
-            return Order.objects.all().order_by('-created_at')
-        return Order.objects.filter(customer=user).order_by('-created_at')
+            queryset = Order.objects.all()
+        else:
+            queryset = Order.objects.filter(customer=user)
+
+        if self.action == 'list':
+            # Список: store одним JOIN, позиции — только COUNT
+            queryset = queryset.select_related('store').annotate(items_count=Count('items'))
+        elif self.action == 'retrieve':
+            # Детально: store и флорист JOIN'ом, позиции с товарами — одним запросом
+            queryset = queryset.select_related('store', 'assigned_florist').prefetch_related(
+                Prefetch('items', queryset=OrderItem.objects.select_related('product').order_by('id'))
+            )
+        return queryset.order_by('-created_at')
 
     def get_serializer_class(self):
         if self.action == 'create':
             return OrderCreateSerializer
+        if self.action == 'list':
+            return OrderListSerializer
         return OrderSerializer
 
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
-        serializer.save(customer=self.request.user)
+        order = serializer.save(customer=self.request.user)
+        publish_new_order(order)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            if instance.status != 'cancelled':
+                # У отменённого заказа место в слоте уже возвращено
+                release_slots([instance])
+            instance.delete()
+
+    def transition_failed(self, action):
+        return Response({'error': transition_error(action)}, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=True, methods=['post'])
+    @idempotent
     def accept(self, request, pk=None):
         """Флорист принимает заказ → генерируется ссылка на оплату → клиент получает"""
         order = self.get_object()
-        if order.status != 'pending':
-            return Response(
-                {'error': 'Заказ уже обработан'},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-        # TODO: Integrate with payment provider (YooKassa, Stripe, etc.)
-        # For now, generate a stub payment URL
-        order.payment_url = f'https://pay.example.com/order/{order.id}?amount={order.total}'
-        order.status = 'awaiting_payment'
-        order.assigned_florist = request.user
-        order.save()
-
-        # TODO: Send push notification to customer with payment_url
-        # from .notifications import notify_order_status
-        # notify_order_status(order)
-
+        if not apply_transition(order, 'accept', actor=request.user, assigned_florist=request.user):
+            return self.transition_failed('accept')
+        # Платёж создаётся только у выигравшего гонку и уже после коммита перехода
+        try:
+            assign_payment_urls([order])
+        except Exception:
+            logger.exception('Payment URL creation failed for order #%s', order.pk)
+            schedule_payment_urls([order.pk])
+        publish_status_changes([order], order.status, florist=request.user)
         return Response({
             'status': 'awaiting_payment',
             'payment_url': order.payment_url,
         })
 
-    @action(detail=True, methods=['post'])
+    @action(detail=True, methods=['post'], permission_classes=[IsFlorist])
+    @idempotent
     def confirm_payment(self, request, pk=None):
-        """Подтверждение оплаты (вызывается webhook'ом платёжной системы)"""
+        """Ручное подтверждение оплаты; онлайн-оплата приходит webhook'ом в apps.payments"""
         order = self.get_object()
-        if order.status != 'awaiting_payment':
-            return Response(
-                {'error': 'Заказ не ожидает оплаты'},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-        order.status = 'paid'
-        order.is_paid = True
-        order.save()
+        if not apply_transition(order, 'confirm_payment', actor=request.user):
+            return self.transition_failed('confirm_payment')
+        publish_status_changes([order], order.status)
         return Response({'status': 'paid'})
 
     @action(detail=True, methods=['post'])
+    @idempotent
     def start_assembly(self, request, pk=None):
         """Флорист начинает сборку после оплаты"""
         order = self.get_object()
-        if order.status != 'paid':
-            return Response(
-                {'error': 'Заказ не оплачен'},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-        order.status = 'in_progress'
-        order.save()
+        if not apply_transition(order, 'start_assembly', actor=request.user):
+            return self.transition_failed('start_assembly')
+        publish_status_changes([order], order.status)
         return Response({'status': 'in_progress'})
 
     @action(detail=True, methods=['post'])
+    @idempotent
     def cancel(self, request, pk=None):
         order = self.get_object()
-        if order.status in ('pending', 'awaiting_payment'):
-            order.status = 'cancelled'
-            order.save()
-            return Response({'status': 'cancelled'})
-        return Response(
-            {'error': 'Невозможно отменить заказ в текущем статусе'},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
+        if not apply_transition(order, 'cancel', actor=request.user):
+            return self.transition_failed('cancel')
+        publish_status_changes([order], order.status)
+        return Response({'status': 'cancelled'})
 
     @action(detail=True, methods=['post'])
+    @idempotent
     def reject(self, request, pk=None):
         """Флорист отклоняет заказ"""
         order = self.get_object()
-        if order.status != 'pending':
-            return Response(
-                {'error': 'Заказ уже обработан'},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
         reason = request.data.get('reason', 'Отклонён флористом')
-        order.status = 'cancelled'
-        order.comment = reason
-        order.save()
+        if not apply_transition(order, 'reject', actor=request.user, comment=reason):
+            return self.transition_failed('reject')
+        publish_status_changes([order], order.status)
         return Response({'status': 'cancelled', 'reason': reason})
 
     @action(detail=True, methods=['post'])
+    @idempotent
     def mark_ready(self, request, pk=None):
         """Букет собран"""
         order = self.get_object()
-        if order.status != 'in_progress':
-            return Response({'error': 'Заказ не в сборке'}, status=status.HTTP_400_BAD_REQUEST)
-        order.status = 'ready'
-        order.save()
+        if not apply_transition(order, 'mark_ready', actor=request.user):
+            return self.transition_failed('mark_ready')
+        publish_status_changes([order], order.status)
         return Response({'status': 'ready'})
 
     @action(detail=True, methods=['post'])
+    @idempotent
     def start_delivery(self, request, pk=None):
         """Заказ передан курьеру"""
         order = self.get_object()
-        if order.status != 'ready':
-            return Response({'error': 'Заказ не готов'}, status=status.HTTP_400_BAD_REQUEST)
-        order.status = 'delivering'
-        order.save()
+        if not apply_transition(order, 'start_delivery', actor=request.user):
+            return self.transition_failed('start_delivery')
+        publish_status_changes([order], order.status)
         return Response({'status': 'delivering'})
 
     @action(detail=True, methods=['post'])
+    @idempotent
     def complete(self, request, pk=None):
         """Заказ завершён"""
         order = self.get_object()
-        if order.status not in ('ready', 'delivering'):
-            return Response({'error': 'Невозможно завершить'}, status=status.HTTP_400_BAD_REQUEST)
-        order.status = 'completed'
-        order.save()
+        if not apply_transition(order, 'complete', actor=request.user):
+            return self.transition_failed('complete')
+        publish_status_changes([order], order.status)
         return Response({'status': 'completed'})
 
+    @action(detail=False, methods=['post'], url_path='bulk-transition', permission_classes=[IsFlorist])
+    @idempotent
+    def bulk_transition(self, request):
+        """
+        Несколько заказов в один статус: {"ids": [1, 2], "status": "ready"}.
+        Результат по каждому id; не перешедшие заказы не мешают остальным.
+        """
+        serializer = BulkTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(serializer.validated_data['ids']))
+        new_status = serializer.validated_data['status']
+        outcomes = transition_orders(
+            ids, STATUS_ACTIONS[new_status], queryset=self.get_queryset(), florist=request.user,
+        )
+        return Response({
+            'status': new_status,
+            'updated': sum(error is None for error in outcomes.values()),
+            'results': [
+                {'id': order_id, 'ok': error is None, 'error': error}
+                for order_id, error in outcomes.items()
+            ],
+        })
+
 
-class IsFlorist(permissions.BasePermission):
-    def has_permission(self, request, view):
-        return request.user.is_authenticated and request.user.role in ('florist', 'owner')
+class ArchivedOrderViewSet(viewsets.ReadOnlyModelViewSet):
+    """История старых заказов из архива (apps/orders/archive.py)"""
+    serializer_class = ArchivedOrderSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OptionalCursorPagination
+    cursor_ordering = ('-created_at', 'id')
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.role in ('florist', 'owner'):
+            queryset = ArchivedOrder.objects.all()
+        else:
+            queryset = ArchivedOrder.objects.filter(customer=user)
+        return queryset.select_related('store').prefetch_related(
+            Prefetch('items', queryset=ArchivedOrderItem.objects.order_by('id'))
+        ).order_by('-created_at')
 
 
 class FloristTaskViewSet(viewsets.ModelViewSet):
@@ -182,9 +251,60 @@ class FloristTaskViewSet(viewsets.ModelViewSet):
 @perm_classes([permissions.AllowAny])
 def delivery_settings(request):
     """Публичный endpoint — стоимость доставки для корзины"""
-    settings = DeliverySettings.load()
+    settings = get_delivery_settings()
     return Response({
         'city_price': str(settings.city_price),
         'remote_price': str(settings.remote_price),
         'free_delivery_threshold': str(settings.free_delivery_threshold),
     })
+
+
+@api_view(['GET'])
+@perm_classes([permissions.AllowAny])
+def delivery_slots(request):
+    """
+    GET /api/delivery-slots/?store=1&date_from=2026-03-07&date_to=2026-03-08 —
+    интервалы доставки точки со свободными местами (из кэша)
+    """
+    try:
+        store_id = int(request.query_params['store'])
+        date_from = parse_date(request.query_params.get('date_from', '')) or None
+        date_to = parse_date(request.query_params.get('date_to', '')) or None
+    except (KeyError, ValueError):
+        return Response({'error': 'Укажите store и даты в формате YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+    date_from, date_to = slots_date_range(date_from, date_to)
+    return Response(available_slots(store_id, date_from, date_to))
+
+
+@api_view(['GET'])
+@perm_classes([IsFlorist])
+def dispatch_routes(request):
+    """GET /api/dispatch/routes/?date=2026-03-08&store=1 — маршруты курьеров на день"""
+    try:
+        date = parse_date(request.query_params.get('date', '')) or timezone.localdate()
+        store_ids = [int(store) for store in request.query_params.getlist('store')]
+    except ValueError:
+        return Response({'error': 'Неверная дата или магазин'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(plan_routes(date, store_ids or None))
+
+
+@api_view(['GET'])
+@perm_classes([IsFlorist])
+def order_metrics(request):
+    """
+    GET /api/order-metrics/?date_from=2026-03-01&date_to=2026-03-08&store=1 —
+    медианы приёма и сборки по точкам и дням (из StoreDailyMetrics)
+    """
+    try:
+        date_to = parse_date(request.query_params.get('date_to', '')) or timezone.localdate()
+        date_from = parse_date(request.query_params.get('date_from', '')) or date_to - datetime.timedelta(days=6)
+        store_ids = [int(store) for store in request.query_params.getlist('store')]
+    except ValueError:
+        return Response({'error': 'Неверная дата или магазин'}, status=status.HTTP_400_BAD_REQUEST)
+    metrics = StoreDailyMetrics.objects.filter(date__range=(date_from, date_to)).order_by('date', 'store_id')
+    if store_ids:
+        metrics = metrics.filter(store_id__in=store_ids)
+    return Response(list(metrics.values(
+        'date', 'store', 'store__name', 'accepted_count', 'accept_median_seconds',
+        'assembled_count', 'assembly_median_seconds',
+    )))
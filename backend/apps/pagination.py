@@ -0,0 +1,136 @@
+"""
+Пагинация API.
+
+По умолчанию — обычная PageNumberPagination (как в настройках DRF), чтобы
+существующий фронтенд не менялся. Клиент может включить keyset-курсор
+параметром ?pagination=cursor: тогда страница выбирается условием
+WHERE (поле, id) после последней записи — без COUNT(*) и OFFSET.
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class OptionalCursorPagination(PageNumberPagination):
+    """
+    Курсорный режим работает по двум полям: основному полю сортировки и id
+    для разрешения одинаковых значений. Порядок берётся из
+    view.get_cursor_ordering(request) или view.cursor_ordering.
+    """
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+    cursor_ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Неверный курсор'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_query_param in request.query_params
+        )
+        if not self.use_cursor:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        ordering = self.get_cursor_ordering(request, view)
+        cursor = self.decode_cursor(request, queryset.model._meta.get_field(ordering[0].lstrip('-')))
+        reverse = bool(cursor and cursor['r'])
+        if reverse:
+            ordering = tuple(_invert(field) for field in ordering)
+
+        queryset = queryset.order_by(*ordering)
+        if cursor:
+            queryset = queryset.filter(_after(ordering, cursor['v'], cursor['i']))
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+
+        if reverse:
+            results.reverse()
+            ordering = tuple(_invert(field) for field in ordering)
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.ordering = ordering
+        self.cursor_page = results
+        self.display_page_controls = False
+        return results
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.use_cursor:
+            return super().get_next_link()
+        if not self.has_next or not self.cursor_page:
+            return None
+        return self.encode_cursor(self.cursor_page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.use_cursor:
+            return super().get_previous_link()
+        if not self.has_previous or not self.cursor_page:
+            return None
+        return self.encode_cursor(self.cursor_page[0], reverse=True)
+
+    def get_cursor_ordering(self, request, view):
+        if hasattr(view, 'get_cursor_ordering'):
+            return view.get_cursor_ordering(request)
+        return getattr(view, 'cursor_ordering', self.cursor_ordering)
+
+    def decode_cursor(self, request, field):
+        """Значение курсора приводится к типу поля сортировки field"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode()).decode())
+            value = field.to_python(cursor['v'])
+            if value is None:
+                raise ValueError('empty cursor value')
+            return {'v': value, 'i': int(cursor['i']), 'r': bool(cursor.get('r'))}
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj, reverse):
+        value = getattr(obj, self.ordering[0].lstrip('-'))
+        if not isinstance(value, (int, str)):
+            # Decimal / datetime: str() сохраняет полную точность
+            value = str(value)
+        cursor = {'v': value, 'i': obj.pk}
+        if reverse:
+            cursor['r'] = 1
+        encoded = urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        url = replace_query_param(url, self.mode_query_param, 'cursor')
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+
+def _invert(field):
+    return field[1:] if field.startswith('-') else f'-{field}'
+
+
+def _after(ordering, value, pk):
+    """Условие «строго после (value, pk)» для сортировки (field, tiebreak)"""
+    field, tiebreak = ordering
+    field_op = 'lt' if field.startswith('-') else 'gt'
+    tiebreak_op = 'lt' if tiebreak.startswith('-') else 'gt'
+    field, tiebreak = field.lstrip('-'), tiebreak.lstrip('-')
+    return (
+        Q(**{f'{field}__{field_op}': value})
+        | Q(**{field: value, f'{tiebreak}__{tiebreak_op}': pk})
+    )
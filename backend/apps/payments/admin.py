@@ -0,0 +1,18 @@
+from django.contrib import admin
+from unfold.admin import ModelAdmin
+
+from .models import PaymentEvent
+
+
+@admin.register(PaymentEvent)
+class PaymentEventAdmin(ModelAdmin):
+    """Журнал webhook'ов — только просмотр"""
+    list_display = ['id', 'provider', 'event_type', 'order_id', 'amount', 'status', 'received_at', 'processed_at']
+    list_filter = ['provider', 'event_type', 'status']
+    search_fields = ['event_id', 'order_id']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
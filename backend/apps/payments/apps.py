@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+class PaymentsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.payments'
+    verbose_name = 'Платежи'
+
+    def ready(self):
+        # Без секрета любой сможет подписать webhook и отметить заказ оплаченным
+        for name in ('PAYMENT_PROVIDER', 'PAYMENT_WEBHOOK_SECRET'):
+            if not getattr(settings, name):
+                raise ImproperlyConfigured(f'{name} не задан в окружении')
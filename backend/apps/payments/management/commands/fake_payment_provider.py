@@ -0,0 +1,115 @@
+"""
+Локальная замена платёжного сервиса (FakeProvider).
+
+Сервер страницы оплаты: ссылка из accept (PAYMENT_FAKE_URL/pay/?order_id=…)
+сразу «оплачивает» заказ — отправляет подписанный webhook payment.succeeded.
+
+    python manage.py fake_payment_provider --port 8010 \
+        --webhook-url http://localhost:8000/api/payments/webhook/fake/
+
+Всплеск webhook'ов для нагрузочного теста приёмника:
+
+    python manage.py fake_payment_provider --burst 5000 --concurrency 50 \
+        --orders 1-500 --duplicates 0.2 --webhook-url …
+"""
+import random
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import HTTPError
+from urllib.parse import parse_qs, urlparse
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.orders.models import Order
+from apps.payments.providers import PAYMENT_SUCCEEDED, FakeProvider
+
+
+def send_webhook(webhook_url, event_id, order_id, amount, event_type=PAYMENT_SUCCEEDED):
+    body, headers = FakeProvider.build_webhook(event_id, event_type, order_id, amount)
+    started = time.perf_counter()
+    try:
+        with urlopen(Request(webhook_url, data=body, headers=headers, method='POST'), timeout=30) as response:
+            status = response.status
+    except HTTPError as error:
+        status = error.code
+    return status, (time.perf_counter() - started) * 1000
+
+
+class Command(BaseCommand):
+    help = 'Фейковый платёжный провайдер: страница оплаты и нагрузочная отправка webhook\'ов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--webhook-url', default='http://localhost:8000/api/payments/webhook/fake/')
+        parser.add_argument('--port', type=int, default=8010, help='Порт страницы оплаты')
+        parser.add_argument('--burst', type=int, default=0, help='Отправить N webhook\'ов и выйти')
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--orders', default='1-100', help='Диапазон номеров заказов для --burst')
+        parser.add_argument('--duplicates', type=float, default=0.0,
+                            help='Доля повторных доставок уже отправленных событий')
+
+    def handle(self, *args, **options):
+        if options['burst']:
+            self.burst(options)
+        else:
+            self.serve(options['port'], options['webhook_url'])
+
+    def serve(self, port, webhook_url):
+        stdout = self.stdout
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                if url.path.rstrip('/') != '/pay' or 'order_id' not in query:
+                    self.send_error(404)
+                    return
+                order_id = int(query['order_id'][0])
+                amount = query.get('amount', ['0'])[0]
+                status, _ = send_webhook(webhook_url, uuid.uuid4().hex, order_id, amount)
+                stdout.write(f'Заказ #{order_id} оплачен ({amount}), webhook -> {status}')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.end_headers()
+                self.wfile.write(f'<h1>Заказ #{order_id} оплачен</h1>'.encode())
+
+            def log_message(self, *args):
+                pass
+
+        self.stdout.write(f'Fake payment provider: http://localhost:{port}/pay/?order_id=1&amount=100')
+        ThreadingHTTPServer(('', port), Handler).serve_forever()
+
+    def burst(self, options):
+        try:
+            first, last = (int(part) for part in options['orders'].split('-'))
+        except ValueError:
+            raise CommandError('--orders задаётся диапазоном, например 1-500')
+        rnd = random.Random(1)
+        events = []
+        for _ in range(options['burst']):
+            if events and rnd.random() < options['duplicates']:
+                events.append(rnd.choice(events))
+            else:
+                events.append((uuid.uuid4().hex, rnd.randint(first, last)))
+
+        # Сумма должна совпасть с итогом заказа, иначе оплата будет пропущена
+        totals = dict(Order.objects.filter(pk__range=(first, last)).values_list('pk', 'total'))
+        url = options['webhook_url']
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options['concurrency']) as pool:
+            results = list(pool.map(lambda event: send_webhook(url, event[0], event[1], totals.get(event[1], 0)), events))
+        elapsed = time.perf_counter() - started
+
+        timings = sorted(ms for _, ms in results)
+        statuses = {}
+        for status, _ in results:
+            statuses[status] = statuses.get(status, 0) + 1
+        self.stdout.write(f'{len(events)} webhook\'ов за {elapsed:.1f} с ({len(events) / elapsed:.0f}/с)')
+        self.stdout.write(f'Ответы: {statuses}')
+        self.stdout.write(
+            f'median {statistics.median(timings):.1f} ms, '
+            f'p95 {timings[min(len(timings) - 1, int(len(timings) * 0.95))]:.1f} ms'
+        )
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=30, verbose_name='Провайдер')),
+                ('event_id', models.CharField(max_length=100, verbose_name='ID события у провайдера')),
+                ('event_type', models.CharField(max_length=50, verbose_name='Тип события')),
+                ('order_id', models.BigIntegerField(blank=True, null=True, verbose_name='Номер заказа')),
+                ('payload', models.JSONField(verbose_name='Тело запроса')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает обработки'), ('processed', 'Обработано'), ('ignored', 'Пропущено')], default='pending', max_length=10, verbose_name='Статус')),
+                ('received_at', models.DateTimeField(auto_now_add=True, verbose_name='Получено')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Обработано')),
+            ],
+            options={
+                'verbose_name': 'Платёжное событие',
+                'verbose_name_plural': 'Платёжные события',
+                'ordering': ['-received_at'],
+                'indexes': [models.Index(condition=models.Q(('status', 'pending')), fields=['id'], name='payment_event_pending_idx')],
+                'constraints': [models.UniqueConstraint(fields=('provider', 'event_id'), name='payment_event_unique')],
+            },
+        ),
+    ]
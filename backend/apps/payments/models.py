@@ -0,0 +1,39 @@
+from django.db import models
+
+
+class PaymentEvent(models.Model):
+    """
+    Сырое событие webhook'а платёжного провайдера. Записывается сразу при
+    получении, статус заказа меняет задача process_payment_events.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Ожидает обработки'),
+        ('processed', 'Обработано'),
+        ('ignored', 'Пропущено'),
+    ]
+
+    provider = models.CharField("Провайдер", max_length=30)
+    event_id = models.CharField("ID события у провайдера", max_length=100)
+    event_type = models.CharField("Тип события", max_length=50)
+    order_id = models.BigIntegerField("Номер заказа", null=True, blank=True)
+    amount = models.DecimalField("Сумма", max_digits=10, decimal_places=2, null=True, blank=True)
+    payload = models.JSONField("Тело запроса")
+    status = models.CharField("Статус", max_length=10, choices=STATUS_CHOICES, default='pending')
+    received_at = models.DateTimeField("Получено", auto_now_add=True)
+    processed_at = models.DateTimeField("Обработано", null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Платёжное событие'
+        verbose_name_plural = 'Платёжные события'
+        ordering = ['-received_at']
+        constraints = [
+            # Повторная доставка того же события не создаёт вторую запись
+            models.UniqueConstraint(fields=['provider', 'event_id'], name='payment_event_unique'),
+        ]
+        indexes = [
+            # Очередь обработки: только необработанные события
+            models.Index(fields=['id'], condition=models.Q(status='pending'), name='payment_event_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.provider}:{self.event_type} ({self.event_id})"
@@ -0,0 +1,90 @@
+"""
+Обработка платёжных событий пачками.
+
+События одного типа из пачки превращаются в один переход
+apply_transition_bulk по всем их заказам. Событие, чей заказ уже не в
+исходном статусе (повтор, опоздавшая отмена), помечается ignored. Так же
+помечается оплата, сумма которой не совпадает с order.total: такой заказ
+остаётся неоплаченным и разбирается вручную.
+"""
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.orders.events import publish_status_changes
+from apps.orders.models import Order
+from apps.orders.transitions import TRANSITIONS, apply_transition_bulk
+
+from .models import PaymentEvent
+from .providers import PAYMENT_CANCELED, PAYMENT_SUCCEEDED
+
+logger = logging.getLogger(__name__)
+
+# Тип события -> переход заказа (is_paid выставляет сам переход). Порядок важен:
+# если в пачке есть и оплата, и отмена одного заказа — побеждает оплата
+EVENT_TRANSITIONS = {
+    PAYMENT_SUCCEEDED: 'confirm_payment',
+    PAYMENT_CANCELED: 'cancel',
+}
+
+
+def process_pending_events(batch_size=None):
+    batch_size = batch_size or settings.PAYMENT_BATCH_SIZE
+    processed = 0
+    while True:
+        count = process_batch(batch_size)
+        processed += count
+        if count < batch_size:
+            return processed
+
+
+def process_batch(batch_size):
+    with transaction.atomic():
+        events = list(
+            PaymentEvent.objects.select_for_update(skip_locked=True)
+            .filter(status='pending')
+            .order_by('id')[:batch_size]
+        )
+        if not events:
+            return 0
+
+        applied_ids = []
+        for event_type, action in EVENT_TRANSITIONS.items():
+            typed = [event for event in events if event.event_type == event_type and event.order_id]
+            if event_type == PAYMENT_SUCCEEDED:
+                typed = _matching_amount(typed)
+            if not typed:
+                continue
+            orders = apply_transition_bulk({event.order_id for event in typed}, action)
+            publish_status_changes(orders, TRANSITIONS[action][1])
+            changed = {order.pk for order in orders}
+            # На один заказ засчитываем только первое событие пачки
+            for event in typed:
+                if event.order_id in changed:
+                    applied_ids.append(event.pk)
+                    changed.discard(event.order_id)
+
+        now = timezone.now()
+        event_ids = [event.pk for event in events]
+        PaymentEvent.objects.filter(pk__in=applied_ids).update(status='processed', processed_at=now)
+        PaymentEvent.objects.filter(pk__in=event_ids).exclude(pk__in=applied_ids).update(
+            status='ignored', processed_at=now,
+        )
+    return len(events)
+
+
+def _matching_amount(events):
+    """Оплаты, сумма которых равна итогу заказа"""
+    totals = dict(Order.objects.filter(pk__in={event.order_id for event in events}).values_list('pk', 'total'))
+    matching = []
+    for event in events:
+        if event.amount is not None and event.amount == totals.get(event.order_id):
+            matching.append(event)
+        elif event.order_id in totals:
+            logger.warning(
+                'Payment event %s: amount %s does not match order #%s total %s',
+                event.event_id, event.amount, event.order_id, totals[event.order_id],
+            )
+    return matching
@@ -0,0 +1,89 @@
+"""
+Платёжные провайдеры.
+
+Провайдер выбирается настройкой PAYMENT_PROVIDER (путь к классу) и умеет
+три вещи: создать ссылку на оплату заказа, проверить подпись webhook'а и
+разобрать тело события в WebhookEvent. Для новой платёжной системы
+достаточно подкласса PaymentProvider.
+
+FakeProvider — локальная замена настоящему сервису для dev и нагрузочных
+тестов (manage.py fake_payment_provider).
+"""
+import hashlib
+import hmac
+import json
+from dataclasses import dataclass
+from decimal import Decimal
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# Типы событий, которые понимает process_payment_events
+PAYMENT_SUCCEEDED = 'payment.succeeded'
+PAYMENT_CANCELED = 'payment.canceled'
+
+
+@dataclass
+class WebhookEvent:
+    event_id: str
+    event_type: str
+    order_id: int | None
+    # Сумма платежа; оплата засчитывается, только если она равна order.total
+    amount: Decimal | None = None
+
+
+class PaymentProvider:
+    name = ''
+
+    def create_payment_url(self, order):
+        raise NotImplementedError
+
+    def verify_webhook(self, request):
+        """Проверить подпись запроса; тело — request.body"""
+        raise NotImplementedError
+
+    def parse_webhook(self, payload):
+        """dict тела webhook'а -> WebhookEvent"""
+        raise NotImplementedError
+
+
+class FakeProvider(PaymentProvider):
+    """
+    Подпись — HMAC-SHA256 тела в заголовке X-Fake-Signature.
+    Тело: {"id": "...", "type": "payment.succeeded", "order_id": 1, "amount": "3500.00"}
+    """
+    name = 'fake'
+    signature_header = 'X-Fake-Signature'
+
+    def create_payment_url(self, order):
+        query = urlencode({'order_id': order.id, 'amount': order.total})
+        return f'{settings.PAYMENT_FAKE_URL}/pay/?{query}'
+
+    def verify_webhook(self, request):
+        signature = request.headers.get(self.signature_header, '')
+        return hmac.compare_digest(signature, self.sign(request.body))
+
+    def parse_webhook(self, payload):
+        return WebhookEvent(
+            event_id=str(payload['id']),
+            event_type=payload['type'],
+            order_id=int(payload['order_id']) if payload.get('order_id') else None,
+            amount=Decimal(str(payload['amount'])) if payload.get('amount') is not None else None,
+        )
+
+    @staticmethod
+    def sign(body):
+        return hmac.new(settings.PAYMENT_WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+
+    @classmethod
+    def build_webhook(cls, event_id, event_type, order_id, amount):
+        """Тело и заголовки webhook'а так, как их отправит провайдер"""
+        body = json.dumps({
+            'id': event_id, 'type': event_type, 'order_id': order_id, 'amount': str(amount),
+        }).encode()
+        return body, {'Content-Type': 'application/json', cls.signature_header: cls.sign(body)}
+
+
+def get_provider():
+    return import_string(settings.PAYMENT_PROVIDER)()
@@ -0,0 +1,38 @@
+import logging
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+SCHEDULED_KEY = 'payments:processing-scheduled'
+
+
+@shared_task
+def process_payment_events():
+    """Применить накопленные события webhook'ов (также раз в минуту по CELERY_BEAT_SCHEDULE)"""
+    from .processing import process_pending_events
+
+    return process_pending_events()
+
+
+def schedule_processing():
+    """
+    Поставить обработку после коммита. Всплеск webhook'ов даёт одну задачу
+    на PAYMENT_BATCH_DELAY секунд — события применяются пачкой.
+    """
+    if settings.CELERY_TASK_ALWAYS_EAGER:
+        # Без воркера откладывать некуда — обрабатываем сразу после коммита
+        transaction.on_commit(process_payment_events.delay)
+    elif cache.add(SCHEDULED_KEY, True, settings.PAYMENT_BATCH_DELAY):
+        transaction.on_commit(_enqueue)
+
+
+def _enqueue():
+    try:
+        process_payment_events.apply_async(countdown=settings.PAYMENT_BATCH_DELAY)
+    except Exception:
+        # Событие уже сохранено — его подберёт периодический запуск
+        logger.exception('Failed to enqueue process_payment_events')
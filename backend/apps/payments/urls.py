@@ -0,0 +1,7 @@
+from django.urls import path
+
+from .views import payment_webhook
+
+urlpatterns = [
+    path('webhook/<str:provider_name>/', payment_webhook, name='payment-webhook'),
+]
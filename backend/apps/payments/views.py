@@ -0,0 +1,47 @@
+import json
+import logging
+from decimal import InvalidOperation
+
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, Http404
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from .models import PaymentEvent
+from .providers import get_provider
+from .tasks import schedule_processing
+
+logger = logging.getLogger(__name__)
+
+
+@csrf_exempt
+@require_POST
+def payment_webhook(request, provider_name):
+    """
+    Приём webhook'а: проверка подписи, запись сырого события и сразу 200.
+    Статусы заказов меняет process_payment_events пачками.
+    """
+    provider = get_provider()
+    if provider.name != provider_name:
+        raise Http404
+    if not provider.verify_webhook(request):
+        logger.warning('Payment webhook with invalid signature from %s', request.META.get('REMOTE_ADDR'))
+        return HttpResponseForbidden()
+    try:
+        payload = json.loads(request.body)
+        event = provider.parse_webhook(payload)
+    except (ValueError, KeyError, TypeError, InvalidOperation):
+        return HttpResponseBadRequest()
+
+    with transaction.atomic():
+        # Повторная доставка того же события игнорируется уникальным ключом
+        PaymentEvent.objects.bulk_create([PaymentEvent(
+            provider=provider.name,
+            event_id=event.event_id,
+            event_type=event.event_type,
+            order_id=event.order_id,
+            amount=event.amount,
+            payload=payload,
+        )], ignore_conflicts=True)
+        schedule_processing()
+    return HttpResponse(status=200)
@@ -1,5 +1,7 @@
+from django.db import transaction
 from django.contrib import admin
 from unfold.admin import ModelAdmin
+from .cache import bump_cache_version
 from .models import Category, Product, ProductImage, ProductAvailability
 
 
@@ -40,8 +42,11 @@ class ProductAdmin(ModelAdmin):
     list_editable = ['price', 'is_active', 'is_popular']
     autocomplete_fields = ['category']
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('images')
+
     def image_preview(self, obj):
-        img = obj.images.filter(is_primary=True).first() or obj.images.first()
+        img = obj.get_primary_image()
         if img and img.image:
             return f'<img src="{img.image.url}" width="50" style="border-radius: 5px;" />'
         return "-"
@@ -51,11 +56,16 @@ class ProductAdmin(ModelAdmin):
     @admin.action(description='Пометить как популярные')
     def make_popular(self, request, queryset):
         queryset.update(is_popular=True)
+        # update() не вызывает сигналы — версию кэша каталога сбрасываем сами
+        transaction.on_commit(lambda: bump_cache_version('catalog'))
 
     @admin.action(description='Пометить как новинки')
     def make_new(self, request, queryset):
         queryset.update(is_new=True)
+        transaction.on_commit(lambda: bump_cache_version('catalog'))
 
     @admin.action(description='Деактивировать')
     def deactivate(self, request, queryset):
         queryset.update(is_active=False)
+        transaction.on_commit(lambda: bump_cache_version('categories'))
+        transaction.on_commit(lambda: bump_cache_version('catalog'))
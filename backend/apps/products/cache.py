@@ -0,0 +1,116 @@
+"""
+Версионированный кэш каталога.
+
+Ключи кэша включают номер версии пространства имён (например, «categories»).
+Сигналы при изменении каталога увеличивают версию — старые ключи просто
+перестают читаться и истекают сами, удалять их по одному не нужно.
+
+Пространство «catalog» — общая версия всего публичного каталога (товары,
+фото, наличие, категории, истории). По ней CatalogCacheMixin кэширует
+готовые ответы API и отдаёт строгий ETag / 304 Not Modified.
+"""
+import functools
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def _version_key(namespace):
+    return f'catalog:{namespace}:version'
+
+
+def get_cache_version(namespace):
+    # Если ключ версии вытеснен из кэша, стартуем с метки времени,
+    # а не с 1 — иначе можно снова попасть на старые записи.
+    return cache.get_or_set(_version_key(namespace), int(time.time() * 1000), None)
+
+
+def bump_cache_version(namespace):
+    key = _version_key(namespace)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = int(time.time() * 1000)
+        cache.set(key, version, None)
+        return version
+
+
+def make_cache_key(namespace, *parts):
+    version = get_cache_version(namespace)
+    suffix = ':'.join(str(part) for part in parts)
+    return f'catalog:{namespace}:v{version}:{suffix}'
+
+
+def get_or_build(namespace, parts, builder):
+    """Вернуть значение из кэша или построить его через builder()"""
+    if not settings.CATALOG_CACHE_ENABLED:
+        return builder()
+    key = make_cache_key(namespace, *parts)
+    value = cache.get(key)
+    if value is None:
+        value = builder()
+        cache.set(key, value, settings.CATALOG_CACHE_TIMEOUT)
+    return value
+
+
+def make_etag(data):
+    body = json.dumps(data, cls=JSONEncoder, sort_keys=True, ensure_ascii=False)
+    return '"%s"' % hashlib.sha1(body.encode()).hexdigest()
+
+
+def cache_catalog_response(view_method):
+    """Декоратор для action'ов ViewSet'а с CatalogCacheMixin"""
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        handler = functools.partial(view_method, self)
+        return self.cached_response(request, handler, *args, **kwargs)
+    return wrapper
+
+
+class CatalogCacheMixin:
+    """
+    Кэширует ответы публичных ViewSet'ов каталога.
+
+    Ключ — версия каталога + action + kwargs + query string, значение —
+    сериализованные данные и их ETag. Ответ не зависит от пользователя,
+    поэтому кэш общий для всех клиентов.
+    """
+    @cache_catalog_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_catalog_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    def cached_response(self, request, handler, *args, **kwargs):
+        if not settings.CATALOG_CACHE_ENABLED or request.method != 'GET':
+            return handler(request, *args, **kwargs)
+
+        key = make_cache_key(
+            'catalog',
+            self.basename,
+            self.action,
+            json.dumps(kwargs, sort_keys=True),
+            request.build_absolute_uri('/'),
+            hashlib.sha1(request.GET.urlencode().encode()).hexdigest(),
+        )
+        cached = cache.get(key)
+        if cached is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            cached = (make_etag(response.data), response.data)
+            cache.set(key, cached, settings.CATALOG_CACHE_TIMEOUT)
+
+        etag, data = cached
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        return Response(data, headers={'ETag': etag})
@@ -0,0 +1,53 @@
+"""
+Счётчики фасетов каталога для текущего набора фильтров.
+
+Все фасеты (категории, флаги, ценовые диапазоны) считаются одним
+GROUP BY по (категория, is_new, is_popular, ценовой диапазон) и
+сворачиваются в Python — строк в группировке единицы-десятки.
+"""
+from django.db.models import Case, Count, IntegerField, Value, When
+
+# Границы ценовых диапазонов, ₽: [0, 2000), [2000, 4000), [4000, 7000), [7000, ∞)
+PRICE_BUCKETS = (2000, 4000, 7000)
+
+
+def price_bucket_expression():
+    whens = [When(price__lt=bound, then=Value(i)) for i, bound in enumerate(PRICE_BUCKETS)]
+    return Case(*whens, default=Value(len(PRICE_BUCKETS)), output_field=IntegerField())
+
+
+def compute_facets(queryset):
+    rows = (
+        queryset.order_by()
+        .values('category__slug', 'category__name', 'is_new', 'is_popular', price_bucket=price_bucket_expression())
+        .annotate(count=Count('id'))
+    )
+
+    total = 0
+    categories = {}
+    flags = {'is_new': 0, 'is_popular': 0}
+    buckets = [0] * (len(PRICE_BUCKETS) + 1)
+    for row in rows:
+        count = row['count']
+        total += count
+        category = categories.setdefault(
+            row['category__slug'],
+            {'slug': row['category__slug'], 'name': row['category__name'], 'count': 0},
+        )
+        category['count'] += count
+        if row['is_new']:
+            flags['is_new'] += count
+        if row['is_popular']:
+            flags['is_popular'] += count
+        buckets[row['price_bucket']] += count
+
+    bounds = (0,) + PRICE_BUCKETS + (None,)
+    return {
+        'total': total,
+        'categories': sorted(categories.values(), key=lambda c: -c['count']),
+        'flags': flags,
+        'price': [
+            {'min': bounds[i], 'max': bounds[i + 1], 'count': count}
+            for i, count in enumerate(buckets)
+        ],
+    }
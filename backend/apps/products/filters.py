@@ -1,11 +1,16 @@
 import django_filters
-from .models import Product
+from django.db.models import Exists, OuterRef
+from .models import Product, ProductAvailability
+from .search import search_products
 
 
 class ProductFilter(django_filters.FilterSet):
+    q = django_filters.CharFilter(method='filter_search')
     min_price = django_filters.NumberFilter(field_name='price', lookup_expr='gte')
     max_price = django_filters.NumberFilter(field_name='price', lookup_expr='lte')
     category = django_filters.CharFilter(field_name='category__slug')
+    store = django_filters.NumberFilter(method='filter_store')
+    in_stock = django_filters.BooleanFilter(method='filter_in_stock')
     ordering = django_filters.OrderingFilter(
         fields=(
             ('price', 'price'),
@@ -17,3 +22,27 @@ class ProductFilter(django_filters.FilterSet):
     class Meta:
         model = Product
         fields = ['category', 'is_popular', 'is_new', 'is_active']
+
+    def filter_search(self, queryset, name, value):
+        """Поиск по названию и описанию; без ordering сортирует по релевантности"""
+        value = value.strip()
+        if not value:
+            return queryset
+        return search_products(queryset, value)
+
+    def filter_store(self, queryset, name, value):
+        """Сам по себе не сужает выборку — добавляет флаг наличия на точке"""
+        return self.annotate_in_stock(queryset)
+
+    def filter_in_stock(self, queryset, name, value):
+        return self.annotate_in_stock(queryset).filter(store_in_stock=value)
+
+    def annotate_in_stock(self, queryset):
+        """store_in_stock: есть ли товар на выбранной точке (или на любой, если точка не задана)"""
+        if 'store_in_stock' in queryset.query.annotations:
+            return queryset
+        stock = ProductAvailability.objects.filter(product=OuterRef('pk'), quantity__gt=0)
+        store = self.form.cleaned_data.get('store')
+        if store is not None:
+            stock = stock.filter(store_id=store)
+        return queryset.annotate(store_in_stock=Exists(stock))
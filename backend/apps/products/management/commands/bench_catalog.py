@@ -0,0 +1,99 @@
+"""
+Нагрузочный замер публичного каталога: запросы в секунду с кэшем и без.
+
+    python manage.py bench_catalog --seconds 3 --products 500
+
+Тестовые товары создаются внутри транзакции и откатываются в конце.
+Кэш общий (Redis в проде), поэтому он не очищается: перед замером и после
+отката сдвигаются только версии каталога (bump_cache_version).
+"""
+import itertools
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+
+from apps.products.cache import bump_cache_version
+from apps.products.models import Category, Product, ProductImage
+from apps.stories.models import Story, StorySlide
+
+ENDPOINTS = [
+    '/api/categories/',
+    '/api/products/',
+    '/api/products/?ordering=-price&page=2',
+    '/api/products/popular/',
+    '/api/stories/',
+]
+CACHE_NAMESPACES = ('catalog', 'categories')
+
+
+class Command(BaseCommand):
+    help = 'Сравнение RPS каталога с кэшем ответов и без него'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=2.0, help='Длительность замера на endpoint')
+        parser.add_argument('--products', type=int, default=300, help='Сколько тестовых товаров создать')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options['products'])
+            self.run(options['seconds'])
+            transaction.set_rollback(True)
+        # Ответы с откаченными тестовыми товарами не должны остаться в кэше
+        self.invalidate_catalog()
+
+    def invalidate_catalog(self):
+        for namespace in CACHE_NAMESPACES:
+            bump_cache_version(namespace)
+
+    def seed(self, count):
+        categories = [
+            Category.objects.create(name=f'Bench {i}', slug=f'bench-{i}', icon='flower', image='categories/bench.png')
+            for i in range(5)
+        ]
+        products = Product.objects.bulk_create(
+            Product(
+                category=categories[i % len(categories)],
+                name=f'Bench product {i}',
+                slug=f'bench-product-{i}',
+                price=Decimal(1000 + i),
+                is_popular=i % 7 == 0,
+                is_new=i % 5 == 0,
+            )
+            for i in range(count)
+        )
+        ProductImage.objects.bulk_create(
+            ProductImage(product=product, image=f'products/bench-{product.pk}.jpg', is_primary=True)
+            for product in products
+        )
+        for i in range(10):
+            story = Story.objects.create(title=f'Bench story {i}', cover_image='stories/covers/bench.jpg')
+            StorySlide.objects.bulk_create(
+                StorySlide(story=story, image='stories/slides/bench.jpg', sort_order=j) for j in range(5)
+            )
+
+    def run(self, seconds):
+        self.stdout.write(f"{'endpoint':45} {'no cache':>10} {'cache':>10} {'cache+304':>10}")
+        for url in ENDPOINTS:
+            self.invalidate_catalog()
+            with override_settings(CATALOG_CACHE_ENABLED=False):
+                cold = self.measure(url, seconds)
+            warm = self.measure(url, seconds)
+            etag = Client().get(url, REMOTE_ADDR='10.255.255.255').headers.get('ETag', '')
+            not_modified = self.measure(url, seconds, HTTP_IF_NONE_MATCH=etag)
+            self.stdout.write(f'{url:45} {cold:10.0f} {warm:10.0f} {not_modified:10.0f}')
+
+    def measure(self, url, seconds, **headers):
+        """RPS за заданное время; у каждого запроса свой IP, чтобы не упираться в throttling"""
+        client = Client()
+        addresses = (f'10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}' for i in itertools.count())
+        requests = 0
+        started = time.perf_counter()
+        deadline = started + seconds
+        while time.perf_counter() < deadline:
+            response = client.get(url, REMOTE_ADDR=next(addresses), **headers)
+            assert response.status_code in (200, 304), (url, response.status_code)
+            requests += 1
+        return requests / (time.perf_counter() - started)
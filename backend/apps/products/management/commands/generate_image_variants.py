@@ -0,0 +1,63 @@
+"""
+Построить производные изображений для уже загруженных файлов.
+
+    python manage.py generate_image_variants --workers 4
+    python manage.py generate_image_variants --model products.ProductImage --force
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.images import IMAGE_FIELDS, generate_variants, variants_field_name
+
+
+def _generate(job):
+    label, pk, field_name, force = job
+    try:
+        return label, pk, generate_variants(label, pk, field_name, force=force), None
+    except Exception as exc:  # ошибку одного файла показываем, остальные продолжаем
+        return label, pk, False, exc
+
+
+class Command(BaseCommand):
+    help = 'Сгенерировать WebP/JPEG варианты для всех картинок каталога'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Размер пула процессов')
+        parser.add_argument('--model', help='Только одна модель, например products.ProductImage')
+        parser.add_argument('--force', action='store_true', help='Перегенерировать даже готовые')
+
+    def handle(self, *args, **options):
+        jobs = list(self.collect_jobs(options['model'], options['force']))
+        self.stdout.write(f'Картинок к обработке: {len(jobs)}')
+        if not jobs:
+            return
+
+        # Дочерние процессы не должны делить соединение с БД родителя
+        connections.close_all()
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            futures = [pool.submit(_generate, job) for job in jobs]
+            for future in as_completed(futures):
+                label, pk, generated, error = future.result()
+                if error:
+                    failed += 1
+                    self.stderr.write(f'{label} #{pk}: {error}')
+                elif generated:
+                    done += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Готово: {done}, ошибок: {failed}'))
+
+    def collect_jobs(self, only_model, force):
+        for label, field_name in IMAGE_FIELDS:
+            if only_model and label.lower() != only_model.lower():
+                continue
+            model = apps.get_model(label)
+            rows = model.objects.exclude(**{field_name: ''}).values_list(
+                'pk', field_name, variants_field_name(field_name),
+            )
+            for pk, name, variants in rows.iterator(chunk_size=500):
+                if force or (variants or {}).get('source') != name:
+                    yield label, pk, field_name, force
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from apps.products.models import Product
+from apps.products.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Пересобрать поисковый индекс товаров'
+
+    def handle(self, *args, **options):
+        rebuild_search_index(Product)
+        self.stdout.write(self.style.SUCCESS(f'Проиндексировано товаров: {Product.objects.count()}'))
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:06
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+# Копия на момент миграции — не импортируем apps.products.search, чтобы
+# его правки не меняли уже применённую миграцию
+FTS_TABLE = 'products_product_fts'
+
+
+def create_search_index(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX products_product_search_gin ON products_product USING gin (search_vector)'
+        )
+        schema_editor.execute(
+            'CREATE INDEX products_product_name_trgm ON products_product USING gin (name gin_trgm_ops)'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5('
+            f'name, description, tokenize="unicode61 remove_diacritics 2")'
+        )
+
+    # Заполнение индекса для уже существующих товаров
+    if vendor == 'postgresql':
+        Product.objects.using(schema_editor.connection.alias).update(
+            search_vector=SearchVector('name', weight='A', config='russian')
+            + SearchVector('description', weight='B', config='russian'),
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+            f'SELECT id, name, description FROM {Product._meta.db_table}'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS products_product_search_gin')
+        schema_editor.execute('DROP INDEX IF EXISTS products_product_name_trgm')
+    elif vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_alter_category_options_alter_product_options_and_more'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
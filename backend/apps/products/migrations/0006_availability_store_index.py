@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_image_variants'),
+        ('stores', '0002_alter_store_options_alter_store_is_active_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productavailability',
+            index=models.Index(fields=['store', 'product', 'quantity'], name='availability_store_product_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:02
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_product_popularity'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='popularitystate',
+            name='last_order_id',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_remove_popularitystate_last_order_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='popularitystate',
+            name='counted_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
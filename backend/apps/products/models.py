@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 class Category(models.Model):
@@ -6,6 +7,7 @@ class Category(models.Model):
     slug = models.SlugField(unique=True)
     icon = models.CharField(max_length=50)  # Lucide icon name
     image = models.ImageField(upload_to='categories/')
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     order = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
 
@@ -30,17 +32,38 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     # Наличие по точкам
     store_availability = models.ManyToManyField('stores.Store', through='ProductAvailability', verbose_name="Наличие в магазинах")
+    # Поисковый индекс (PostgreSQL), обновляется в apps.products.search
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         verbose_name = 'Товар'
         verbose_name_plural = 'Товары'
+        indexes = [
+            # Keyset-пагинация каталога: (поле сортировки, id) среди активных
+            models.Index(fields=['is_active', 'created_at', 'id'], name='product_active_created_idx'),
+            models.Index(fields=['is_active', 'price', 'id'], name='product_active_price_idx'),
+            models.Index(fields=['is_active', 'name', 'id'], name='product_active_name_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    def get_primary_image(self):
+        """Главное фото товара (или первое загруженное).
+
+        Работает через images.all(), поэтому при prefetch_related('images')
+        не делает дополнительных запросов.
+        """
+        images = list(self.images.all())
+        for image in images:
+            if image.is_primary:
+                return image
+        return min(images, key=lambda image: image.pk, default=None)
+
 class ProductImage(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='products/')
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     is_primary = models.BooleanField(default=False)
     order = models.PositiveIntegerField(default=0)
 
@@ -57,3 +80,48 @@ class ProductAvailability(models.Model):
     class Meta:
         verbose_name = 'Наличие'
         verbose_name_plural = 'Наличие'
+        indexes = [
+            # Фильтр каталога ?store=&in_stock= (EXISTS по точке и товару)
+            models.Index(fields=['store', 'product', 'quantity'], name='availability_store_product_idx'),
+        ]
+
+
+class ProductPopularity(models.Model):
+    """Рейтинг популярности по продажам (store=None — по всем точкам).
+
+    Счёт — сумма проданных штук с экспоненциальным затуханием, см. apps/products/popularity.py
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='popularity')
+    store = models.ForeignKey('stores.Store', on_delete=models.CASCADE, null=True, blank=True)
+    score = models.FloatField(default=0)
+
+    class Meta:
+        verbose_name = 'Популярность товара'
+        verbose_name_plural = 'Популярность товаров'
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'store'], name='popularity_product_store_uniq'),
+            models.UniqueConstraint(
+                fields=['product'], condition=models.Q(store__isnull=True), name='popularity_product_total_uniq',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['store', '-score'], name='popularity_store_score_idx'),
+        ]
+
+
+class PopularityState(models.Model):
+    """
+    Момент, на который посчитаны счета ProductPopularity, и отметка учтённых
+    заказов (created_at < counted_until) — singleton
+    """
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+    counted_until = models.DateTimeField(null=True, blank=True)
+
+    def save(self, *args, **kwargs):
+        self.pk = 1
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def load(cls):
+        obj, _ = cls.objects.get_or_create(pk=1)
+        return obj
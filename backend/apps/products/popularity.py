@@ -0,0 +1,132 @@
+"""
+Рейтинг популярности товаров по продажам.
+
+score = Σ quantity · exp(−возраст заказа / τ), τ задаётся периодом
+полураспада POPULARITY_HALF_LIFE_DAYS. Счета хранятся на момент
+PopularityState.refreshed_at. Пересчёт инкрементальный:
+
+- все счета умножаются на exp(−Δt / τ) одним UPDATE;
+- добавляются позиции заказов, созданных с отметки counted_until до
+  now − POPULARITY_COMMIT_LAG_SECONDS. Отметка — по created_at с запасом на
+  долгие транзакции: заказ с меньшим id, закоммиченный позже соседнего,
+  всё равно попадёт в свой запуск. Всю историю заново не сканируем;
+- отмена уже учтённого заказа вычитает его вклад сразу при переходе
+  (track_cancellations из transitions.record_events).
+
+Кэш каталога сбрасывается, только если счета изменились не одним общим
+множителем: добавились продажи, вычлась отмена или товар выпал из рейтинга.
+"""
+import datetime
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .cache import bump_cache_version
+from .models import PopularityState, ProductPopularity
+
+# Счёт ниже порога (≈ одна продажа 93 дня назад: 14 · log2(100)) удаляется из рейтинга
+MIN_SCORE = 0.01
+
+
+def decay_constant():
+    return settings.POPULARITY_HALF_LIFE_DAYS * 86400 / math.log(2)
+
+
+def refresh_popularity(chunk_size=2000):
+    """Затухание и новые заказы; возвращает число изменённых счетов (0 — кэш не сбрасывался)"""
+    from apps.orders.models import OrderItem
+
+    now = timezone.now()
+    counted_until = now - datetime.timedelta(seconds=settings.POPULARITY_COMMIT_LAG_SECONDS)
+    tau = decay_constant()
+    with transaction.atomic():
+        PopularityState.load()
+        state = PopularityState.objects.select_for_update().get(pk=1)
+
+        deleted = 0
+        if state.refreshed_at:
+            factor = math.exp(-(now - state.refreshed_at).total_seconds() / tau)
+            ProductPopularity.objects.update(score=F('score') * factor)
+            deleted, _ = ProductPopularity.objects.filter(score__lt=MIN_SCORE).delete()
+
+        items = OrderItem.objects.filter(order__created_at__lt=counted_until)
+        if state.counted_until:
+            items = items.filter(order__created_at__gte=state.counted_until)
+        items = items.exclude(order__status='cancelled').values_list(
+            'product_id', 'order__store_id', 'quantity', 'order__created_at',
+        )
+        increments = defaultdict(float)
+        for product_id, store_id, quantity, created_at in items.iterator(chunk_size=chunk_size):
+            _add(increments, product_id, store_id, quantity * math.exp(-(now - created_at).total_seconds() / tau))
+        _apply_increments(increments)
+
+        state.counted_until = counted_until
+        state.refreshed_at = now
+        state.save()
+        if increments or deleted:
+            transaction.on_commit(lambda: bump_cache_version('catalog'))
+    return len(increments) + deleted
+
+
+def track_cancellations(changes):
+    """
+    changes: [(order, старый статус, новый статус)]. Вычесть вклад уже
+    учтённых заказов, которые отменили (или вернуть — если отмену сняли).
+    Вызывать в транзакции смены статуса.
+    """
+    from apps.orders.models import OrderItem
+
+    signs = {}
+    for order, from_status, to_status in changes:
+        if to_status == 'cancelled' and from_status not in ('', 'cancelled'):
+            signs[order.pk] = -1
+        elif from_status == 'cancelled' and to_status != 'cancelled':
+            signs[order.pk] = 1
+    if not signs:
+        return
+    # Блокировка отметки: параллельный refresh_popularity не сдвинет её,
+    # пока вычитаем по счетам на момент refreshed_at
+    state = PopularityState.objects.select_for_update().filter(pk=1).first()
+    if state is None or state.counted_until is None:
+        return
+    items = OrderItem.objects.filter(order_id__in=signs, order__created_at__lt=state.counted_until).values_list(
+        'order_id', 'product_id', 'order__store_id', 'quantity', 'order__created_at',
+    )
+    tau = decay_constant()
+    deltas = defaultdict(float)
+    for order_id, product_id, store_id, quantity, created_at in items:
+        weight = quantity * math.exp(-(state.refreshed_at - created_at).total_seconds() / tau)
+        _add(deltas, product_id, store_id, signs[order_id] * weight)
+    if deltas:
+        _apply_increments(deltas)
+        transaction.on_commit(lambda: bump_cache_version('catalog'))
+
+
+def _add(increments, product_id, store_id, weight):
+    increments[(product_id, None)] += weight
+    if store_id:
+        increments[(product_id, store_id)] += weight
+
+
+def _apply_increments(increments):
+    if not increments:
+        return
+    product_ids = {product_id for product_id, _ in increments}
+    existing = {
+        (row.product_id, row.store_id): row
+        for row in ProductPopularity.objects.filter(product_id__in=product_ids)
+    }
+    to_update, to_create = [], []
+    for (product_id, store_id), weight in increments.items():
+        row = existing.get((product_id, store_id))
+        if row:
+            row.score = max(row.score + weight, 0)
+            to_update.append(row)
+        elif weight > 0:
+            to_create.append(ProductPopularity(product_id=product_id, store_id=store_id, score=weight))
+    ProductPopularity.objects.bulk_update(to_update, ['score'], batch_size=500)
+    ProductPopularity.objects.bulk_create(to_create, batch_size=500)
@@ -0,0 +1,104 @@
+"""
+Полнотекстовый поиск по товарам.
+
+PostgreSQL: колонка Product.search_vector (tsvector, морфология russian)
+с GIN-индексом + триграммный GIN-индекс по названию для опечаток.
+SQLite (dev): виртуальная таблица FTS5 products_product_fts, rowid = id товара.
+
+Индекс поддерживается сигналами при сохранении/удалении товара;
+полная пересборка — manage.py rebuild_search_index.
+"""
+import re
+
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity,
+)
+from django.db import connection
+from django.db.models import F, Q
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = 'russian'
+FTS_TABLE = 'products_product_fts'
+
+# Грубый стемминг для FTS5: отрезаем типичные окончания и ищем по префиксу
+_RU_ENDINGS = (
+    'ами', 'ями', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими',
+    'ой', 'ей', 'ом', 'ем', 'ах', 'ях', 'ов', 'ев', 'ая', 'яя', 'ые', 'ие', 'ый', 'ий',
+    'ы', 'и', 'а', 'я', 'о', 'е', 'у', 'ю',
+)
+
+
+def product_search_vector():
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def search_products(queryset, query):
+    """Отфильтровать queryset по строке поиска и добавить search_rank"""
+    if connection.vendor == 'postgresql':
+        search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+        return queryset.annotate(
+            search_rank=SearchRank(F('search_vector'), search_query)
+            + TrigramWordSimilarity(query, 'name'),
+        ).filter(
+            Q(search_vector=search_query) | Q(name__trigram_word_similar=query),
+        ).order_by('-search_rank', 'id')
+
+    match = _fts_match(query)
+    if not match:
+        return queryset.none()
+    table = queryset.model._meta.db_table
+    return queryset.annotate(
+        search_rank=RawSQL(
+            f'SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = {table}.id',
+            [match],
+        ),
+    ).filter(
+        id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]),
+    ).order_by('-search_rank', 'id')
+
+
+def _fts_match(query):
+    terms = []
+    for word in re.findall(r'\w+', query.lower()):
+        for ending in _RU_ENDINGS:
+            if word.endswith(ending) and len(word) - len(ending) >= 3:
+                word = word[:-len(ending)]
+                break
+        terms.append(f'"{word}"*')
+    return ' '.join(terms)
+
+
+def update_search_index(product):
+    if connection.vendor == 'postgresql':
+        type(product).objects.filter(pk=product.pk).update(search_vector=product_search_vector())
+    elif connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [product.pk])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, description) VALUES (%s, %s, %s)',
+                [product.pk, product.name, product.description],
+            )
+
+
+def remove_from_search_index(product_id):
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [product_id])
+
+
+def rebuild_search_index(product_model, schema_editor=None):
+    """Пересобрать индекс целиком (используется миграцией и командой)"""
+    conn = schema_editor.connection if schema_editor else connection
+    if conn.vendor == 'postgresql':
+        product_model.objects.update(search_vector=product_search_vector())
+    elif conn.vendor == 'sqlite':
+        with conn.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+                f'SELECT id, name, description FROM {product_model._meta.db_table}'
+            )
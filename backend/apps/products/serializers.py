@@ -1,11 +1,14 @@
 from rest_framework import serializers
+from apps.images import ImageVariantsField
 from .models import Category, Product, ProductImage, ProductAvailability
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = ProductImage
-        fields = ['id', 'image', 'is_primary', 'order']
+        fields = ['id', 'image', 'image_variants', 'is_primary', 'order']
 
 
 class ProductAvailabilitySerializer(serializers.ModelSerializer):
@@ -17,33 +20,44 @@ class ProductAvailabilitySerializer(serializers.ModelSerializer):
 
 
 class CategorySerializer(serializers.ModelSerializer):
-    products_count = serializers.IntegerField(source='products.count', read_only=True)
+    products_count = serializers.SerializerMethodField()
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Category
-        fields = ['id', 'name', 'slug', 'icon', 'image', 'order', 'products_count']
+        fields = ['id', 'name', 'slug', 'icon', 'image', 'image_variants', 'order', 'products_count']
+
+    def get_products_count(self, obj):
+        # CategoryViewSet считает активные товары одной аннотацией;
+        # вложенная категория в карточке товара считается отдельно.
+        count = getattr(obj, 'active_products_count', None)
+        if count is None:
+            count = obj.products.filter(is_active=True).count()
+        return count
 
 
 class ProductListSerializer(serializers.ModelSerializer):
     """Lightweight serializer for product lists"""
     category_name = serializers.CharField(source='category.name', read_only=True)
     primary_image = serializers.SerializerMethodField()
+    in_stock = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
         fields = [
             'id', 'name', 'slug', 'price', 'discount_price',
             'is_popular', 'is_new', 'category', 'category_name',
-            'primary_image',
+            'primary_image', 'in_stock',
         ]
 
     def get_primary_image(self, obj):
-        img = obj.images.filter(is_primary=True).first()
-        if img:
-            return ProductImageSerializer(img).data
-        img = obj.images.first()
+        img = obj.get_primary_image()
         return ProductImageSerializer(img).data if img else None
 
+    def get_in_stock(self, obj):
+        # Аннотация ProductFilter (?store= / ?in_stock=); без них — null
+        return getattr(obj, 'store_in_stock', None)
+
 
 class ProductDetailSerializer(serializers.ModelSerializer):
     """Full serializer for product detail page"""
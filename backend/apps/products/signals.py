@@ -0,0 +1,45 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.images import schedule_variants
+from .cache import bump_cache_version
+from .models import Category, Product, ProductImage, ProductAvailability
+from .search import remove_from_search_index, update_search_index
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_category_tree(sender, **kwargs):
+    """
+    Счётчики товаров в категориях зависят и от категорий, и от товаров.
+    Версия меняется после коммита, иначе читатель успеет закэшировать
+    старое дерево под новой версией.
+    """
+    transaction.on_commit(lambda: bump_cache_version('categories'))
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=ProductImage)
+@receiver([post_save, post_delete], sender=ProductAvailability)
+def invalidate_catalog(sender, **kwargs):
+    transaction.on_commit(lambda: bump_cache_version('catalog'))
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, raw=False, **kwargs):
+    if not raw:
+        update_search_index(instance)
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    remove_from_search_index(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=ProductImage)
+def build_image_variants(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_variants(instance, 'image')
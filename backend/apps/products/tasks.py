@@ -0,0 +1,17 @@
+from celery import shared_task
+
+from apps.images import generate_variants
+
+
+@shared_task(autoretry_for=(OSError,), retry_backoff=True, max_retries=3)
+def generate_image_variants(label, pk, field_name):
+    """Уменьшенные копии картинки в WebP/JPEG (см. apps/images.py)"""
+    return generate_variants(label, pk, field_name)
+
+
+@shared_task
+def refresh_popularity():
+    """Периодический инкрементальный пересчёт рейтинга (CELERY_BEAT_SCHEDULE)"""
+    from .popularity import refresh_popularity as refresh
+
+    return refresh()
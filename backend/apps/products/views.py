@@ -1,39 +1,100 @@
-from rest_framework import viewsets, permissions
+from rest_framework import viewsets, permissions, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db.models import Count, Prefetch, Q
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Category, Product
+from apps.pagination import OptionalCursorPagination
+from .cache import CatalogCacheMixin, cache_catalog_response, get_or_build
+from .facets import compute_facets
+from .models import Category, Product, ProductAvailability
 from .serializers import CategorySerializer, ProductListSerializer, ProductDetailSerializer
 from .filters import ProductFilter
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Category.objects.filter(is_active=True).order_by('order')
+class CategoryViewSet(CatalogCacheMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Category.objects.filter(is_active=True).annotate(
+        active_products_count=Count('products', filter=Q(products__is_active=True)),
+    ).order_by('order')
     serializer_class = CategorySerializer
     permission_classes = [permissions.AllowAny]
     lookup_field = 'slug'
 
+    @cache_catalog_response
+    def list(self, request, *args, **kwargs):
+        """Дерево категорий целиком лежит в кэше и сбрасывается сигналами"""
+        categories = get_or_build(
+            'categories',
+            ['tree', request.build_absolute_uri('/')],
+            lambda: self.get_serializer(self.filter_queryset(self.get_queryset()), many=True).data,
+        )
+        page = self.paginate_queryset(categories)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(categories)
 
-class ProductViewSet(viewsets.ReadOnlyModelViewSet):
+
+class ProductViewSet(CatalogCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Product.objects.filter(is_active=True).select_related('category').prefetch_related('images')
     permission_classes = [permissions.AllowAny]
     filter_backends = [DjangoFilterBackend]
     filterset_class = ProductFilter
+    pagination_class = OptionalCursorPagination
     lookup_field = 'slug'
+    popular_limit = 10
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related(Prefetch(
+                'productavailability_set',
+                queryset=ProductAvailability.objects.select_related('store'),
+            ))
+        return queryset
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return ProductDetailSerializer
         return ProductListSerializer
 
+    def get_cursor_ordering(self, request):
+        """Курсор по первому полю из ?ordering= (price/date/name), id — для равных значений"""
+        param_map = ProductFilter.base_filters['ordering'].param_map
+        param = request.query_params.get('ordering', '').split(',')[0].strip()
+        field = param_map.get(param.lstrip('-'))
+        if field is None:
+            return ('-created_at', '-id')
+        if param.startswith('-'):
+            return (f'-{field}', '-id')
+        return (field, 'id')
+
     @action(detail=False, methods=['get'])
+    @cache_catalog_response
     def popular(self, request):
-        products = self.queryset.filter(is_popular=True)[:10]
+        """Топ по рейтингу продаж (?store= — по точке), добивается ручным is_popular"""
+        store = request.query_params.get('store')
+        if store:
+            store = serializers.IntegerField().run_validation(store)
+            ranked = self.queryset.filter(popularity__store_id=store)
+        else:
+            # score__isnull=False в том же filter(): иначе LEFT JOIN без рейтинга тоже даёт store IS NULL
+            ranked = self.queryset.filter(popularity__store__isnull=True, popularity__score__isnull=False)
+        products = list(ranked.order_by('-popularity__score')[:self.popular_limit])
+        if len(products) < self.popular_limit:
+            products += self.queryset.filter(is_popular=True).exclude(
+                pk__in=[product.pk for product in products],
+            )[:self.popular_limit - len(products)]
         serializer = ProductListSerializer(products, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    @cache_catalog_response
     def new(self, request):
         products = self.queryset.filter(is_new=True).order_by('-created_at')[:10]
         serializer = ProductListSerializer(products, many=True)
         return Response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    @cache_catalog_response
+    def facets(self, request):
+        """Счётчики по категориям, флагам и ценам для текущих фильтров"""
+        return Response(compute_facets(self.filter_queryset(self.get_queryset())))
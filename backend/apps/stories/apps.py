@@ -5,3 +5,6 @@ class StoriesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.stories'
     verbose_name = 'Истории'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -5,6 +5,7 @@ class Story(models.Model):
     """Группа историй (один кружок)"""
     title = models.CharField("Заголовок", max_length=100)
     cover_image = models.ImageField("Обложка", upload_to='stories/covers/')
+    cover_image_variants = models.JSONField(default=dict, blank=True, editable=False)
     is_active = models.BooleanField("Активна", default=True)
     sort_order = models.PositiveIntegerField("Порядок", default=0)
     created_at = models.DateTimeField("Создана", auto_now_add=True)
@@ -22,6 +23,7 @@ class StorySlide(models.Model):
     """Отдельный слайд внутри истории"""
     story = models.ForeignKey(Story, on_delete=models.CASCADE, related_name='slides', verbose_name="История")
     image = models.ImageField("Изображение", upload_to='stories/slides/')
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     sort_order = models.PositiveIntegerField("Порядок", default=0)
 
     class Meta:
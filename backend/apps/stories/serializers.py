@@ -1,16 +1,20 @@
 from rest_framework import serializers
+from apps.images import ImageVariantsField
 from .models import Story, StorySlide
 
 
 class StorySlideSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = StorySlide
-        fields = ('id', 'image', 'sort_order')
+        fields = ('id', 'image', 'image_variants', 'sort_order')
 
 
 class StorySerializer(serializers.ModelSerializer):
     slides = StorySlideSerializer(many=True, read_only=True)
+    cover_image_variants = ImageVariantsField()
 
     class Meta:
         model = Story
-        fields = ('id', 'title', 'cover_image', 'slides')
+        fields = ('id', 'title', 'cover_image', 'cover_image_variants', 'slides')
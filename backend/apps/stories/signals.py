@@ -0,0 +1,25 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.images import schedule_variants
+from apps.products.cache import bump_cache_version
+from .models import Story, StorySlide
+
+
+@receiver([post_save, post_delete], sender=Story)
+@receiver([post_save, post_delete], sender=StorySlide)
+def invalidate_catalog(sender, **kwargs):
+    transaction.on_commit(lambda: bump_cache_version('catalog'))
+
+
+@receiver(post_save, sender=Story)
+def build_cover_variants(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_variants(instance, 'cover_image')
+
+
+@receiver(post_save, sender=StorySlide)
+def build_slide_variants(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_variants(instance, 'image')
@@ -1,10 +1,11 @@
 from rest_framework import viewsets
 from rest_framework.permissions import AllowAny
+from apps.products.cache import CatalogCacheMixin
 from .models import Story
 from .serializers import StorySerializer
 
 
-class StoryViewSet(viewsets.ReadOnlyModelViewSet):
+class StoryViewSet(CatalogCacheMixin, viewsets.ReadOnlyModelViewSet):
     """Публичный API для получения активных историй"""
     queryset = Story.objects.filter(is_active=True).prefetch_related('slides')
     serializer_class = StorySerializer
@@ -2,6 +2,8 @@ import os
 from pathlib import Path
 from datetime import timedelta
 
+from corsheaders.defaults import default_headers
+
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
 SECRET_KEY = os.environ.get("SECRET_KEY", "django-insecure-CHANGE-ME-IN-PROD")
@@ -25,6 +27,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 
     # Third-party
     "rest_framework",
@@ -44,6 +47,7 @@ INSTALLED_APPS = [
     "apps.tasks",
     "apps.bouquet_builder",
     "apps.stories",
+    "apps.payments",
 ]
 
 AUTH_USER_MODEL = "users.CustomUser"
@@ -135,6 +139,8 @@ REST_FRAMEWORK = {
 # CORS
 CORS_ALLOWED_ORIGINS = os.environ.get("CORS_ALLOWED_ORIGINS", "http://localhost:3000").split(",")
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
+CORS_EXPOSE_HEADERS = ["Idempotent-Replayed"]
 
 # Security
 SECURE_SSL_REDIRECT = os.environ.get("DJANGO_SECURE", "False") == "True"
@@ -186,6 +192,7 @@ UNFOLD = {
                 "separator": True,
                 "items": [
                     {"title": "Заказы", "icon": "shopping_cart", "link": "/admin/orders/order/"},
+                    {"title": "Маршруты курьеров", "icon": "route", "link": "/admin/orders/order/dispatch/"},
                     {"title": "Клиенты", "icon": "people", "link": "/admin/users/customuser/"},
                 ],
             },
@@ -221,9 +228,126 @@ UNFOLD = {
     "DASHBOARD_CALLBACK": "apps.dashboard.dashboard_callback",
 }
 
+# Cache
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ.get("CACHE_URL", "redis://redis:6379/1"),
+    },
+}
+CATALOG_CACHE_ENABLED = os.environ.get("CATALOG_CACHE_ENABLED", "True") == "True"
+CATALOG_CACHE_TIMEOUT = int(os.environ.get("CATALOG_CACHE_TIMEOUT", 60 * 60 * 24))
+
+# Idempotency-Key для POST заказов (apps/idempotency.py): хранение ответа и ожидание дубликата, сек
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+IDEMPOTENCY_LOCK_TIMEOUT = 30
+
+# Channels
+CHANNEL_LAYERS = {
+    "default": {
+        "BACKEND": "channels_redis.core.RedisChannelLayer",
+        "CONFIG": {
+            "hosts": [os.environ.get("CHANNEL_LAYER_URL", "redis://redis:6379/2")],
+        },
+    },
+}
+
 # Celery
 CELERY_BROKER_URL = os.environ.get("CELERY_BROKER_URL", "redis://redis:6379/0")
 CELERY_RESULT_BACKEND = os.environ.get("CELERY_RESULT_BACKEND", "redis://redis:6379/0")
+CELERY_TASK_ALWAYS_EAGER = os.environ.get("CELERY_TASK_ALWAYS_EAGER", "False") == "True"
+CELERY_BEAT_SCHEDULE = {
+    "refresh-popularity": {
+        "task": "apps.products.tasks.refresh_popularity",
+        "schedule": 15 * 60,
+    },
+    "process-payment-events": {
+        "task": "apps.payments.tasks.process_payment_events",
+        "schedule": 60,
+    },
+    "materialize-delivery-slots": {
+        "task": "apps.orders.tasks.materialize_delivery_slots",
+        "schedule": 24 * 60 * 60,
+    },
+    "deliver-notifications": {
+        "task": "apps.orders.tasks.deliver_notifications",
+        "schedule": 60,
+    },
+    "refresh-order-metrics": {
+        "task": "apps.orders.tasks.refresh_order_metrics",
+        "schedule": 15 * 60,
+    },
+    "reconcile-sales-rollup": {
+        "task": "apps.orders.tasks.reconcile_sales_rollup",
+        "schedule": 24 * 60 * 60,
+    },
+    "geocode-pending-orders": {
+        "task": "apps.orders.tasks.geocode_pending_orders",
+        "schedule": 60 * 60,
+    },
+    "archive-orders": {
+        "task": "apps.orders.tasks.archive_orders",
+        "schedule": 24 * 60 * 60,
+    },
+    "purge-notifications": {
+        "task": "apps.orders.tasks.purge_notifications",
+        "schedule": 24 * 60 * 60,
+    },
+}
+
+# Рейтинг популярности: период полураспада веса продажи, дней, и запас на
+# ещё не закоммиченные заказы — свежее этого пересчёт заказы не учитывает
+POPULARITY_HALF_LIFE_DAYS = 14
+POPULARITY_COMMIT_LAG_SECONDS = 5 * 60
+
+# Платежи (apps/payments): провайдер, секрет подписи webhook'ов, пачки обработки
+# Провайдер и секрет — только из окружения, без значений по умолчанию:
+# без них приложение не стартует (PaymentsConfig.ready). FakeProvider — в dev.py
+PAYMENT_PROVIDER = os.environ.get("PAYMENT_PROVIDER", "")
+PAYMENT_WEBHOOK_SECRET = os.environ.get("PAYMENT_WEBHOOK_SECRET", "")
+PAYMENT_FAKE_URL = os.environ.get("PAYMENT_FAKE_URL", "http://localhost:8010")
+PAYMENT_BATCH_SIZE = 500
+PAYMENT_BATCH_DELAY = 1
+
+# Слоты доставки (apps/orders/slots.py): горизонт, максимальный диапазон запроса, кэш списка
+DELIVERY_SLOTS_DAYS_AHEAD = 60
+DELIVERY_SLOTS_MAX_RANGE_DAYS = 31
+DELIVERY_SLOTS_CACHE_TIMEOUT = 10 * 60
+
+# Маршруты курьеров (apps/orders/dispatch.py) и геокодер адресов
+COURIER_MAX_STOPS = 12
+GEOCODER = os.environ.get("GEOCODER", "apps.orders.geocoding.OfflineGeocoder")
+GEOCODER_URL = os.environ.get("GEOCODER_URL", "https://nominatim.openstreetmap.org/search")
+GEOCODER_CACHE_TIMEOUT = 30 * 24 * 60 * 60
+GEOCODER_OFFLINE_RADIUS_KM = 10
+# Публичный Nominatim разрешает не больше одного запроса в секунду
+GEOCODER_RATE_LIMIT = os.environ.get("GEOCODER_RATE_LIMIT", "1/s")
+
+# Push-уведомления (apps/orders/notifications.py): отправитель, пачки, повторы с backoff
+PUSH_SENDER = os.environ.get("PUSH_SENDER", "apps.orders.notifications.FakeSender")
+FIREBASE_CREDENTIALS = os.environ.get("FIREBASE_CREDENTIALS", "")
+NOTIFICATION_BATCH_SIZE = 500
+NOTIFICATION_BATCH_DELAY = 1
+NOTIFICATION_MAX_ATTEMPTS = 6
+NOTIFICATION_RETRY_BASE = 30
+NOTIFICATION_LEASE_SECONDS = 5 * 60
+# Сколько дней хранить отправленные и failed уведомления
+NOTIFICATION_RETENTION_DAYS = 30
+
+# Сводка продаж для дашборда (apps/orders/sales.py): сколько последних дней сверять ночью
+SALES_ROLLUP_RECONCILE_DAYS = 35
+
+# Выгрузка заказов (apps/orders/export.py): размер чанка серверного курсора, папка фоновых выгрузок
+ORDER_EXPORT_CHUNK_SIZE = 2000
+ORDER_EXPORT_DIR = "exports"
+
+# Архив заказов: завершённые/отменённые старше N дней, пачками (apps/orders/archive.py)
+ORDER_ARCHIVE_AFTER_DAYS = int(os.environ.get("ORDER_ARCHIVE_AFTER_DAYS", "180"))
+ORDER_ARCHIVE_BATCH_SIZE = 500
+
+# Производные изображений: ширины (px) и форматы, см. apps/images.py
+IMAGE_VARIANT_WIDTHS = (320, 640, 1080)
+IMAGE_VARIANT_FORMATS = ("webp", "jpeg")
 
 # Logging
 LOGGING = {
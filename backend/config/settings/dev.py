@@ -13,6 +13,19 @@ DATABASES = {
 
 CORS_ALLOW_ALL_ORIGINS = True
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+}
+
+# Фейковый платёжный провайдер (manage.py fake_payment_provider) с публичным секретом
+PAYMENT_PROVIDER = os.environ.get("PAYMENT_PROVIDER", "apps.payments.providers.FakeProvider")
+PAYMENT_WEBHOOK_SECRET = os.environ.get("PAYMENT_WEBHOOK_SECRET", "fake-payment-secret")
+
+# В dev нет воркера — задачи Celery выполняются сразу
+CELERY_TASK_ALWAYS_EAGER = True
+
 CHANNEL_LAYERS = {
     "default": {
         "BACKEND": "channels.layers.InMemoryChannelLayer",
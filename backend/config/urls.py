@@ -10,6 +10,7 @@ urlpatterns = [
     path('api/', include('apps.orders.urls')),
     path('api/builder/', include('apps.bouquet_builder.urls')),
     path('api/', include('apps.stories.urls')),
+    path('api/payments/', include('apps.payments.urls')),
 ]
 
 if settings.DEBUG: